@@ -2,30 +2,30 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
 from probe.models import AnalysisResult, Finding
+from probe.storage import read_findings
 
+if TYPE_CHECKING:
+    from probe.index import Criterion
 
-def load_findings(findings_dir: str | Path) -> list[Finding]:
-    """Читает все JSON-файлы из директории и возвращает список Finding.
+
+def load_findings(findings_dir: str | Path, fact: Criterion = None, probe: Criterion = None,
+                  min_confidence: Optional[float] = None) -> list[Finding]:
+    """Читает все файлы findings (JSON/JSONL) директории и возвращает список Finding.
 
     Args:
-        findings_dir: Путь к директории с JSON-файлами findings.
+        findings_dir: Путь к директории с файлами findings (или к одному файлу).
+        fact: Только findings этого типа факта (строка или набор строк).
+        probe: Только findings этого зонда (строка или набор строк).
+        min_confidence: Только findings с confidence не ниже порога.
 
     Returns:
         Плоский список Finding из всех файлов.
     """
-    p = Path(findings_dir)
-    results: list[Finding] = []
-
-    for json_file in sorted(p.glob("*.json")):
-        data = json.loads(json_file.read_text(encoding="utf-8"))
-        items = data if isinstance(data, list) else [data]
-        results.extend(Finding(**item) for item in items)
-
-    return results
+    return read_findings(findings_dir, fact=fact, probe=probe, min_confidence=min_confidence)
 
 
 class BaseAnalyzer:
@@ -0,0 +1,434 @@
+"""Бинарный контейнер досье (``.probe``): колоночные блоки и mmap.
+
+JSON-досье на гигабайты читается минутами: разобрать и провалидировать
+приходится каждую запись, даже если карте нужны только эндпоинты.
+Контейнер раскладывает findings по блокам «зонд × fact» и читается через
+mmap: оглавление указывает, где лежит каждый блок, и разбираются только
+блоки запрошенных фактов.
+
+Раскладка файла (little-endian)::
+
+    заголовок   MAGIC, версия, флаги, смещение и длина оглавления
+    блоки       по блоку на пару (probe, fact), выровнены на 8 байт
+    строки      словарь: число строк, смещения концов, UTF-8 байты
+    оглавление  JSON: target, env, scanned_at, наборы тегов, строки, блоки
+
+Блок — колонки по ``rows`` значений: confidence (f64), ts (i64, мкс UTC),
+номер строки досье, env, entity, набор тегов (u32), файл и строка
+location (i32, -1 — нет), затем по колонке u32 на каждый ключ data.
+Ячейка data — id строки словаря; со старшим битом — id JSON-текста
+значения (числа, bool, списки), ``0xFFFFFFFF`` — ключа в строке нет.
+Номер строки досье восстанавливает исходный порядок findings.
+
+Версия — ``VERSION``; файл другой версии не читается (ValueError).
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Iterator, Optional, Sequence, Union, overload
+
+from probe.columnar import _MISSING, ColumnarDossier, StringTable
+from probe.index import Criterion, FindingIndex
+from probe.models import Dossier, Finding, _finding
+
+MAGIC = b"PROBEDOS"
+VERSION = 1
+SUFFIX = ".probe"
+
+#: magic, версия, флаги, смещение оглавления, длина оглавления
+_HEADER = struct.Struct("<8sHHQQ")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ABSENT = 0xFFFFFFFF
+_JSON_BIT = 0x80000000
+#: Колонки блока: (имя, typecode); сначала 8-байтовые — выравнивание
+_COLUMNS = (("confidence", "d"), ("ts", "q"), ("row", "I"), ("env", "I"),
+            ("entity", "I"), ("tags", "I"), ("file", "i"), ("line", "i"))
+_SWAP = sys.byteorder != "little"
+#: Типы значений data, JSON-текст которых кэшируется при записи
+_SCALARS = frozenset((int, float, bool, type(None)))
+
+
+def write_binary(dossier: Union[Dossier, ColumnarDossier], path: str | Path) -> Path:
+    """Записать досье в контейнер ``path`` (через ``.part`` и переименование)."""
+    if not isinstance(dossier, ColumnarDossier):
+        dossier = ColumnarDossier.from_dossier(dossier)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    part = path.with_name(path.name + ".part")
+    strings = StringTable()
+    src = dossier.strings.strings
+
+    groups: dict[tuple[int, int], array] = {}
+    for row, key in enumerate(zip(dossier._probe, dossier._fact)):
+        rows = groups.get(key)
+        if rows is None:
+            rows = groups[key] = array("I")
+        rows.append(row)
+
+    blocks = []
+    try:
+        with open(part, "wb") as fh:
+            fh.write(bytes(_HEADER.size))
+            for (probe_id, fact_id), rows in sorted(
+                    groups.items(), key=lambda item: (src[item[0][1]], src[item[0][0]])):
+                _pad(fh)
+                blocks.append({
+                    "probe": strings.intern(src[probe_id]),
+                    "fact": strings.intern(src[fact_id]),
+                    "rows": len(rows),
+                    "offset": fh.tell(),
+                    "keys": _write_block(fh, dossier, rows, fact_id, strings),
+                })
+            tagsets = [[strings.intern(t) for t in tags] for tags in dossier._tagsets]
+            if len(strings) >= _JSON_BIT:
+                raise ValueError(f"Слишком много строк для контейнера: {len(strings)}")
+            _pad(fh)
+            strings_offset = fh.tell()
+            _write_strings(fh, strings)
+            toc = json.dumps({
+                "target": dossier.target,
+                "env": dossier.env,
+                "scanned_at": dossier.scanned_at.isoformat(),
+                "rows": len(dossier),
+                "tagsets": tagsets,
+                "strings": {"offset": strings_offset, "count": len(strings)},
+                "blocks": blocks,
+            }, separators=(",", ":")).encode("utf-8")
+            toc_offset = fh.tell()
+            fh.write(toc)
+            fh.seek(0)
+            fh.write(_HEADER.pack(MAGIC, VERSION, 0, toc_offset, len(toc)))
+        os.replace(part, path)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    return path
+
+
+def _write_block(fh, dossier: ColumnarDossier, rows: array, fact_id: int,
+                 strings: StringTable) -> list[int]:
+    src = dossier.strings.strings
+    intern = strings.intern
+
+    def remap(column: array, typecode: str) -> array:
+        out = array(typecode)
+        for r in rows:
+            sid = column[r]
+            out.append(sid if typecode == "i" and sid < 0 else intern(src[sid]))
+        return out
+
+    columns = {
+        "confidence": array("d", (dossier._confidence[r] for r in rows)),
+        "ts": array("q", (dossier._ts[r] for r in rows)),
+        "row": rows,
+        "env": remap(dossier._env, "I"),
+        "entity": remap(dossier._entity, "I"),
+        "tags": array("I", (dossier._tags[r] for r in rows)),
+        "file": remap(dossier._file, "i"),
+        "line": array("i", (dossier._line[r] for r in rows)),
+    }
+    for name, _ in _COLUMNS:
+        _write_array(fh, columns[name])
+
+    data = dossier._data[fact_id]
+    positions = [dossier._fact_pos[r] for r in rows]
+    scalars: dict[tuple[type, Any], int] = {}
+    keys = []
+    for key, values in zip(data.keys, data.columns):
+        column = array("I")
+        for pos in positions:
+            value = values[pos]
+            if value is _MISSING:
+                column.append(_ABSENT)
+            elif type(value) is str:
+                column.append(intern(value))
+            elif type(value) in _SCALARS:
+                key_ = (type(value), value)
+                sid = scalars.get(key_)
+                if sid is None:
+                    sid = scalars[key_] = intern(json.dumps(value)) | _JSON_BIT
+                column.append(sid)
+            else:
+                text = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+                column.append(intern(text) | _JSON_BIT)
+        if any(v != _ABSENT for v in column):
+            keys.append(intern(key))
+            _write_array(fh, column)
+    return keys
+
+
+def _write_strings(fh, strings: StringTable) -> None:
+    ends = array("I")
+    blob = bytearray()
+    for s in strings.strings:
+        blob += s.encode("utf-8")
+        ends.append(len(blob))
+    fh.write(struct.pack("<I", len(ends)))
+    _write_array(fh, ends)
+    fh.write(blob)
+
+
+def _write_array(fh, values: array) -> None:
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    fh.write(values.tobytes())
+
+
+def _pad(fh) -> None:
+    fh.write(bytes(-fh.tell() % 8))
+
+
+class BinaryDossier:
+    """Досье из контейнера ``.probe``, читаемое по блокам через mmap.
+
+    Счётчики (``len``, ``counts("probe")``, ``counts("fact")``) берутся из
+    оглавления; findings блока разбираются при первом запросе его факта
+    или зонда и кэшируются. API как у Dossier: ``query``, ``by_*``,
+    ``counts``, ``findings`` (ленивая последовательность всех findings).
+
+    Raises:
+        ValueError: Файл не контейнер PROBE или другой версии.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open()
+        except Exception:
+            self._mm.close()
+            raise
+
+    def _open(self) -> None:
+        mm = self._mm
+        if len(mm) < _HEADER.size:
+            raise ValueError(f"{self.path}: не контейнер PROBE")
+        magic, version, _, toc_offset, toc_length = _HEADER.unpack_from(mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: не контейнер PROBE")
+        if version != VERSION:
+            raise ValueError(f"{self.path}: версия контейнера {version}, поддерживается {VERSION}")
+        toc = json.loads(mm[toc_offset:toc_offset + toc_length])
+        self.target: str = toc["target"]
+        self.env: str = toc["env"]
+        self.scanned_at = datetime.fromisoformat(toc["scanned_at"])
+        self._rows: int = toc["rows"]
+        self._blocks: list[dict] = toc["blocks"]
+        offset, count = toc["strings"]["offset"], toc["strings"]["count"]
+        self._ends = self._array("I", offset + 4, count)
+        self._blob = offset + 4 + 4 * count
+        self._strings: list[Optional[str]] = [None] * count
+        self._tagsets = [tuple(self._string(sid) for sid in tags) for tags in toc["tagsets"]]
+        self._decoded: dict[int, list[tuple[int, Finding]]] = {}
+        self._all: Optional[list[Finding]] = None
+        self._json: dict[int, Any] = {}
+        self._datetimes: dict[int, datetime] = {}
+
+    # -- Dossier API --------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._rows
+
+    @property
+    def findings(self) -> _BinaryFindings:
+        """Все findings досье в исходном порядке (разбираются при обращении)."""
+        return _BinaryFindings(self)
+
+    def counts(self, field: str) -> dict[str, int]:
+        """Число findings на значение поля; probe и fact — без разбора блоков."""
+        if field in ("probe", "fact"):
+            counts: dict[str, int] = {}
+            for block in self._blocks:
+                value = self._string(block[field])
+                counts[value] = counts.get(value, 0) + block["rows"]
+            return counts
+        return FindingIndex(self.findings).counts(field)
+
+    def query(self, probe: Criterion = None, fact: Criterion = None, tag: Criterion = None,
+              entity: Criterion = None, test_class: Criterion = None,
+              file: Criterion = None) -> list[Finding]:
+        """Findings под все критерии (см. Dossier.query).
+
+        ``probe`` и ``fact`` выбирают блоки по оглавлению; остальные
+        критерии применяются к findings выбранных блоков.
+        """
+        found = self._select(probe, fact)
+        if tag is None and entity is None and test_class is None and file is None:
+            return found
+        rows = FindingIndex(found).rows(tag=tag, entity=entity, test_class=test_class, file=file)
+        return [found[row] for row in rows]
+
+    def by_probe(self, probe_name: str) -> list[Finding]:
+        """Вернуть findings конкретного зонда."""
+        return self.query(probe=probe_name)
+
+    def by_fact(self, fact: str) -> list[Finding]:
+        """Вернуть findings с конкретным типом факта."""
+        return self.query(fact=fact)
+
+    def by_tag(self, tag: str) -> list[Finding]:
+        """Вернуть findings с конкретным тегом."""
+        return self.query(tag=tag)
+
+    def to_dossier(self) -> Dossier:
+        """Обычный Dossier со всеми findings в памяти."""
+        return Dossier(target=self.target, env=self.env, scanned_at=self.scanned_at,
+                       findings=self._select(None, None))
+
+    @property
+    def blocks_loaded(self) -> int:
+        """Сколько блоков уже разобрано (остальные не читались)."""
+        return len(self._decoded)
+
+    def close(self) -> None:
+        self._mm.close()
+
+    def __enter__(self) -> BinaryDossier:
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException], tb: Optional[TracebackType]) -> None:
+        self.close()
+
+    # -- чтение блоков ------------------------------------------------------
+
+    def _select(self, probe: Criterion, fact: Criterion) -> list[Finding]:
+        if probe is None and fact is None and self._all is not None:
+            return list(self._all)
+        probes = _names(probe)
+        facts = _names(fact)
+        selected = [i for i, block in enumerate(self._blocks)
+                    if (probes is None or self._string(block["probe"]) in probes)
+                    and (facts is None or self._string(block["fact"]) in facts)]
+        if len(selected) == 1:
+            return [f for _, f in self._block(selected[0])]
+        keyed = [item for i in selected for item in self._block(i)]
+        keyed.sort(key=lambda item: item[0])
+        found = [f for _, f in keyed]
+        if probe is None and fact is None:
+            self._all = found
+            return list(found)
+        return found
+
+    def _everything(self) -> list[Finding]:
+        if self._all is None:
+            self._select(None, None)
+        return self._all
+
+    def _block(self, index: int) -> list[tuple[int, Finding]]:
+        decoded = self._decoded.get(index)
+        if decoded is None:
+            # Разбор блока создаёт сотни тысяч объектов без циклов: проходы
+            # сборщика циклического мусора на них — больше половины времени
+            paused = gc.isenabled()
+            gc.disable()
+            try:
+                decoded = self._decoded[index] = self._decode(self._blocks[index])
+            finally:
+                if paused:
+                    gc.enable()
+        return decoded
+
+    def _decode(self, block: dict) -> list[tuple[int, Finding]]:
+        n, offset = block["rows"], block["offset"]
+        columns = {}
+        for name, typecode in _COLUMNS:
+            columns[name] = self._array(typecode, offset, n)
+            offset += columns[name].itemsize * n
+        keys = [self._string(sid) for sid in block["keys"]]
+        data_columns = []
+        for _ in keys:
+            data_columns.append(self._array("I", offset, n))
+            offset += 4 * n
+
+        probe, fact = self._string(block["probe"]), self._string(block["fact"])
+        string, tagsets, datetime_ = self._string, self._tagsets, self._datetime
+        # Данные — по колонкам ключей: значение ячейки разбирается один раз
+        data_values = [[_MISSING if cell == _ABSENT else self._value(cell) for cell in column]
+                       for column in data_columns]
+        data = [{key: v for key, v in zip(keys, row) if v is not _MISSING}
+                for row in zip(*data_values)] if keys else [{} for _ in range(n)]
+        locations = [None if file < 0 else string(file) if line < 0 else f"{string(file)}:{line}"
+                     for file, line in zip(columns["file"], columns["line"])]
+        decoded = [
+            (row, _finding(probe, string(env), string(entity), fact, values, location,
+                           confidence, list(tagsets[tags]), datetime_(ts)))
+            for row, env, entity, values, location, confidence, tags, ts in zip(
+                columns["row"], columns["env"], columns["entity"], data, locations,
+                columns["confidence"], columns["tags"], columns["ts"])
+        ]
+        return decoded
+
+    def _array(self, typecode: str, offset: int, count: int) -> array:
+        values = array(typecode)
+        values.frombytes(self._mm[offset:offset + values.itemsize * count])
+        if _SWAP:
+            values.byteswap()
+        return values
+
+    def _string(self, sid: int) -> str:
+        value = self._strings[sid]
+        if value is None:
+            start = self._ends[sid - 1] if sid else 0
+            value = self._strings[sid] = sys.intern(
+                self._mm[self._blob + start:self._blob + self._ends[sid]].decode("utf-8"))
+        return value
+
+    def _value(self, cell: int) -> Any:
+        if not cell & _JSON_BIT:
+            return self._string(cell)
+        # Как в ColumnarDossier, одинаковые значения data — общие объекты
+        # (findings — снимки только для чтения); JSON разбирается один раз
+        value = self._json.get(cell, _MISSING)
+        if value is _MISSING:
+            value = self._json[cell] = json.loads(self._string(cell & ~_JSON_BIT))
+        return value
+
+    def _datetime(self, micros: int) -> datetime:
+        ts = self._datetimes.get(micros)
+        if ts is None:
+            ts = self._datetimes[micros] = _EPOCH + timedelta(microseconds=micros)
+        return ts
+
+
+class _BinaryFindings(Sequence[Finding]):
+    """Все findings BinaryDossier: длина — из оглавления, элементы — по запросу."""
+
+    __slots__ = ("_dossier",)
+
+    def __init__(self, dossier: BinaryDossier) -> None:
+        self._dossier = dossier
+
+    def __len__(self) -> int:
+        return len(self._dossier)
+
+    @overload
+    def __getitem__(self, index: int) -> Finding: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Finding]: ...
+
+    def __getitem__(self, index):
+        return self._dossier._everything()[index]
+
+    def __iter__(self) -> Iterator[Finding]:
+        return iter(self._dossier._everything())
+
+
+def _names(criterion: Criterion) -> Optional[set[str]]:
+    if criterion is None:
+        return None
+    return {criterion} if isinstance(criterion, str) else set(criterion)
+
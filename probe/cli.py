@@ -1,50 +1,109 @@
-"""CLI точка входа PROBE: команды `probe scan`, `probe map`, `probe analyze`."""
+"""CLI точка входа PROBE: команды `probe scan`, `probe merge`, `probe map`, `probe diff`, `probe analyze`, `probe run`, `probe watch`, `probe daemon`."""
 
 from __future__ import annotations
 
-import importlib
 import json
 import logging
-import pkgutil
 from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
 
 import click
 
-from probe.analyzers.base import BaseAnalyzer
-from probe.analyzers.base import load_findings as load_findings_flat
-from probe.correlator import correlate, load_findings
-from probe.runner import run_probes
-from probes.base import BaseProbe
+from probe.defaults import (
+    DEFAULT_DEBOUNCE,
+    DEFAULT_LEASE_SIZE,
+    DEFAULT_LEASE_TTL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PORT,
+    DEDUP_MODES,
+    DEFAULT_DEDUP,
+    DIFF_MEMORY_MB,
+    EXECUTORS,
+    FINDINGS_COMPRESSIONS,
+    FINDINGS_FORMATS,
+    JSONL_MIN_FILES,
+    QUERY_FIELDS,
+    QUERY_FORMATS,
+)
+
+# Тяжёлые модули (pydantic, javalang, зонды) импортируются внутри команд:
+# `probe --help` не грузит ни pydantic, ни javalang, `probe map` — javalang.
+if TYPE_CHECKING:
+    from probe.analyzers.base import BaseAnalyzer
+    from probe.runner import ScanProgress
+    from probes.base import BaseProbe
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 
+#: Поддерживаемые типы сред
+ENVS = ["test", "db", "java", "api", "infra", "doc"]
 
-def _discover_probes(env: str) -> list[BaseProbe]:
-    """Автообнаружение зондов для заданной среды.
 
-    Сканирует пакет `probes.<env>` и импортирует все классы, наследующие BaseProbe.
+def _discover_probes(env: str, names: Sequence[str] = ()) -> list[BaseProbe]:
+    """Зонды среды из реестра (probe.registry): встроенные из `probes.<env>`
+    и сторонние из entry points. Импортируются только модули выбранных зондов.
     """
-    probe_instances: list[BaseProbe] = []
+    from probe.registry import default_registry
 
-    pkg_name = f"probes.{env}"
     try:
-        pkg = importlib.import_module(pkg_name)
-    except ModuleNotFoundError:
-        raise click.BadParameter(f"Среда '{env}' не поддерживается (пакет {pkg_name} не найден)")
+        return default_registry().probes(env, names)
+    except KeyError:
+        raise click.BadParameter(f"Среда '{env}' не поддерживается (пакет probes.{env} не найден)")
+    except LookupError as exc:
+        raise click.BadParameter(str(exc), param_hint="--probe")
+
+
+def _echo_progress(state: ScanProgress) -> None:
+    """Однострочный прогресс сканирования в stderr."""
+    click.echo(
+        f"\rФайлы: {state.files_done}/{state.files_total}  "
+        f"{state.bytes_done / 1_048_576:.1f} МБ  "
+        f"findings: {state.findings} ({state.findings_per_sec:.0f}/с)",
+        err=True, nl=False,
+    )
+
+
+def _daemon_option(fn):
+    """Опция ``--daemon``: выполнить команду в запущенном `probe daemon`."""
+    return click.option(
+        "--daemon", "daemon_socket", envvar="PROBE_DAEMON", metavar="SOCKET",
+        help="Выполнить в запущенном `probe daemon` (Unix-сокет; env PROBE_DAEMON)",
+    )(fn)
+
+
+def _load_options(fn):
+    """Опции загрузки findings: ``--workers`` и ``--trusted``."""
+    fn = click.option(
+        "--trusted", is_flag=True,
+        help="Не валидировать файлы, записанные PROBE, если их .sha256 совпадает",
+    )(fn)
+    return click.option(
+        "--workers", type=click.IntRange(min=1),
+        help="Процессов разбора файлов findings (по умолчанию — по числу CPU)",
+    )(fn)
+
 
-    for module_info in pkgutil.iter_modules(pkg.__path__):
-        module = importlib.import_module(f"{pkg_name}.{module_info.name}")
-        for attr_name in dir(module):
-            attr = getattr(module, attr_name)
-            if (
-                isinstance(attr, type)
-                and issubclass(attr, BaseProbe)
-                and attr is not BaseProbe
-                and attr.name
-            ):
-                probe_instances.append(attr())
+def _dedup_option(fn):
+    """Опция ``--dedup``: повторы фактов в досье скана (probe.dedup)."""
+    return click.option(
+        "--dedup", type=click.Choice(DEDUP_MODES), default=DEFAULT_DEDUP,
+        help="Повторы фактов: exact — писать один раз, merge — слить факты из разных "
+             "мест в один со списком data.evidence, none — писать все",
+    )(fn)
 
-    return probe_instances
+
+def _via_daemon(socket_path: str, msg: dict, echo: bool = True) -> dict:
+    """Отправить запрос демону и вывести его ответ."""
+    from probe.client import request
+
+    try:
+        reply = request(socket_path, msg)
+    except (ConnectionError, RuntimeError) as exc:
+        raise click.ClickException(str(exc))
+    if echo:
+        for line in reply["lines"]:
+            click.echo(line)
+    return reply
 
 
 @click.group()
@@ -53,52 +112,334 @@ def cli() -> None:
 
 
 @cli.command()
-@click.option("--target", "-t", required=True, help="Путь к директории или URL цели")
+@click.option("--target", "-t", help="Путь к директории или URL цели")
+@click.option("--targets", "targets_file", type=click.Path(exists=True, dir_okay=False),
+              help="Файл целей (строки `target [env] [out]`) или JSON-манифест")
 @click.option(
     "--env",
     "-e",
-    required=True,
-    type=click.Choice(["test", "db", "java", "api", "infra", "doc"]),
-    help="Тип среды",
+    type=click.Choice(ENVS),
+    help="Тип среды (для --targets — среда по умолчанию)",
 )
 @click.option("--out", "-o", default="findings", help="Директория для сохранения findings")
-@click.option("--workers", default=8, help="Число параллельных потоков")
-def scan(target: str, env: str, out: str, workers: int) -> None:
-    """Запустить все зонды на целевой проект."""
-    click.echo(f"Цель: {target}  среда: {env}")
+@click.option("--workers", default=8, help="Число параллельных воркеров")
+@click.option("--concurrency", default=DEFAULT_MAX_CONCURRENCY,
+              help="Лимит одновременных I/O-операций async-зондов")
+@click.option("--executor", type=click.Choice(EXECUTORS), default="auto",
+              help="Пул для sync-зондов: потоки (auto) или процессы по явному выбору")
+@click.option("--progress", is_flag=True, help="Показывать прогресс сканирования")
+@click.option("--shard", "shard_spec", metavar="I/N",
+              help="Сканировать только I-й из N шардов файлов (для нескольких машин)")
+@click.option("--probe", "-p", "probe_names", multiple=True,
+              help="Запустить только этот зонд (можно несколько раз)")
+@click.option("--format", "fmt", type=click.Choice(FINDINGS_FORMATS), default="auto",
+              help="Формат findings: json, jsonl (по строке на finding, пишется во время "
+                   "скана), binary (контейнер .probe для `probe map`) "
+                   f"или auto — jsonl, если файлов цели не меньше {JSONL_MIN_FILES}")
+@click.option("--compress", type=click.Choice(FINDINGS_COMPRESSIONS), default="none",
+              help="Сжимать findings json/jsonl потоком: gzip (.json.gz) или xz (.jsonl.xz)")
+@click.option("--store", metavar="DB",
+              help="Писать findings в хранилище SQLite (для `probe query`) вместо --out")
+@_dedup_option
+@_daemon_option
+def scan(target: str | None, targets_file: str | None, env: str | None, out: str,
+         workers: int, concurrency: int, executor: str, progress: bool,
+         shard_spec: str | None, probe_names: tuple[str, ...], fmt: str, compress: str,
+         store: str | None, dedup: str, daemon_socket: str | None) -> None:
+    """Запустить все зонды на целевой проект (или на флот целей через --targets)."""
+    if targets_file and target:
+        raise click.UsageError("--target и --targets взаимоисключающие")
+    if fmt == "binary" and compress != "none":
+        raise click.UsageError("--compress не поддерживается с --format binary")
+    if store and (fmt != "auto" or compress != "none"):
+        raise click.UsageError("--store не сочетается с --format и --compress")
+    if daemon_socket:
+        if targets_file or shard_spec:
+            raise click.UsageError("--daemon не поддерживает --targets и --shard")
+        if not target or not env:
+            raise click.UsageError("Нужны --target и --env")
+        _via_daemon(daemon_socket, {"op": "scan", "target": str(Path(target).resolve()),
+                                    "env": env, "out": str(Path(out).resolve()),
+                                    "probes": list(probe_names), "format": fmt,
+                                    "compress": compress, "dedup": dedup,
+                                    "store": str(Path(store).resolve()) if store else None})
+        return
+    from probe.runner import run_probes, stream_findings
+    from probe.shard import parse_shard
+    from probe.storage import FindingsWriter, findings_path, write_findings
 
-    probes = _discover_probes(env)
+    shard = None
+    if shard_spec:
+        try:
+            shard = parse_shard(shard_spec)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint="--shard")
+    if targets_file:
+        if probe_names:
+            raise click.UsageError("--probe не поддерживается с --targets")
+        _scan_fleet(targets_file, env, out, workers, concurrency, executor, progress, shard,
+                    fmt, compress, store, dedup)
+        return
+    if not target or not env:
+        raise click.UsageError("Нужны --target и --env (или --targets)")
+
+    click.echo(f"Цель: {target}  среда: {env}"
+               + (f"  шард: {shard[0]}/{shard[1]}" if shard else ""))
+
+    probes = _discover_probes(env, probe_names)
     if not probes:
         click.echo("Зонды не найдены. Добавьте зонды в probes/<env>/")
         return
 
     click.echo(f"Найдено зондов: {len(probes)}")
 
-    dossier = run_probes(probes, target, env, max_workers=workers)
-
-    out_dir = Path(out)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_file = out_dir / f"{env}_findings.json"
-    out_file.write_text(
-        json.dumps(
-            [f.model_dump(mode="json") for f in dossier.findings],
-            ensure_ascii=False,
-            indent=2,
-        ),
-        encoding="utf-8",
-    )
+    options = dict(max_workers=workers, max_concurrency=concurrency, executor=executor,
+                   progress=_echo_progress if progress else None, shard=shard, dedup=dedup)
+    if store:
+        from probe.store import StoreWriter
+
+        # Порции пишутся в базу по мере готовности файлов, по транзакции на порцию
+        with StoreWriter(store, str(target), env) as store_writer:
+            for findings in stream_findings(probes, target, **options):
+                store_writer.write(findings)
+        if progress:
+            click.echo(err=True)
+        click.echo(f"Findings: {store_writer.count} -> {store_writer.path}")
+        return
+    fmt = _findings_format(fmt, probes, target)
+    method = None if compress == "none" else compress
+    if fmt == "jsonl":
+        # Findings пишутся по мере готовности файлов, досье не собирается
+        with FindingsWriter(findings_path(out, env, fmt, method), fmt, method) as writer:
+            for findings in stream_findings(probes, target, **options):
+                writer.write(findings)
+        count, out_file = writer.count, writer.path
+    else:
+        dossier = run_probes(probes, target, env, **options)
+        count, out_file = len(dossier.findings), write_findings(dossier, out, fmt, method)
+    if progress:
+        click.echo(err=True)
+    click.echo(f"Findings: {count} -> {out_file}")
+
+
+def _findings_format(fmt: str, probes: Sequence[BaseProbe], target: str) -> str:
+    """Формат findings скана; для ``auto`` — по числу файлов цели."""
+    if fmt != "auto":
+        return fmt
+    from probe.runner import collect_files
+    from probe.storage import resolve_format
+
+    return resolve_format(fmt, len(collect_files(probes, target)))
+
+
+def _scan_fleet(targets_file: str, env: str | None, out: str, workers: int,
+                concurrency: int, executor: str, progress: bool,
+                shard: tuple[int, int] | None = None, fmt: str = "json",
+                compress: str = "none", store: str | None = None,
+                dedup: str = "none") -> None:
+    """Fleet-скан: все цели через один пул, отдельное досье на цель."""
+    from probe.fleet import load_targets
+    from probe.runner import ScanJob, iter_dossiers
+    from probe.storage import write_findings
+
+    try:
+        targets = load_targets(targets_file, env, out)
+    except (ValueError, KeyError) as exc:
+        raise click.BadParameter(str(exc), param_hint="--targets")
+
+    probes_by_env: dict[str, list[BaseProbe]] = {}
+    for t in targets:
+        if t.env not in probes_by_env:
+            probes_by_env[t.env] = _discover_probes(t.env)
+
+    jobs = [ScanJob(probes=probes_by_env[t.env], target=t.target, env=t.env, shard=shard,
+                    dedup=dedup)
+            for t in targets]
+    click.echo(f"Целей: {len(jobs)}  сред: {len(probes_by_env)}")
+
+    total = 0
+    for index, dossier in iter_dossiers(
+        jobs, max_workers=workers, max_concurrency=concurrency, executor=executor,
+        progress=_echo_progress if progress else None,
+    ):
+        job = jobs[index]
+        if store:
+            from probe.store import write_store
+
+            out_file = write_store(dossier, store)
+        else:
+            out_file = write_findings(dossier, targets[index].out,
+                                      _findings_format(fmt, job.probes, job.target),
+                                      None if compress == "none" else compress)
+        total += len(dossier.findings)
+        click.echo(f"[{targets[index].target}] findings: {len(dossier.findings)} -> {out_file}")
+    if progress:
+        click.echo(err=True)
+    click.echo(f"Findings всего: {total}")
+
+
+@cli.command()
+@click.argument("shards", nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option("--out", "-o", default="findings", help="Директория для сохранения findings")
+def merge(shards: tuple[str, ...], out: str) -> None:
+    """Слить findings шардов `probe scan --shard` в одно досье."""
+    from probe.correlator import load_findings
+    from probe.models import Dossier
+    from probe.shard import merge_findings
+    from probe.storage import write_findings
+
+    dossiers = [load_findings(path) for path in shards]
+    envs = {d.env for d in dossiers if d.findings}
+    if len(envs) > 1:
+        raise click.UsageError(f"Шарды разных сред: {', '.join(sorted(envs))}")
+    env = envs.pop() if envs else dossiers[0].env
+    try:
+        probe_order = [p.name for p in _discover_probes(env)]
+    except click.BadParameter:
+        probe_order = []
+
+    merged = Dossier(target=", ".join(shards), env=env)
+    merged.findings.extend(merge_findings([d.findings for d in dossiers], probe_order))
+    out_file = write_findings(merged, out)
+    total = sum(len(d.findings) for d in dossiers)
+    click.echo(f"Шардов: {len(shards)}  findings: {len(merged.findings)} "
+               f"(дубликатов: {total - len(merged.findings)}) -> {out_file}")
+
+
+@cli.command()
+@click.option("--target", "-t", required=True, help="Путь к директории цели")
+@click.option("--env", "-e", required=True, type=click.Choice(ENVS), help="Тип среды")
+@click.option("--out", "-o", default="findings", help="Директория для сохранения findings")
+@click.option("--host", default="127.0.0.1", help="Адрес для подключения воркеров")
+@click.option("--port", default=DEFAULT_PORT, help="TCP-порт координатора")
+@click.option("--lease-size", default=DEFAULT_LEASE_SIZE, help="Файлов в одной аренде")
+@click.option("--lease-ttl", default=DEFAULT_LEASE_TTL,
+              help="Секунд без ответа воркера до переназначения аренды")
+@_dedup_option
+def coordinator(target: str, env: str, out: str, host: str, port: int,
+                lease_size: int, lease_ttl: float, dedup: str) -> None:
+    """Раздать файлы цели воркерам `probe worker` и собрать общее досье."""
+    from probe.distributed import Coordinator
+    from probe.storage import write_findings
 
+    probes = _discover_probes(env)
+    coord = Coordinator(probes, target, env, host=host, port=port,
+                        lease_size=lease_size, lease_ttl=lease_ttl, dedup=dedup)
+    click.echo(f"Координатор {coord.address[0]}:{coord.address[1]}  файлов: {len(coord.files)}")
+    dossier = coord.run()
+    out_file = write_findings(dossier, out)
     click.echo(f"Findings: {len(dossier.findings)} -> {out_file}")
 
 
+@cli.command()
+@click.option("--connect", "-c", required=True, help="Адрес координатора host:port")
+@click.option("--target", "-t", required=True, help="Локальный путь к той же цели")
+def worker(connect: str, target: str) -> None:
+    """Получать аренды файлов от координатора и сканировать их."""
+    from probe.distributed import run_worker
+
+    host, _, port = connect.rpartition(":")
+    if not host or not port.isdigit():
+        raise click.BadParameter("ожидается host:port", param_hint="--connect")
+    scanned = run_worker((host, int(port)), target, _discover_probes)
+    click.echo(f"Просканировано файлов: {scanned}")
+
+
+@cli.command(name="watch")
+@click.option("--target", "-t", required=True, type=click.Path(exists=True, file_okay=False),
+              help="Путь к директории цели")
+@click.option("--env", "-e", required=True, type=click.Choice(ENVS), help="Тип среды")
+@click.option("--out", "-o", default="findings", help="Директория для findings и product-map.md")
+@click.option("--workers", default=8, help="Число параллельных воркеров первого скана")
+@click.option("--debounce", default=DEFAULT_DEBOUNCE, show_default=True,
+              help="Секунд тишины, после которых пачка изменений пересканируется")
+@click.option("--poll", "polling", is_flag=True, help="Опрашивать файлы вместо inotify")
+@click.option("--probe", "-p", "probe_names", multiple=True,
+              help="Запустить только этот зонд (можно несколько раз)")
+@_dedup_option
+def watch_cmd(target: str, env: str, out: str, workers: int, debounce: float, polling: bool,
+              probe_names: tuple[str, ...], dedup: str) -> None:
+    """Следить за целью: пересканировать изменённые файлы и обновлять карту продукта."""
+    from probe.watch import LiveDossier, make_watcher, watch, write_live
+
+    live = LiveDossier(_discover_probes(env, probe_names), target, env, max_workers=workers,
+                       dedup=dedup)
+    map_file = write_live(live, out)
+    click.echo(f"Findings: {len(live.dossier.findings)}  Product Map: {map_file}")
+
+    def on_update(changed: list[str]) -> None:
+        write_live(live, out)
+        click.echo(f"Изменено файлов: {len(changed)}  findings: {len(live.dossier.findings)}")
+        for path in changed:
+            click.echo(f"  {path}")
+
+    watcher = make_watcher(live.base, polling)
+    click.echo(f"Наблюдение за {live.base} ({type(watcher).__name__}), Ctrl+C — выход")
+    try:
+        watch(live, watcher, on_update, debounce)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+@cli.command(name="scan-file")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--context", "-c", "context_path", required=True, type=click.Path(exists=True),
+              help="Findings последнего полного скана: JSON-файл или директория")
+@click.option("--target", "-t", default=".", show_default=True,
+              help="Корень цели, от которого считаются location")
+@click.option("--env", "-e", type=click.Choice(ENVS), help="Среда зондов (по умолчанию — из контекста)")
+@click.option("--json", "as_json", is_flag=True, help="Вывести результат в JSON")
+@_daemon_option
+def scan_file_cmd(path: str, context_path: str, target: str, env: str | None,
+                  as_json: bool, daemon_socket: str | None) -> None:
+    """Findings одного файла и их влияние на карту продукта (эндпоинты, статусы)."""
+    if daemon_socket:
+        reply = _via_daemon(daemon_socket, {
+            "op": "scan_file", "path": str(Path(path).resolve()),
+            "target": str(Path(target).resolve()),
+            "context": str(Path(context_path).resolve()), "env": env,
+        }, echo=not as_json)
+        impact = reply["impact"]
+    else:
+        from probe.correlator import load_findings
+        from probe.impact import ImpactContext, scan_file_impact
+
+        context = ImpactContext(load_findings(context_path))
+        try:
+            result = scan_file_impact(_discover_probes(env or context.dossier.env),
+                                      Path(path), Path(target), context)
+        except ValueError:
+            raise click.BadParameter(f"{path} вне цели {target}", param_hint="--target")
+        impact = result.to_dict()
+        if not as_json:
+            for line in result.render():
+                click.echo(line)
+    if as_json:
+        click.echo(json.dumps(impact, ensure_ascii=False))
+
+
 @cli.command(name="map")
 @click.option("--findings", "-f", required=True,
-              help="JSON-файл или директория с findings")
+              help="Файл findings (JSON, JSONL, их .gz/.xz, .probe, хранилище SQLite) "
+                   "или директория")
 @click.option("--out", "-o", default="product-map.md",
               help="Выходной файл Product Map")
-def map_cmd(findings: str, out: str) -> None:
+@click.option("--columnar", is_flag=True,
+              help="Держать findings колонками (probe.columnar): в разы меньше памяти")
+@_load_options
+@_daemon_option
+def map_cmd(findings: str, out: str, columnar: bool, workers: int | None, trusted: bool,
+            daemon_socket: str | None) -> None:
     """Синтезировать findings в карту продукта (Product Map)."""
-    dossier = load_findings(findings)
+    if daemon_socket:
+        _via_daemon(daemon_socket, {"op": "map", "findings": str(Path(findings).resolve()),
+                                    "out": str(Path(out).resolve())})
+        return
+    from probe.correlator import correlate, load_findings
+
+    dossier = load_findings(findings, columnar=columnar, workers=workers, trusted=trusted)
     click.echo(f"Загружено findings: {len(dossier.findings)}")
 
     result = correlate(dossier, out_path=out)
@@ -106,41 +447,141 @@ def map_cmd(findings: str, out: str) -> None:
     click.echo(f"Product Map: {out}  ({lines} строк)")
 
 
-def _discover_analyzers() -> list[BaseAnalyzer]:
-    """Автообнаружение всех аналитиков из пакета probe.analyzers."""
-    analyzer_instances: list[BaseAnalyzer] = []
+@cli.command()
+@click.option("--findings", "-f", required=True,
+              help="Файл findings (JSON, JSONL) или директория")
+@click.option("--out", "-o", required=True, help="Выходной контейнер .probe")
+def pack(findings: str, out: str) -> None:
+    """Упаковать findings в бинарный контейнер .probe (быстрая загрузка в `probe map`)."""
+    from probe.binary import write_binary
+    from probe.correlator import load_findings
+
+    dossier = load_findings(findings, columnar=True)
+    click.echo(f"Findings: {len(dossier)} -> {write_binary(dossier, out)}")
+
+
+@cli.command(name="diff")
+@click.argument("old", type=click.Path(exists=True))
+@click.argument("new", type=click.Path(exists=True))
+@click.option("--out", "-o", default="diff.json", help="Выходной файл Diff JSON")
+@click.option("--changelog", "-c", default="api-changelog.md",
+              help="Выходной Markdown changelog API surface")
+@click.option("--memory", type=click.IntRange(min=1), default=DIFF_MEMORY_MB,
+              show_default=True, help="МБ findings в памяти; остальное — во временных файлах")
+def diff_cmd(old: str, new: str, out: str, changelog: str, memory: int) -> None:
+    """Сравнить два скана: добавленные, удалённые и изменённые findings.
+
+    OLD и NEW — файлы findings (JSON, JSONL, их .gz/.xz, .probe, хранилище
+    SQLite) или директории. Оба читаются потоком, findings сверяются
+    по ключу (probe, fact, entity, data) хэшированием за линейное время.
+    """
+    from probe.diff import diff_findings
 
-    pkg_name = "probe.analyzers"
     try:
-        pkg = importlib.import_module(pkg_name)
-    except ModuleNotFoundError:
-        return analyzer_instances
-
-    for module_info in pkgutil.iter_modules(pkg.__path__):
-        if module_info.name == "base":
-            continue
-        module = importlib.import_module(f"{pkg_name}.{module_info.name}")
-        for attr_name in dir(module):
-            attr = getattr(module, attr_name)
-            if (
-                isinstance(attr, type)
-                and issubclass(attr, BaseAnalyzer)
-                and attr is not BaseAnalyzer
-                and attr.name
-            ):
-                analyzer_instances.append(attr())
-
-    return analyzer_instances
+        result = diff_findings(old, new, memory=memory << 20)
+    except ValueError as exc:
+        raise click.ClickException(str(exc))
+    with result:
+        result.write_json(out)
+        Path(changelog).write_text(result.changelog(), encoding="utf-8")
+    counts = result.counts
+    click.echo(f"Добавлено: {counts['added']}  удалено: {counts['removed']}  "
+               f"изменено: {counts['changed']} -> {out}")
+    click.echo(f"Changelog: {changelog}")
+
+
+@cli.command(name="query")
+@click.option("--store", "-s", required=True, type=click.Path(exists=True, dir_okay=False),
+              help="Хранилище findings `probe scan --store`")
+@click.option("--probe", "-p", "probes", multiple=True, help="Зонд (можно несколько раз)")
+@click.option("--fact", "facts", multiple=True, help="Тип факта")
+@click.option("--entity", "entities", multiple=True, help="Сущность, например 'GET /api/x'")
+@click.option("--tag", "tags", multiple=True, help="Тег, например role:operator")
+@click.option("--test-class", "test_classes", multiple=True, help="Тестовый класс")
+@click.option("--test-method", "test_methods", multiple=True, help="Тестовый метод")
+@click.option("--file", "files", multiple=True, help="Файл из location")
+@click.option("--env", "envs", multiple=True, help="Среда")
+@click.option("--data", "data_filters", multiple=True, metavar="KEY=VALUE",
+              help="Значение ключа data (сравнивается как текст), например role=OPERATOR")
+@click.option("--min-confidence", type=float, help="Минимальная уверенность")
+@click.option("--limit", type=int, help="Не больше N findings")
+@click.option("--count-by", type=click.Choice(QUERY_FIELDS),
+              help="Вместо findings — их число на каждое значение поля")
+@click.option("--format", "fmt", type=click.Choice(QUERY_FORMATS), default="text",
+              help="Вывод: строка на finding или JSONL")
+def query_cmd(store: str, probes: tuple[str, ...], facts: tuple[str, ...],
+              entities: tuple[str, ...], tags: tuple[str, ...],
+              test_classes: tuple[str, ...], test_methods: tuple[str, ...],
+              files: tuple[str, ...], envs: tuple[str, ...], data_filters: tuple[str, ...],
+              min_confidence: float | None, limit: int | None, count_by: str | None,
+              fmt: str) -> None:
+    """Выбрать findings из хранилища SQLite; фильтры выполняются запросом к базе.
+
+    Повторённая опция — любое из значений, разные опции — все сразу:
+    `probe query -s findings.db --entity 'PUT /api/v1/documents/{id}/approve'
+    --tag role:operator`.
+    """
+    from probe.store import StoreDossier
+
+    data = {}
+    for item in data_filters:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise click.BadParameter(f"ожидается KEY=VALUE: {item!r}", param_hint="--data")
+        data[key] = value
+    criteria = dict(probe=probes or None, fact=facts or None, entity=entities or None,
+                    tag=tags or None, test_class=test_classes or None,
+                    test_method=test_methods or None, file=files or None, env=envs or None,
+                    min_confidence=min_confidence, data=data or None)
+    try:
+        dossier = StoreDossier(store)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint="--store")
+    with dossier:
+        if count_by:
+            for value, count in dossier.counts(count_by, **criteria).items():
+                click.echo(f"{count:>8}  {value}")
+            return
+        total = 0
+        for batch in dossier.iter_batches(limit=limit, **criteria):
+            for f in batch:
+                if fmt == "jsonl":
+                    click.echo(f.model_dump_json())
+                    continue
+                test = "::".join(str(f.data[k]) for k in ("test_class", "test_method")
+                                 if f.data.get(k))
+                click.echo("  ".join(part for part in (f.entity, f.fact, test, f.location or "")
+                                     if part))
+            total += len(batch)
+    if fmt == "text":
+        click.echo(f"Findings: {total}")
+
+
+def _discover_analyzers() -> list[BaseAnalyzer]:
+    """Аналитики из реестра: `probe.analyzers` и entry points."""
+    from probe.registry import default_registry
+
+    return default_registry().analyzers()
 
 
 @cli.command(name="analyze")
 @click.option("--findings", "-f", required=True,
-              help="Директория с findings (JSON-файлы)")
+              help="Директория или файл findings (в том числе хранилище SQLite)")
 @click.option("--out", "-o", default="analysis",
               help="Директория для сохранения результатов анализа")
-def analyze_cmd(findings: str, out: str) -> None:
+@_load_options
+@_daemon_option
+def analyze_cmd(findings: str, out: str, workers: int | None, trusted: bool,
+                daemon_socket: str | None) -> None:
     """Запустить аналитики на findings и сохранить результаты."""
-    all_findings = load_findings_flat(findings)
+    if daemon_socket:
+        _via_daemon(daemon_socket, {"op": "analyze", "findings": str(Path(findings).resolve()),
+                                    "out": str(Path(out).resolve())})
+        return
+    from probe.pipeline import run_analyzers
+    from probe.storage import read_findings, write_analysis
+
+    all_findings = read_findings(findings, workers=workers, trusted=trusted)
     if not all_findings:
         click.echo(f"Findings не найдены в {findings}")
         return
@@ -154,17 +595,80 @@ def analyze_cmd(findings: str, out: str) -> None:
 
     click.echo(f"Найдено аналитиков: {len(analyzers)}")
 
-    out_dir = Path(out)
-    out_dir.mkdir(parents=True, exist_ok=True)
+    for name, result in run_analyzers(analyzers, all_findings).items():
+        click.echo(f"[{name}] -> {write_analysis(name, result, out)}")
 
-    for analyzer in analyzers:
-        try:
-            result = analyzer.analyze(all_findings)
-            out_file = out_dir / f"{analyzer.name}.json"
-            out_file.write_text(
-                json.dumps(result.model_dump(mode="json"), ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-            click.echo(f"[{analyzer.name}] -> {out_file}")
-        except Exception as exc:
-            logging.error("[%s] ошибка: %s", analyzer.name, exc)
+
+@cli.command(name="run")
+@click.option("--target", "-t", required=True, help="Путь к директории или URL цели")
+@click.option("--env", "-e", required=True, type=click.Choice(ENVS), help="Тип среды")
+@click.option("--map", "map_out", default="product-map.md", show_default=True,
+              help="Выходной файл Product Map")
+@click.option("--analysis", "analysis_out", default="analysis", show_default=True,
+              help="Директория для результатов анализа")
+@click.option("--save-findings", "findings_out", metavar="DIR",
+              help="Также сохранить findings в DIR (по умолчанию не сохраняются)")
+@click.option("--workers", default=8, help="Число параллельных воркеров")
+@click.option("--concurrency", default=DEFAULT_MAX_CONCURRENCY,
+              help="Лимит одновременных I/O-операций async-зондов")
+@click.option("--executor", type=click.Choice(EXECUTORS), default="auto",
+              help="Пул для sync-зондов: потоки (auto) или процессы по явному выбору")
+@click.option("--progress", is_flag=True, help="Показывать прогресс сканирования")
+@click.option("--probe", "-p", "probe_names", multiple=True,
+              help="Запустить только этот зонд (можно несколько раз)")
+@_dedup_option
+def run_cmd(target: str, env: str, map_out: str, analysis_out: str, findings_out: str | None,
+            workers: int, concurrency: int, executor: str, progress: bool,
+            probe_names: tuple[str, ...], dedup: str) -> None:
+    """Скан, карта продукта и анализ за один запуск — без промежуточных JSON."""
+    from probe.pipeline import run_pipeline
+    from probe.storage import write_analysis, write_findings
+
+    probes = _discover_probes(env, probe_names)
+    if not probes:
+        click.echo(f"Зонды не найдены. Добавьте зонды в probes/{env}/")
+        return
+    result = run_pipeline(probes, target, env, _discover_analyzers(), map_path=map_out,
+                          max_workers=workers, progress=_echo_progress if progress else None,
+                          max_concurrency=concurrency, executor=executor, dedup=dedup)
+    if progress:
+        click.echo(err=True)
+    click.echo(f"Findings: {len(result.dossier.findings)}")
+    if findings_out:
+        click.echo(f"  -> {write_findings(result.dossier, findings_out)}")
+    lines = result.product_map.count("\n") + 1
+    click.echo(f"Product Map: {map_out}  ({lines} строк)")
+    for name, analysis in result.analyses.items():
+        click.echo(f"[{name}] -> {write_analysis(name, analysis, analysis_out)}")
+
+
+@cli.command(name="daemon")
+@click.option("--socket", "socket_path", default=lambda: str(_default_socket()),
+              show_default="$TMPDIR/probe-<uid>.sock", help="Путь Unix-сокета")
+@click.option("--workers", default=8, help="Размер тёплого пула потоков")
+@click.option("--env", "-e", "envs", multiple=True, type=click.Choice(ENVS),
+              help="Загрузить зонды среды заранее (можно несколько раз)")
+@click.option("--stop", is_flag=True, help="Остановить запущенный демон")
+def daemon_cmd(socket_path: str, workers: int, envs: tuple[str, ...], stop: bool) -> None:
+    """Держать PROBE тёплым и выполнять scan/map/analyze с --daemon SOCKET."""
+    if stop:
+        _via_daemon(socket_path, {"op": "shutdown"})
+        return
+    from probe.daemon import ProbeDaemon
+
+    daemon = ProbeDaemon(socket_path, _discover_probes, _discover_analyzers,
+                         max_workers=workers)
+    daemon.warm(envs)
+    click.echo(f"Демон PROBE: {socket_path}  (PROBE_DAEMON={socket_path})")
+    try:
+        daemon.serve_forever()
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    except KeyboardInterrupt:
+        pass
+
+
+def _default_socket() -> Path:
+    from probe.client import default_socket
+
+    return default_socket()
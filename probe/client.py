@@ -0,0 +1,42 @@
+"""Тонкий клиент `probe daemon` — без тяжёлых импортов.
+
+CLI с ``--daemon`` импортирует только этот модуль: вся работа (pydantic,
+javalang, зонды) происходит в процессе демона.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+
+def default_socket() -> Path:
+    """Путь сокета по умолчанию — свой для каждого пользователя."""
+    return Path(tempfile.gettempdir()) / f"probe-{os.getuid()}.sock"
+
+
+def request(socket_path: str | Path, msg: dict, timeout: Optional[float] = None) -> dict:
+    """Отправить запрос демону и дождаться ответа.
+
+    Raises:
+        ConnectionError: Демон не запущен.
+        RuntimeError: Демон вернул ошибку.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(msg, ensure_ascii=False).encode("utf-8") + b"\n")
+            line = sock.makefile("rb").readline()
+    except (FileNotFoundError, ConnectionRefusedError) as exc:
+        raise ConnectionError(f"Демон PROBE не запущен ({socket_path}): {exc}") from exc
+    if not line:
+        raise ConnectionError(f"Демон PROBE закрыл соединение ({socket_path})")
+    reply = json.loads(line)
+    if reply.get("op") == "error":
+        raise RuntimeError(reply["error"])
+    return reply
@@ -0,0 +1,277 @@
+"""Колоночное хранилище досье для корреляции по всему флоту.
+
+Dossier держит по объекту Finding на факт: свой dict данных, список тегов,
+datetime и копии одних и тех же строк (имя зонда, эндпоинт, тест-класс).
+На миллионе findings это гигабайты. ColumnarDossier хранит те же факты
+колонками:
+
+- строки (probe, env, entity, fact, файл location) — id в общей таблице
+  интернированных строк, сами колонки — ``array`` целых;
+- confidence, строка location и ts — числовые ``array``;
+- наборы тегов — id в таблице уникальных наборов;
+- data — колонки по фактам: у каждого fact свой набор ключей, значение
+  ключа — ячейка списка, строковые значения интернированы.
+
+API как у Dossier: ``target``, ``env``, ``scanned_at``, ``findings``,
+``query``/``counts``, ``by_probe``/``by_fact``/``by_tag``; выборки идут
+по тем же инвертированным индексам (probe.index). Finding собираются лениво, при
+обращении, и каждый раз заново: это снимки только для чтения.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union, overload
+
+from probe.index import Criterion, FindingIndex
+from probe.models import Dossier, Finding, FindingBatch, FindingRecord
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MISSING = object()
+
+
+class StringTable:
+    """Интернированные строки: строка ↔ целочисленный id."""
+
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self) -> None:
+        self.strings: list[str] = []
+        self._ids: dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        """id строки; новая строка добавляется в таблицу."""
+        sid = self._ids.get(value)
+        if sid is None:
+            sid = self._ids[value] = len(self.strings)
+            self.strings.append(sys.intern(value))
+        return sid
+
+    def get(self, value: str) -> Optional[int]:
+        """id строки или None, если её в таблице нет."""
+        return self._ids.get(value)
+
+    def __getitem__(self, sid: int) -> str:
+        return self.strings[sid]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+class _FactData:
+    """Колонки data одного fact: ключ → список значений по строкам факта."""
+
+    __slots__ = ("keys", "columns", "rows")
+
+    def __init__(self) -> None:
+        self.keys: dict[str, int] = {}
+        self.columns: list[list[Any]] = []
+        self.rows = 0
+
+    def append(self, data: dict[str, Any]) -> int:
+        pos = self.rows
+        for key, value in data.items():
+            col = self.keys.get(key)
+            if col is None:
+                col = self.keys[key] = len(self.columns)
+                self.columns.append([_MISSING] * pos)
+            self.columns[col].append(sys.intern(value) if type(value) is str else value)
+        self.rows += 1
+        for column in self.columns:
+            if len(column) < self.rows:
+                column.append(_MISSING)
+        return pos
+
+    def row(self, pos: int) -> dict[str, Any]:
+        return {key: value for key, column in zip(self.keys, self.columns)
+                if (value := column[pos]) is not _MISSING}
+
+
+class ColumnarDossier:
+    """Досье, хранящее findings колонками (см. модуль).
+
+    Args:
+        target: Путь или URL цели.
+        env: Тип среды.
+        scanned_at: Метка скана; ts записей FindingRecord без своей метки.
+    """
+
+    def __init__(self, target: str, env: str, scanned_at: Optional[datetime] = None,
+                 findings: Iterable[Union[Finding, FindingRecord, FindingBatch]] = ()) -> None:
+        self.target = target
+        self.env = env
+        self.scanned_at = scanned_at or datetime.now(timezone.utc)
+        self.strings = StringTable()
+        self._probe = array("I")
+        self._env = array("I")
+        self._entity = array("I")
+        self._fact = array("I")
+        #: id файла location; -1 — location нет
+        self._file = array("i")
+        #: номер строки location; -1 — location без номера строки
+        self._line = array("i")
+        self._confidence = array("d")
+        #: ts в микросекундах от эпохи (UTC)
+        self._ts = array("q")
+        self._tags = array("I")
+        self._fact_pos = array("I")
+        self._tagsets: list[tuple[str, ...]] = []
+        self._tagset_ids: dict[tuple[str, ...], int] = {}
+        self._data: dict[int, _FactData] = {}
+        self._datetimes: dict[int, datetime] = {}
+        self.index = FindingIndex()
+        self.extend(findings)
+
+    @classmethod
+    def from_dossier(cls, dossier: Dossier) -> ColumnarDossier:
+        return cls(dossier.target, dossier.env, dossier.scanned_at, dossier.findings)
+
+    def to_dossier(self) -> Dossier:
+        """Обычный Dossier со всеми findings в памяти."""
+        return Dossier(target=self.target, env=self.env, scanned_at=self.scanned_at,
+                       findings=list(self.findings))
+
+    # -- запись -------------------------------------------------------------
+
+    def append(self, finding: Union[Finding, FindingRecord]) -> None:
+        """Добавить finding; у FindingRecord ts — ``scanned_at`` досье."""
+        intern = self.strings.intern
+        ts = finding.ts if isinstance(finding, Finding) else self.scanned_at
+        fact_id = intern(finding.fact)
+        self._probe.append(intern(finding.probe))
+        self._env.append(intern(finding.env))
+        self._entity.append(intern(finding.entity))
+        self._fact.append(fact_id)
+        file, line = _split_location(finding.location)
+        self._file.append(-1 if file is None else intern(file))
+        self._line.append(line)
+        self._confidence.append(finding.confidence)
+        self._ts.append(self._micros(ts))
+        self._tags.append(self._tagset(tuple(finding.tags)))
+        data = self._data.get(fact_id)
+        if data is None:
+            data = self._data[fact_id] = _FactData()
+        self._fact_pos.append(data.append(finding.data))
+        self.index.add(finding)
+
+    def extend(self, findings: Iterable[Union[Finding, FindingRecord, FindingBatch]]) -> None:
+        for item in findings:
+            if isinstance(item, FindingBatch):
+                for record in item:
+                    self.append(record)
+            else:
+                self.append(item)
+
+    # -- чтение -------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._fact)
+
+    def finding(self, row: int) -> Finding:
+        """Finding строки ``row`` — собирается заново при каждом вызове."""
+        strings = self.strings.strings
+        file, line = self._file[row], self._line[row]
+        if file < 0:
+            location = None
+        elif line < 0:
+            location = strings[file]
+        else:
+            location = f"{strings[file]}:{line}"
+        fact_id = self._fact[row]
+        record = FindingRecord(
+            strings[self._probe[row]], strings[self._env[row]], strings[self._entity[row]],
+            strings[fact_id], self._data[fact_id].row(self._fact_pos[row]), location,
+            self._confidence[row], self._tagsets[self._tags[row]],
+        )
+        return record.to_finding(self._datetime(self._ts[row]))
+
+    @property
+    def findings(self) -> FindingsView:
+        """Ленивое представление всех findings (последовательность только для чтения)."""
+        return FindingsView(self, range(len(self)))
+
+    def query(self, probe: Criterion = None, fact: Criterion = None, tag: Criterion = None,
+              entity: Criterion = None, test_class: Criterion = None,
+              file: Criterion = None) -> list[Finding]:
+        """Findings, подходящие под все критерии (см. Dossier.query)."""
+        rows = self.index.rows(probe=probe, fact=fact, tag=tag, entity=entity,
+                               test_class=test_class, file=file)
+        return [self.finding(row) for row in rows]
+
+    def counts(self, field: str) -> dict[str, int]:
+        """Число findings на каждое значение индексируемого поля."""
+        return self.index.counts(field)
+
+    def by_probe(self, probe_name: str) -> list[Finding]:
+        """Вернуть findings конкретного зонда."""
+        return self.query(probe=probe_name)
+
+    def by_fact(self, fact: str) -> list[Finding]:
+        """Вернуть findings с конкретным типом факта."""
+        return self.query(fact=fact)
+
+    def by_tag(self, tag: str) -> list[Finding]:
+        """Вернуть findings с конкретным тегом."""
+        return self.query(tag=tag)
+
+    # -- служебное ----------------------------------------------------------
+
+    def _tagset(self, tags: tuple[str, ...]) -> int:
+        tid = self._tagset_ids.get(tags)
+        if tid is None:
+            tid = self._tagset_ids[tags] = len(self._tagsets)
+            self._tagsets.append(tuple(sys.intern(t) for t in tags))
+        return tid
+
+    @staticmethod
+    def _micros(ts: datetime) -> int:
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        return (ts - _EPOCH) // timedelta(microseconds=1)
+
+    def _datetime(self, micros: int) -> datetime:
+        ts = self._datetimes.get(micros)
+        if ts is None:
+            ts = self._datetimes[micros] = _EPOCH + timedelta(microseconds=micros)
+        return ts
+
+
+class FindingsView(Sequence[Finding]):
+    """Строки ColumnarDossier как последовательность Finding без их хранения."""
+
+    __slots__ = ("_dossier", "_rows")
+
+    def __init__(self, dossier: ColumnarDossier, rows: range) -> None:
+        self._dossier = dossier
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @overload
+    def __getitem__(self, index: int) -> Finding: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> FindingsView: ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FindingsView(self._dossier, self._rows[index])
+        return self._dossier.finding(self._rows[index])
+
+    def __iter__(self) -> Iterator[Finding]:
+        finding = self._dossier.finding
+        for row in self._rows:
+            yield finding(row)
+
+
+def _split_location(location: Optional[str]) -> tuple[Optional[str], int]:
+    """``путь:строка`` → (путь, строка); без номера строки — (location, -1)."""
+    if not location:
+        return (None, -1) if location is None else (location, -1)
+    path, sep, line = location.rpartition(":")
+    if sep and line.isdigit() and str(int(line)) == line:
+        return path, int(line)
+    return location, -1
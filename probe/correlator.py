@@ -2,41 +2,76 @@
 
 from __future__ import annotations
 
-import json
 from collections import defaultdict
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from probe.models import Dossier, Finding
+from probe.models import Dossier
+from probe.storage import iter_finding_batches
+
+if TYPE_CHECKING:
+    from probe.binary import BinaryDossier
+    from probe.columnar import ColumnarDossier
+    from probe.index import Criterion
+    from probe.store import StoreDossier
 
 
 # ---------------------------------------------------------------------------
 # Загрузка findings
 # ---------------------------------------------------------------------------
 
-def load_findings(path: str | Path) -> Dossier:
-    """Загружает findings из JSON-файла или директории с JSON-файлами."""
-    p = Path(path)
-    raw: list[dict] = []
-
-    if p.is_dir():
-        for f in sorted(p.glob("*.json")):
-            data = json.loads(f.read_text(encoding="utf-8"))
-            raw.extend(data if isinstance(data, list) else [data])
-    elif p.is_file():
-        data = json.loads(p.read_text(encoding="utf-8"))
-        raw = data if isinstance(data, list) else [data]
-
-    dossier = Dossier(target=str(path), env=raw[0]["env"] if raw else "unknown")
-    dossier.findings = [Finding(**r) for r in raw]
+def load_findings(path: str | Path, columnar: bool = False, fact: Criterion = None,
+                  probe: Criterion = None,
+                  min_confidence: float | None = None, workers: int | None = 1,
+                  trusted: bool = False,
+                  ) -> Dossier | ColumnarDossier | BinaryDossier | StoreDossier:
+    """Загружает findings из файла (JSON/JSONL/``.probe``/SQLite) или директории в досье.
+
+    Findings читаются потоком (storage.iter_finding_batches); фильтры
+    ``fact``, ``probe`` и ``min_confidence`` отбрасывают записи до
+    валидации, ``workers`` и ``trusted`` — параллельный разбор и загрузка
+    без валидации файлов PROBE с верной контрольной суммой. Среда досье — среда первого загруженного finding.
+    С ``columnar=True`` возвращает ColumnarDossier (probe.columnar):
+    порции складываются в колонки и целиком в памяти не держатся.
+    Контейнер ``.probe`` без фильтров открывается как BinaryDossier
+    (probe.binary): блоки фактов читаются, только когда их запросят секции.
+    Хранилище SQLite без фильтров — как StoreDossier (probe.store):
+    секции выбирают findings запросами к нему.
+    """
+    if not columnar and fact is None and probe is None and min_confidence is None:
+        if Path(path).suffix == ".probe" and Path(path).is_file():
+            from probe.binary import BinaryDossier
+
+            return BinaryDossier(path)
+        from probe.store import StoreDossier, is_store
+
+        if is_store(path):
+            return StoreDossier(path)
+    if columnar:
+        from probe.columnar import ColumnarDossier
+
+        dossier = ColumnarDossier(target=str(path), env="unknown")
+    else:
+        dossier = Dossier(target=str(path), env="unknown")
+    for batch in iter_finding_batches(path, fact=fact, probe=probe,
+                                      min_confidence=min_confidence, workers=workers,
+                                      trusted=trusted):
+        if not len(dossier.findings):
+            dossier.env = batch[0].env
+        dossier.extend(batch)
     return dossier
 
 
 # ---------------------------------------------------------------------------
 # Секции Product Map
 # ---------------------------------------------------------------------------
+# Секции выбирают findings через индексы досье (query/by_fact/counts),
+# а не проходом по всем findings: стоимость — размер выборки, не N.
+
+_AUTH_FACTS = ("auth_required", "public_endpoint")
 
 def _header(dossier: Dossier) -> str:
-    probes_count = len({f.probe for f in dossier.findings})
+    probes_count = len(dossier.counts("probe"))
     return (
         f"# Product Map\n\n"
         f"**Цель:** `{dossier.target}`  "
@@ -59,9 +94,7 @@ def _api_surface(dossier: Dossier) -> str:
         eps[ep]["classes"].add(f.data.get("test_class", ""))
 
     # Auth от ra-auth-patterns (entity тоже "METHOD /path")
-    for f in dossier.findings:
-        if f.fact not in ("auth_required", "public_endpoint"):
-            continue
+    for f in dossier.query(fact=_AUTH_FACTS):
         ep = f.entity
         if ep not in eps:
             eps[ep] = {"auth_roles": set(), "is_public": False,
@@ -133,9 +166,7 @@ def _workflows(dossier: Dossier) -> str:
 def _role_matrix(dossier: Dossier) -> str:
     """Матрица: роль → доступные эндпоинты."""
     role_eps: dict[str, set] = defaultdict(set)
-    for f in dossier.findings:
-        if f.fact not in ("auth_required", "public_endpoint"):
-            continue
+    for f in dossier.query(fact=_AUTH_FACTS):
         role = f.data.get("role", "")
         if role:
             role_eps[role].add(f.entity)
@@ -154,11 +185,8 @@ def _role_matrix(dossier: Dossier) -> str:
 
 def _stats(dossier: Dossier) -> str:
     """Статистика зондов."""
-    by_probe: dict[str, int] = defaultdict(int)
-    for f in dossier.findings:
-        by_probe[f.probe] += 1
     lines = ["## Статистика зондов\n"]
-    for probe_name, count in sorted(by_probe.items()):
+    for probe_name, count in sorted(dossier.counts("probe").items()):
         lines.append(f"- `{probe_name}`: {count} findings")
     return "\n".join(lines)
 
@@ -0,0 +1,296 @@
+"""Демон PROBE: тёплый процесс, который обслуживает scan/map/analyze по Unix-сокету.
+
+Каждый запуск `probe scan` заново импортирует javalang и зонды, создаёт пул
+и парсит все файлы. Демон делает это один раз: держит пул потоков, реестры
+зондов и аналитиков, кэш исходников/AST (probes.source), кэш findings
+по файлам (FileCache) и загруженные досье. Повторный скан той же цели
+перепарсивает только изменённые файлы.
+
+Протокол — JSON-сообщения по одному на строку, как у probe.distributed::
+
+    {"op": "scan", "target": "/abs/path", "env": "test", "out": "/abs/findings",
+     "probes": [], "format": "auto", "compress": "none", "store": null,
+     "dedup": "exact"}
+        — пустой probes: все зонды среды; store: хранилище SQLite вместо out
+    {"op": "map", "findings": "/abs/findings", "out": "/abs/product-map.md"}
+    {"op": "analyze", "findings": "/abs/findings", "out": "/abs/analysis"}
+    {"op": "scan_file", "path": "/abs/File.java", "target": "/abs/root",
+     "context": "/abs/findings/test_findings.json", "env": "test"}
+    {"op": "stats"} / {"op": "shutdown"}
+
+Ответ — ``{"op": "ok", "lines": [...]}`` (строки для вывода клиентом)
+или ``{"op": "error", "error": "..."}``. Пути клиент передаёт абсолютными:
+у демона своя рабочая директория.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import socket
+import socketserver
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from probe.analyzers.base import BaseAnalyzer
+from probe.correlator import correlate, load_findings
+from probe.defaults import DEFAULT_DEDUP
+from probe.impact import ImpactContext, scan_file_impact
+from probe.pipeline import run_analyzers
+from probe.runner import FileCache, ScanJob, collect_files, iter_dossiers
+from probe.storage import (finding_files, read_findings, resolve_format, write_analysis,
+                           write_findings)
+from probe.store import write_store
+from probes import source
+from probes.base import BaseProbe
+
+logger = logging.getLogger(__name__)
+
+#: Файлов в кэше исходников/AST демона
+DEFAULT_SOURCE_CACHE = 4096
+
+
+class _Server(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    block_on_close = False
+
+    probe_daemon: "ProbeDaemon"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Одно соединение клиента: запрос — ответ, построчно."""
+
+    server: _Server
+
+    def handle(self) -> None:
+        daemon = self.server.probe_daemon
+        for line in self.rfile:
+            try:
+                msg = json.loads(line)
+                reply = daemon.dispatch(msg)
+            except Exception as exc:
+                logger.error("Запрос демона: %s", exc)
+                msg, reply = {}, {"op": "error", "error": str(exc)}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+            if msg.get("op") == "shutdown":
+                # Уже после ответа: иначе процесс может завершиться раньше записи
+                threading.Thread(target=daemon.shutdown, daemon=True).start()
+                return
+
+
+class ProbeDaemon:
+    """Тёплое состояние PROBE и сервер запросов к нему.
+
+    Args:
+        socket_path: Путь Unix-сокета.
+        discover_probes: Зонды среды; вызывается один раз на среду.
+        discover_analyzers: Аналитики; вызывается один раз.
+        max_workers: Размер тёплого пула потоков.
+    """
+
+    def __init__(
+        self,
+        socket_path: str | Path,
+        discover_probes: Callable[[str], list[BaseProbe]],
+        discover_analyzers: Callable[[], list[BaseAnalyzer]],
+        max_workers: int = 8,
+    ) -> None:
+        self.socket_path = Path(socket_path)
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="probe-daemon")
+        self.files = FileCache()
+        source.CACHE.resize(DEFAULT_SOURCE_CACHE)
+        self._discover_probes = discover_probes
+        self._discover_analyzers = discover_analyzers
+        self._probes: dict[str, list[BaseProbe]] = {}
+        self._analyzers: Optional[list[BaseAnalyzer]] = None
+        self._loaded: dict[tuple[str, str], tuple[tuple, Any]] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._closed = threading.Event()
+
+    # -- реестры и кэши -----------------------------------------------------
+
+    def probes(self, env: str) -> list[BaseProbe]:
+        """Зонды среды из реестра (обнаруживаются при первом запросе)."""
+        with self._lock:
+            if env not in self._probes:
+                self._probes[env] = self._discover_probes(env)
+            return self._probes[env]
+
+    def analyzers(self) -> list[BaseAnalyzer]:
+        with self._lock:
+            if self._analyzers is None:
+                self._analyzers = self._discover_analyzers()
+            return self._analyzers
+
+    def warm(self, envs: Sequence[str]) -> None:
+        """Заранее загрузить зонды сред и аналитики."""
+        for env in envs:
+            self.probes(env)
+        self.analyzers()
+
+    def _load(self, kind: str, path: str, loader: Callable[[str], Any]) -> Any:
+        """Загрузить findings через ``loader`` или взять из кэша, если файлы не менялись."""
+        stamp = _stamp(Path(path))
+        key = (kind, path)
+        with self._lock:
+            cached = self._loaded.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        value = loader(path)
+        with self._lock:
+            self._loaded[key] = (stamp, value)
+        return value
+
+    # -- запросы ------------------------------------------------------------
+
+    def dispatch(self, msg: dict) -> dict:
+        """Обработать один запрос клиента."""
+        op = msg["op"]
+        if op == "scan":
+            return self.scan(msg["target"], msg["env"], msg["out"], msg.get("probes", ()),
+                             msg.get("format", "json"), msg.get("compress", "none"),
+                             msg.get("store"), msg.get("dedup", DEFAULT_DEDUP))
+        if op == "map":
+            return self.map(msg["findings"], msg["out"])
+        if op == "analyze":
+            return self.analyze(msg["findings"], msg["out"])
+        if op == "scan_file":
+            return self.scan_file(msg["path"], msg["target"], msg["context"], msg.get("env"))
+        if op == "stats":
+            return {"op": "ok", "lines": [], "stats": self.stats()}
+        if op == "shutdown":
+            return {"op": "ok", "lines": ["Демон остановлен"]}
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    def scan(self, target: str, env: str, out: str, names: Sequence[str] = (),
+             fmt: str = "json", compress: str = "none",
+             store: Optional[str] = None, dedup: str = DEFAULT_DEDUP) -> dict:
+        probes = self.probes(env)
+        if names:
+            by_name = {p.name: p for p in probes}
+            missing = [n for n in names if n not in by_name]
+            if missing:
+                raise ValueError(f"Зонды не найдены в среде {env}: {', '.join(missing)}")
+            probes = [by_name[n] for n in names]
+        if not probes:
+            return {"op": "ok", "lines": ["Зонды не найдены. Добавьте зонды в probes/<env>/"]}
+        if fmt == "auto":
+            fmt = resolve_format(fmt, len(collect_files(probes, target)))
+        job = ScanJob(probes=probes, target=target, env=env, cache=self.files, dedup=dedup)
+        for _, dossier in iter_dossiers([job], max_workers=self.max_workers, pool=self.pool):
+            if store:
+                out_file = write_store(dossier, store)
+            else:
+                out_file = write_findings(dossier, out, fmt,
+                                          None if compress == "none" else compress)
+            return {"op": "ok", "lines": [
+                f"Цель: {target}  среда: {env}",
+                f"Findings: {len(dossier.findings)} -> {out_file}",
+            ]}
+        raise AssertionError("iter_dossiers не вернул досье")  # pragma: no cover
+
+    def map(self, findings: str, out: str) -> dict:
+        dossier = self._load("dossier", findings, load_findings)
+        result = correlate(dossier, out_path=out)
+        lines = result.count("\n") + 1
+        return {"op": "ok", "lines": [
+            f"Загружено findings: {len(dossier.findings)}",
+            f"Product Map: {out}  ({lines} строк)",
+        ]}
+
+    def analyze(self, findings: str, out: str) -> dict:
+        all_findings = self._load("flat", findings, read_findings)
+        if not all_findings:
+            return {"op": "ok", "lines": [f"Findings не найдены в {findings}"]}
+        lines = [f"Загружено findings: {len(all_findings)}"]
+        for name, result in run_analyzers(self.analyzers(), all_findings).items():
+            lines.append(f"[{name}] -> {write_analysis(name, result, out)}")
+        return {"op": "ok", "lines": lines}
+
+    def scan_file(self, path: str, target: str, context: str, env: str | None) -> dict:
+        """Findings одного файла и их влияние на карту продукта из ``context``."""
+        impact_context = self._load("impact", context,
+                                    lambda p: ImpactContext(load_findings(p)))
+        probes = self.probes(env or impact_context.dossier.env)
+        impact = scan_file_impact(probes, Path(path), Path(target), impact_context,
+                                  scan=self.files.scan)
+        return {"op": "ok", "lines": impact.render(), "impact": impact.to_dict()}
+
+    def stats(self) -> dict:
+        """Счётчики кэшей — для диагностики тёплого состояния."""
+        return {
+            "file_hits": self.files.hits,
+            "file_misses": self.files.misses,
+            "source_hits": source.CACHE.hits,
+            "source_misses": source.CACHE.misses,
+            "envs": sorted(self._probes),
+        }
+
+    # -- сервер -------------------------------------------------------------
+
+    def start(self) -> None:
+        """Открыть сокет и отвечать клиентам в фоновом потоке."""
+        self._bind()
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def serve_forever(self) -> None:
+        """Открыть сокет и отвечать клиентам до shutdown()."""
+        self._bind()
+        self._serve()
+
+    def shutdown(self) -> None:
+        """Остановить сервер и дождаться закрытия сокета и пула."""
+        server = self._server
+        if server is not None:
+            server.shutdown()
+            self._closed.wait()
+
+    def _serve(self) -> None:
+        try:
+            self._server.serve_forever()
+        finally:
+            self._close()
+
+    def _bind(self) -> None:
+        if self.socket_path.exists():
+            if _alive(self.socket_path):
+                raise RuntimeError(f"Демон уже запущен: {self.socket_path}")
+            self.socket_path.unlink()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        self._server = _Server(str(self.socket_path), _Handler)
+        self._server.probe_daemon = self
+        logger.info("Демон PROBE: %s", self.socket_path)
+
+    def _close(self) -> None:
+        self._server.server_close()
+        self._server = None
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.socket_path.unlink(missing_ok=True)
+        self._closed.set()
+
+
+def _alive(socket_path: Path) -> bool:
+    """На сокете кто-то слушает (а не остался файл от упавшего демона)."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            return False
+    return True
+
+
+def _stamp(path: Path) -> tuple:
+    """Отпечаток файла или файлов findings директории: имена, mtime и размеры."""
+    files = finding_files(path) if path.is_dir() else [path]
+    stamp = []
+    for f in files:
+        try:
+            stat = f.stat()
+        except OSError:
+            continue
+        stamp.append((f.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
@@ -0,0 +1,103 @@
+"""Дедупликация findings скана по отпечатку содержимого (Finding.fingerprint).
+
+Зонды повторяют один и тот же факт: RaAuthPatterns — на каждый HTTP-вызов
+метода, пофайловые зонды — на каждое упоминание эндпоинта. Режимы:
+
+* ``exact`` — одинаковые факты (probe, fact, entity, data, location)
+  записываются один раз; порядок findings сохраняется;
+* ``merge`` — факты, различающиеся только ``location``, сливаются в один:
+  ``location`` первого, ``data["evidence"]`` — все места по порядку,
+  ``confidence`` — наибольшая, ``tags`` — объединение;
+* ``none`` — без дедупликации.
+
+Объём досье растёт с числом различных фактов, а не с числом их повторов.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from probe.defaults import DEDUP_MODES
+from probe.models import Finding, _finding, fingerprint
+
+
+class Deduplicator:
+    """Дедупликация между порциями одного скана.
+
+    feed() принимает очередную порцию и возвращает findings, которые можно
+    писать сразу; flush() — остаток в конце скана. В режиме ``exact``
+    в памяти только отпечатки; ``merge`` копит различные факты до flush(),
+    потому что место нового повтора может найтись в любой порции.
+    """
+
+    def __init__(self, mode: str = "exact") -> None:
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Неизвестный режим дедупликации: {mode}")
+        self.mode = mode
+        #: Сколько findings отброшено или слито с другими
+        self.dropped = 0
+        self._seen: set[str] = set()
+        self._groups: dict[str, _Group] = {}
+
+    def feed(self, findings: Iterable[Finding]) -> list[Finding]:
+        if self.mode == "none":
+            return list(findings)
+        if self.mode == "merge":
+            groups = self._groups
+            for f in findings:
+                key = fingerprint(f.probe, f.fact, f.entity, f.data)
+                group = groups.get(key)
+                if group is None:
+                    groups[key] = _Group(f)
+                else:
+                    group.add(f)
+                    self.dropped += 1
+            return []
+        seen, unique = self._seen, []
+        for f in findings:
+            key = f.fingerprint
+            if key in seen:
+                self.dropped += 1
+                continue
+            seen.add(key)
+            unique.append(f)
+        return unique
+
+    def flush(self) -> list[Finding]:
+        merged = [group.finding() for group in self._groups.values()]
+        self._groups.clear()
+        return merged
+
+
+def dedup(findings: Iterable[Finding], mode: str = "exact") -> list[Finding]:
+    """Findings без повторов (см. режимы в описании модуля)."""
+    deduplicator = Deduplicator(mode)
+    return deduplicator.feed(findings) + deduplicator.flush()
+
+
+class _Group:
+    """Повторы одного факта в режиме ``merge``."""
+
+    __slots__ = ("first", "locations", "confidence", "tags")
+
+    def __init__(self, first: Finding) -> None:
+        self.first = first
+        self.locations: dict[Optional[str], None] = {first.location: None}
+        self.confidence = first.confidence
+        self.tags: dict[str, None] = dict.fromkeys(first.tags)
+
+    def add(self, f: Finding) -> None:
+        self.locations[f.location] = None
+        self.confidence = max(self.confidence, f.confidence)
+        self.tags.update(dict.fromkeys(f.tags))
+
+    def finding(self) -> Finding:
+        first = self.first
+        locations = [loc for loc in self.locations if loc]
+        tags = list(self.tags)
+        if len(self.locations) == 1 and self.confidence == first.confidence \
+                and tags == first.tags:
+            return first
+        data = {**first.data, "evidence": locations} if len(locations) > 1 else first.data
+        return _finding(first.probe, first.env, first.entity, first.fact, data,
+                        first.location, self.confidence, tags, first.ts)
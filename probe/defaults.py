@@ -0,0 +1,40 @@
+"""Значения по умолчанию, общие для CLI и ядра.
+
+Модуль без тяжёлых зависимостей: CLI читает эти значения при построении
+опций и ``--help``, не импортируя runner (pydantic) и зонды (javalang).
+"""
+
+#: Лимит одновременных I/O-операций async-зондов по умолчанию
+DEFAULT_MAX_CONCURRENCY = 256
+
+#: Допустимые backend'ы пула для sync-зондов
+EXECUTORS = ("auto", "thread", "process")
+
+#: Файлов в одной аренде распределённого скана по умолчанию
+DEFAULT_LEASE_SIZE = 16
+#: Время жизни аренды без сообщений от воркера, секунд
+DEFAULT_LEASE_TTL = 60.0
+#: Порт координатора по умолчанию
+DEFAULT_PORT = 7341
+
+#: Пауза без новых событий, после которой `probe watch` обрабатывает пачку изменений
+DEFAULT_DEBOUNCE = 0.3
+
+#: Форматы файла findings; auto — jsonl для больших сканов, иначе json
+FINDINGS_FORMATS = ("auto", "json", "jsonl", "binary")
+#: С какого числа файлов цели `probe scan --format auto` пишет jsonl потоком
+JSONL_MIN_FILES = 1000
+#: Сжатие файла findings json/jsonl у `probe scan --compress`
+FINDINGS_COMPRESSIONS = ("none", "gzip", "xz")
+#: Дедупликация findings скана (probe.dedup)
+DEDUP_MODES = ("none", "exact", "merge")
+#: Режим дедупликации scan, run, watch, coordinator и демона по умолчанию
+DEFAULT_DEDUP = "exact"
+
+#: Поля фильтров и группировки `probe query` (хранилище SQLite, probe.store)
+QUERY_FIELDS = ("probe", "fact", "tag", "entity", "test_class", "test_method", "file", "env")
+#: Вывод `probe query`: строка на finding или JSONL
+QUERY_FORMATS = ("text", "jsonl")
+
+#: Сколько МБ findings `probe diff` держит в памяти, прежде чем сбрасывать разделы на диск
+DIFF_MEMORY_MB = 256
@@ -0,0 +1,409 @@
+"""Разница двух сканов (models.Diff) хэшированием по ключу идентичности.
+
+Ключ finding'а — отпечаток (probe, fact, entity, data) без location
+(models.fingerprint); ``data["evidence"]`` слитых фактов (probe.dedup)
+в ключ тоже не входит. Факт, найденный на другой строке, с другой
+уверенностью или тегами, — изменённый, а не удалённый и добавленный.
+
+Оба скана читаются потоком (storage.iter_finding_batches) и раскладываются
+по разделам по хэшу ключа; раздел старого и нового скана сверяются
+в памяти словарём. Разделы и результаты держатся в памяти, пока их объём
+не превысит ``memory``, затем уходят во временные файлы — время линейно,
+в памяти не больше пары разделов. Результаты выдаются в порядке сканов.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator, NamedTuple, Optional, Union
+
+from probe.defaults import DIFF_MEMORY_MB
+from probe.models import Diff, Finding, fingerprint
+from probe.storage import iter_finding_batches
+
+#: Разделов по хэшу ключа
+DIFF_PARTITIONS = 64
+#: Сколько байт сериализованных findings держать в памяти, прежде чем
+#: сбрасывать разделы во временные файлы
+DIFF_MEMORY = DIFF_MEMORY_MB << 20
+
+#: Факты, из которых собирается API surface для changelog
+_ENDPOINT_FACTS = frozenset(("endpoint_tested", "auth_required", "public_endpoint"))
+_AUTH_FACTS = frozenset(("auth_required", "public_endpoint"))
+
+_KINDS = ("added", "removed", "changed")
+
+#: Источник findings: путь, который читает storage, или сами findings
+FindingSource = Union[str, Path, Iterable[Finding]]
+
+
+def identity(f: Finding) -> str:
+    """Ключ идентичности finding'а для diff: отпечаток без location и evidence."""
+    data = f.data
+    if "evidence" in data:
+        data = {k: v for k, v in data.items() if k != "evidence"}
+    return fingerprint(f.probe, f.fact, f.entity, data)
+
+
+def diff_findings(old: FindingSource, new: FindingSource,
+                  memory: int = DIFF_MEMORY) -> DiffResult:
+    """Сравнить два скана за линейное время.
+
+    Args:
+        old: Прежний скан — файл, директория или хранилище findings
+            (как у storage.read_findings) либо итерируемое findings.
+        new: Новый скан, так же.
+        memory: Байт сериализованных findings в памяти до сброса на диск.
+
+    Returns:
+        DiffResult — его нужно закрыть (удаляет временные файлы).
+    """
+    result = DiffResult(old, new, memory)
+    try:
+        result._compute(old, new)
+    except BaseException:
+        result.close()
+        raise
+    return result
+
+
+class DiffResult:
+    """Результат diff_findings(): итераторы added/removed/changed, Diff JSON
+    и Markdown changelog API surface.
+
+    Findings не держатся в памяти целиком: каждый проход по added(),
+    removed() и changed() читает разделы результатов заново.
+    """
+
+    def __init__(self, old: FindingSource, new: FindingSource, memory: int) -> None:
+        self.old_name = _name(old, "old")
+        self.new_name = _name(new, "new")
+        #: Число добавленных, удалённых и изменённых findings
+        self.counts: dict[str, int] = dict.fromkeys(_KINDS, 0)
+        #: (вид изменения, fact) -> число findings
+        self.facts: Counter[tuple[str, str]] = Counter()
+        self.old_surface = _Surface()
+        self.new_surface = _Surface()
+        self._tmp: Optional[str] = None
+        self._memory = memory
+        self._results = {kind: _Runs(self, memory // 8, _encode_result, _decode_result)
+                         for kind in _KINDS}
+
+    # -- вычисление ---------------------------------------------------------
+
+    def _compute(self, old: FindingSource, new: FindingSource) -> None:
+        old_runs = self._partition(old, self.old_surface)
+        new_runs = self._partition(new, self.new_surface)
+        for part in range(DIFF_PARTITIONS):
+            olds = _groups(old_runs.read(part))
+            news = _groups(new_runs.read(part))
+            old_runs.drop(part)
+            new_runs.drop(part)
+            self._match(part, olds, news)
+        for runs in self._results.values():
+            runs.seal()
+
+    def _partition(self, source: FindingSource, surface: _Surface) -> _Runs:
+        runs = _Runs(self, self._memory // 4, _encode_row, _decode_row)
+        seq = 0
+        for batch in _batches(source):
+            for f in batch:
+                key = identity(f)
+                # Состояние сравнивается только внутри процесса: хватает hash()
+                state = hash((f.location, f.confidence, tuple(f.tags),
+                              repr(f.data.get("evidence"))))
+                row = _Row(seq, key, state, f.fact, f.model_dump_json().encode("utf-8"))
+                runs.add(int(key[:8], 16) % DIFF_PARTITIONS, row)
+                surface.add(f)
+                seq += 1
+        runs.seal()
+        return runs
+
+    def _match(self, part: int, olds: dict[str, list[_Row]],
+               news: dict[str, list[_Row]]) -> None:
+        added, removed, changed = [], [], []
+        for key, new_rows in news.items():
+            old_rows = olds.pop(key, None)
+            if not old_rows:
+                added.extend(new_rows)
+                continue
+            if len(old_rows) == 1 and len(new_rows) == 1:
+                if old_rows[0].state != new_rows[0].state:
+                    changed.append((old_rows[0], new_rows[0]))
+                continue
+            # Сначала — те же факты в том же состоянии, остальные парами по порядку
+            states = Counter(row.state for row in old_rows)
+            same = Counter(row.state for row in new_rows) & states
+            left_old = _without(old_rows, same)
+            left_new = _without(new_rows, same)
+            changed.extend(zip(left_old, left_new))
+            removed.extend(left_old[len(left_new):])
+            added.extend(left_new[len(left_old):])
+        for rows in olds.values():
+            removed.extend(rows)
+
+        for kind, rows in (("added", added), ("removed", removed)):
+            rows.sort(key=lambda row: row.seq)
+            for row in rows:
+                self._results[kind].add(part, (row.seq, row.json))
+                self.facts[kind, row.fact] += 1
+            self.counts[kind] += len(rows)
+        changed.sort(key=lambda pair: pair[1].seq)
+        for was, now in changed:
+            self._results["changed"].add(part, (now.seq, b"[%s,%s]" % (was.json, now.json)))
+            self.facts["changed", now.fact] += 1
+        self.counts["changed"] += len(changed)
+
+    # -- выдача -------------------------------------------------------------
+
+    def added(self) -> Iterator[Finding]:
+        """Findings нового скана без пары в старом — в порядке нового скана."""
+        for raw in self._raw("added"):
+            yield Finding.model_validate_json(raw)
+
+    def removed(self) -> Iterator[Finding]:
+        """Findings старого скана без пары в новом — в порядке старого скана."""
+        for raw in self._raw("removed"):
+            yield Finding.model_validate_json(raw)
+
+    def changed(self) -> Iterator[tuple[Finding, Finding]]:
+        """Пары (было, стало) с тем же ключом, но другим location,
+        confidence, tags или evidence — в порядке нового скана."""
+        for raw in self._raw("changed"):
+            was, now = json.loads(raw)
+            yield Finding.model_validate(was), Finding.model_validate(now)
+
+    def to_diff(self) -> Diff:
+        """Diff целиком в памяти — для небольших сканов."""
+        return Diff(added=list(self.added()), removed=list(self.removed()),
+                    changed=list(self.changed()))
+
+    def write_json(self, path: str | Path) -> Path:
+        """Записать Diff JSON потоком (читается ``Diff.model_validate_json``)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as fh:
+            for i, kind in enumerate(_KINDS):
+                fh.write(b'{"%s":[' % kind.encode() if not i else b'],"%s":[' % kind.encode())
+                for n, raw in enumerate(self._raw(kind)):
+                    fh.write(b"," + raw if n else raw)
+            fh.write(b"]}\n")
+        return path
+
+    def changelog(self) -> str:
+        """Markdown changelog API surface: эндпоинты, доступ, изменения по фактам."""
+        old, new = self.old_surface, self.new_surface
+        sections = [
+            "# Changelog API Surface\n\n"
+            f"**Было:** `{self.old_name}`  **Стало:** `{self.new_name}`\n\n"
+            f"Findings: добавлено {self.counts['added']}  |  "
+            f"удалено {self.counts['removed']}  |  изменено {self.counts['changed']}",
+        ]
+        added_eps = sorted(new.endpoints.keys() - old.endpoints.keys())
+        removed_eps = sorted(old.endpoints.keys() - new.endpoints.keys())
+        if added_eps:
+            sections.append("## Новые эндпоинты\n\n" + "\n".join(
+                f"- `{ep}`" + new.roles(ep) for ep in added_eps))
+        if removed_eps:
+            sections.append("## Удалённые эндпоинты\n\n" + "\n".join(
+                f"- `{ep}`" + old.roles(ep) for ep in removed_eps))
+        access = [ep for ep in sorted(old.endpoints.keys() & new.endpoints.keys())
+                  if old.access(ep) != new.access(ep)]
+        if access:
+            sections.append("## Изменения доступа\n\n| Эндпоинт | Было | Стало |\n"
+                            "|----------|------|-------|\n" + "\n".join(
+                                f"| `{ep}` | {old.access(ep)} | {new.access(ep)} |"
+                                for ep in access))
+        if not (added_eps or removed_eps or access):
+            sections.append("API surface не изменилась.")
+        facts = sorted({fact for _, fact in self.facts})
+        if facts:
+            sections.append("## Изменения по фактам\n\n| Факт | + | − | ~ |\n"
+                            "|------|---|---|---|\n" + "\n".join(
+                                f"| {fact} | " + " | ".join(
+                                    str(self.facts[kind, fact]) for kind in _KINDS) + " |"
+                                for fact in facts))
+        return "\n\n".join(sections) + "\n"
+
+    def _raw(self, kind: str) -> Iterator[bytes]:
+        """JSON findings вида ``kind`` из всех разделов в порядке сканов."""
+        runs = self._results[kind]
+        for _, raw in heapq.merge(*(runs.read(part) for part in range(DIFF_PARTITIONS))):
+            yield raw
+
+    # -- временные файлы ----------------------------------------------------
+
+    def _tmp_dir(self) -> str:
+        if self._tmp is None:
+            self._tmp = tempfile.mkdtemp(prefix="probe-diff-")
+        return self._tmp
+
+    def close(self) -> None:
+        """Удалить временные файлы разделов."""
+        for runs in self._results.values():
+            runs.close()
+        if self._tmp is not None:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
+
+    def __enter__(self) -> DiffResult:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class _Row(NamedTuple):
+    """Строка раздела: finding со своим номером в скане, ключом и состоянием."""
+
+    seq: int
+    key: str
+    state: int
+    fact: str
+    json: bytes
+
+
+def _encode_row(row: _Row) -> bytes:
+    return b"%d\t%s\t%d\t%s\t%s\n" % (row.seq, row.key.encode("ascii"), row.state,
+                                       row.fact.encode("utf-8"), row.json)
+
+
+def _decode_row(line: bytes) -> _Row:
+    seq, key, state, fact, raw = line.rstrip(b"\n").split(b"\t", 4)
+    return _Row(int(seq), key.decode("ascii"), int(state), fact.decode("utf-8"), raw)
+
+
+def _encode_result(item: tuple[int, bytes]) -> bytes:
+    return b"%d\t%s\n" % item
+
+
+def _decode_result(line: bytes) -> tuple[int, bytes]:
+    seq, raw = line.rstrip(b"\n").split(b"\t", 1)
+    return int(seq), raw
+
+
+def _groups(rows: Iterable[_Row]) -> dict[str, list[_Row]]:
+    """Строки раздела, сгруппированные по ключу, в порядке скана."""
+    groups: dict[str, list[_Row]] = defaultdict(list)
+    for row in rows:
+        groups[row.key].append(row)
+    return groups
+
+
+def _without(rows: list[_Row], same: Counter) -> list[_Row]:
+    """``rows`` без первых ``same[state]`` строк каждого состояния."""
+    skip = Counter(same)
+    left = []
+    for row in rows:
+        if skip[row.state]:
+            skip[row.state] -= 1
+        else:
+            left.append(row)
+    return left
+
+
+class _Runs:
+    """Кортежи по разделам: в памяти до ``budget`` байт, затем строками
+    во временных файлах (``encode``/``decode``).
+
+    Кортежи раздела читаются в порядке добавления; размер кортежа —
+    длина его последнего поля (JSON findings).
+    """
+
+    def __init__(self, owner: DiffResult, budget: int,
+                 encode: Callable[[Any], bytes], decode: Callable[[bytes], Any]) -> None:
+        self._owner = owner
+        self._budget = budget
+        self._encode = encode
+        self._decode = decode
+        self._size = 0
+        self._memory: list[list[Any]] = [[] for _ in range(DIFF_PARTITIONS)]
+        self._files: Optional[list[IO[bytes]]] = None
+        self._paths: list[str] = []
+
+    def add(self, part: int, item: tuple) -> None:
+        if self._files is not None:
+            self._files[part].write(self._encode(item))
+            return
+        self._memory[part].append(item)
+        self._size += len(item[-1]) + 64
+        if self._size > self._budget:
+            self._spill()
+
+    def _spill(self) -> None:
+        tmp = tempfile.mkdtemp(dir=self._owner._tmp_dir())
+        self._paths = [os.path.join(tmp, f"{part:02d}") for part in range(DIFF_PARTITIONS)]
+        self._files = [open(path, "wb") for path in self._paths]
+        for fh, items in zip(self._files, self._memory):
+            fh.writelines(map(self._encode, items))
+        self._memory = [[] for _ in range(DIFF_PARTITIONS)]
+        self._size = 0
+
+    def seal(self) -> None:
+        """Закончить запись: дописанные разделы можно читать."""
+        if self._files is not None:
+            for fh in self._files:
+                fh.close()
+
+    def read(self, part: int) -> Iterator[Any]:
+        if not self._paths:
+            return iter(self._memory[part])
+        return map(self._decode, _lines(self._paths[part]))
+
+    def drop(self, part: int) -> None:
+        """Освободить раздел после сверки."""
+        if self._paths:
+            os.unlink(self._paths[part])
+        else:
+            self._memory[part] = []
+
+    def close(self) -> None:
+        if self._files is not None:
+            for fh in self._files:
+                fh.close()
+
+
+def _lines(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        yield from fh
+
+
+class _Surface:
+    """API surface одного скана: эндпоинты и их доступ — для changelog."""
+
+    def __init__(self) -> None:
+        #: Эндпоинт -> роли; PUBLIC — публичный
+        self.endpoints: dict[str, set[str]] = {}
+
+    def add(self, f: Finding) -> None:
+        if f.fact not in _ENDPOINT_FACTS:
+            return
+        roles = self.endpoints.setdefault(f.entity, set())
+        if f.fact in _AUTH_FACTS:
+            if f.data.get("is_public"):
+                roles.add("PUBLIC")
+            elif f.data.get("role"):
+                roles.add(str(f.data["role"]))
+
+    def access(self, endpoint: str) -> str:
+        return ", ".join(sorted(self.endpoints.get(endpoint, ()))) or "—"
+
+    def roles(self, endpoint: str) -> str:
+        """Доступ для строки списка: `` — ROLE, ...`` или пусто."""
+        return f" — {self.access(endpoint)}" if self.endpoints.get(endpoint) else ""
+
+
+def _batches(source: FindingSource) -> Iterator[Iterable[Finding]]:
+    if isinstance(source, (str, Path)):
+        return iter_finding_batches(source)
+    return iter((source,))
+
+
+def _name(source: FindingSource, default: str) -> str:
+    return str(source) if isinstance(source, (str, Path)) else default
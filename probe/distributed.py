@@ -0,0 +1,314 @@
+"""Распределённое сканирование: координатор раздаёт файлы воркерам по TCP.
+
+Протокол — JSON-сообщения по одному на строку. Воркер запрашивает
+аренду (lease) — пачку файлов, сканирует их своими зондами и стримит
+обратно компактные batch'и findings. Аренда, не завершённая за ``lease_ttl``
+секунд (воркер упал или завис), возвращается в очередь и отдаётся другому
+воркеру; её частичные результаты отбрасываются. Итоговое досье собирается
+тем же assemble_dossier(), что и у локального скана, поэтому совпадает
+с ним вплоть до порядка findings.
+
+Сообщения воркер → координатор::
+
+    {"op": "hello", "worker": "<id>"}
+    {"op": "lease"}
+    {"op": "batch", "lease": 7, "index": 12, "findings": [[...], ...]}
+    {"op": "complete", "lease": 7}
+
+Ответы координатора::
+
+    {"op": "config", "env": "test", "probes": ["ra-auth-patterns", ...]}
+    {"op": "lease", "lease": 7, "files": [[12, "src/FooTest.java"], ...]}
+    {"op": "wait", "retry": 0.2}      — свободных аренд нет, но скан не закончен
+    {"op": "done"}                     — все файлы просканированы
+    {"op": "ack"} / {"op": "expired"}  — ответ на batch/complete
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, Sequence
+
+from probe.defaults import DEFAULT_LEASE_SIZE, DEFAULT_LEASE_TTL, DEFAULT_PORT
+from probe.models import Dossier, Finding
+from probe.runner import ScanJob, assemble_dossier, collect_files, run_probes, scan_one_file
+from probes.base import BaseProbe
+
+logger = logging.getLogger(__name__)
+
+
+def pack_finding(f: Finding) -> list[Any]:
+    """Finding → компактный список позиционных полей для передачи по сети."""
+    return [f.probe, f.env, f.entity, f.fact, f.data, f.location,
+            f.confidence, f.tags, f.ts.isoformat()]
+
+
+def unpack_finding(row: list[Any]) -> Finding:
+    """Обратное pack_finding(); данные из сети валидируются."""
+    probe, env, entity, fact, data, location, confidence, tags, ts = row
+    return Finding(probe=probe, env=env, entity=entity, fact=fact, data=data,
+                   location=location, confidence=confidence, tags=tags, ts=ts)
+
+
+@dataclass
+class _Lease:
+    files: list[int]
+    deadline: float
+    batches: dict[int, list[Finding]] = field(default_factory=dict)
+
+
+class _LeaseTable:
+    """Очередь файлов и активные аренды. Все методы потокобезопасны."""
+
+    def __init__(self, files_count: int, lease_size: int, ttl: float) -> None:
+        indexes = list(range(files_count))
+        self._queue: deque[list[int]] = deque(
+            indexes[i:i + lease_size] for i in range(0, files_count, lease_size)
+        )
+        self._ttl = ttl
+        self._active: dict[int, _Lease] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.results: dict[int, list[Finding]] = {}
+        self.finished = threading.Event()
+        if not files_count:
+            self.finished.set()
+
+    def acquire(self) -> tuple[Optional[int], list[int]]:
+        """Выдать аренду: (id, индексы файлов); (None, []) — выдавать нечего."""
+        with self._lock:
+            self._expire(time.monotonic())
+            if not self._queue:
+                return None, []
+            files = self._queue.popleft()
+            lease_id = self._next_id
+            self._next_id += 1
+            self._active[lease_id] = _Lease(files, time.monotonic() + self._ttl)
+            return lease_id, files
+
+    def add_batch(self, lease_id: int, index: int, findings: list[Finding]) -> bool:
+        """Принять batch файла; False — аренда истекла или неизвестна."""
+        with self._lock:
+            lease = self._active.get(lease_id)
+            if lease is None or index not in lease.files:
+                return False
+            lease.batches[index] = findings
+            lease.deadline = time.monotonic() + self._ttl
+            return True
+
+    def complete(self, lease_id: int) -> bool:
+        """Зафиксировать аренду; неполная аренда возвращается в очередь."""
+        with self._lock:
+            lease = self._active.pop(lease_id, None)
+            if lease is None:
+                return False
+            if set(lease.batches) != set(lease.files):
+                self._queue.appendleft(lease.files)
+                return False
+            self.results.update(lease.batches)
+            if not self._queue and not self._active:
+                self.finished.set()
+            return True
+
+    def _expire(self, now: float) -> None:
+        for lease_id, lease in list(self._active.items()):
+            if lease.deadline < now:
+                logger.warning("Аренда %d истекла, файлов: %d — возвращена в очередь",
+                               lease_id, len(lease.files))
+                del self._active[lease_id]
+                self._queue.appendleft(lease.files)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    block_on_close = False
+
+    coordinator: "Coordinator"
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Одно соединение воркера: читает сообщения построчно и отвечает."""
+
+    server: _Server
+
+    def handle(self) -> None:
+        coordinator = self.server.coordinator
+        for line in self.rfile:
+            try:
+                reply = coordinator.dispatch(json.loads(line))
+            except (ValueError, KeyError, TypeError) as exc:
+                reply = {"op": "error", "error": str(exc)}
+            self.wfile.write(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+
+
+class Coordinator:
+    """Координатор распределённого скана одной цели.
+
+    Пофайловые зонды исполняют воркеры; целые и async-зонды координатор
+    запускает сам, параллельно с раздачей аренд.
+    """
+
+    def __init__(
+        self,
+        probes: Sequence[BaseProbe],
+        target: str | Path,
+        env: str,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        lease_size: int = DEFAULT_LEASE_SIZE,
+        lease_ttl: float = DEFAULT_LEASE_TTL,
+        dedup: str = "none",
+    ) -> None:
+        self.job = ScanJob(probes=probes, target=target, env=env, dedup=dedup)
+        base = Path(target)
+        self._file_probes = [p for p in probes if p.file_glob and not p.is_async]
+        self._local_probes = [p for p in probes if p not in self._file_probes]
+        self.files = [f.relative_to(base).as_posix()
+                      for f in collect_files(self._file_probes, base)]
+        self.leases = _LeaseTable(len(self.files), lease_size, lease_ttl)
+        self._server = _Server((host, port), _Handler)
+        self._server.coordinator = self
+        self._serving: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        """Фактический (host, port) — полезно при port=0."""
+        return self._server.server_address[:2]
+
+    def dispatch(self, msg: dict) -> dict:
+        """Обработать одно сообщение воркера."""
+        op = msg["op"]
+        if op == "hello":
+            logger.info("Воркер %s подключён", msg.get("worker", "?"))
+            return {"op": "config", "env": self.job.env,
+                    "probes": [p.name for p in self._file_probes]}
+        if op == "lease":
+            if self.leases.finished.is_set():
+                return {"op": "done"}
+            lease_id, indexes = self.leases.acquire()
+            if lease_id is None:
+                return {"op": "wait", "retry": 0.2}
+            return {"op": "lease", "lease": lease_id,
+                    "files": [[i, self.files[i]] for i in indexes]}
+        if op == "batch":
+            findings = [unpack_finding(row) for row in msg["findings"]]
+            ok = self.leases.add_batch(msg["lease"], msg["index"], findings)
+            return {"op": "ack" if ok else "expired"}
+        if op == "complete":
+            return {"op": "ack" if self.leases.complete(msg["lease"]) else "expired"}
+        raise ValueError(f"Неизвестная операция: {op}")
+
+    def start(self) -> None:
+        """Начать отвечать воркерам. Повторный вызов ничего не делает."""
+        if self._serving is not None:
+            return
+        self._serving = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._serving.start()
+        logger.info("Координатор %s:%d, файлов: %d", *self.address, len(self.files))
+
+    def run(self, timeout: Optional[float] = None) -> Dossier:
+        """Раздавать аренды до конца скана и вернуть итоговое досье.
+
+        Raises:
+            TimeoutError: Скан не завершился за ``timeout`` секунд.
+        """
+        local: list[Finding] = []
+        local_thread = threading.Thread(target=self._run_local, args=(local,))
+        local_thread.start()
+        self.start()
+        try:
+            if not self.leases.finished.wait(timeout):
+                raise TimeoutError(f"Распределённый скан не завершён за {timeout} с")
+            local_thread.join()
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+
+        parts = [*self.leases.results.items(), (0, local)]
+        return assemble_dossier(self.job, parts)
+
+    def _run_local(self, out: list[Finding]) -> None:
+        """Целые и async-зонды — на координаторе, параллельно с воркерами."""
+        if self._local_probes:
+            out.extend(run_probes(self._local_probes, self.job.target, self.job.env).findings)
+
+
+def run_worker(
+    address: tuple[str, int],
+    target: str | Path,
+    discover: Callable[[str], list[BaseProbe]],
+    worker_id: Optional[str] = None,
+) -> int:
+    """Подключиться к координатору и сканировать выданные файлы до конца скана.
+
+    Args:
+        address: (host, port) координатора.
+        target: Локальный корень той же цели (пути в арендах — относительные).
+        discover: Возвращает зонды среды; используются те, что назвал координатор.
+        worker_id: Имя воркера в логах координатора.
+
+    Returns:
+        Число просканированных файлов.
+
+    Raises:
+        RuntimeError: У воркера нет части зондов координатора — досье
+            разошлось бы с локальным сканом.
+        ValueError: Координатор прислал путь вне ``target``.
+    """
+    base = Path(target).resolve()
+    scanned = 0
+    with socket.create_connection(address) as sock:
+        rfile = sock.makefile("r", encoding="utf-8")
+        wfile = sock.makefile("w", encoding="utf-8")
+
+        def call(msg: dict) -> dict:
+            wfile.write(json.dumps(msg, ensure_ascii=False) + "\n")
+            wfile.flush()
+            line = rfile.readline()
+            return json.loads(line) if line else {"op": "done"}
+
+        config = call({"op": "hello", "worker": worker_id or f"{socket.gethostname()}:{os.getpid()}"})
+        available = {p.name: p for p in discover(config["env"])}
+        missing = [name for name in config["probes"] if name not in available]
+        if missing:
+            raise RuntimeError(f"У воркера нет зондов координатора: {', '.join(missing)}")
+        probes = [available[name] for name in config["probes"]]
+
+        try:
+            while True:
+                reply = call({"op": "lease"})
+                if reply["op"] == "wait":
+                    time.sleep(reply["retry"])
+                    continue
+                if reply["op"] != "lease":
+                    break
+                for index, rel_path in reply["files"]:
+                    findings = scan_one_file(probes, _inside(base, rel_path), base)
+                    ack = call({"op": "batch", "lease": reply["lease"], "index": index,
+                                "findings": [pack_finding(f) for f in findings]})
+                    if ack["op"] != "ack":
+                        break
+                    scanned += 1
+                else:
+                    call({"op": "complete", "lease": reply["lease"]})
+        except ConnectionError as exc:
+            logger.info("Координатор закрыл соединение: %s", exc)
+    return scanned
+
+
+def _inside(base: Path, rel_path: str) -> Path:
+    """Путь из аренды внутри корня цели; выход за корень — ошибка."""
+    path = (base / rel_path).resolve()
+    if not path.is_relative_to(base):
+        raise ValueError(f"Путь вне цели: {rel_path}")
+    return path
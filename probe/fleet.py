@@ -0,0 +1,86 @@
+"""Fleet-скан — много целей за один запуск через общий пул воркеров."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass
+class FleetTarget:
+    """Цель fleet-скана: путь, среда и директория для её findings."""
+
+    target: str
+    env: str
+    out: str
+
+
+def load_targets(path: str | Path, default_env: str | None, out_root: str | Path) -> list[FleetTarget]:
+    """Прочитать список целей fleet-скана.
+
+    Поддерживаются два формата:
+
+    * текстовый — одна цель на строку: ``<target> [env] [out]``,
+      пустые строки и ``#``-комментарии пропускаются;
+    * JSON-манифест (``*.json``) — список объектов
+      ``{"target": ..., "env": ..., "out": ...}``.
+
+    Не указанная среда берётся из ``default_env``, не указанная
+    директория — ``<out_root>/<имя цели>`` (с суффиксом при совпадении имён).
+
+    Raises:
+        ValueError: Цель без среды при пустом ``default_env`` или битый манифест.
+    """
+    p = Path(path)
+    if p.suffix == ".json":
+        entries = json.loads(p.read_text(encoding="utf-8"))
+        if not isinstance(entries, list):
+            raise ValueError(f"{p}: манифест должен быть JSON-списком целей")
+        rows = []
+        for e in entries:
+            if not isinstance(e, dict) or "target" not in e:
+                raise ValueError(f"{p}: цель манифеста должна быть объектом с 'target': {e!r}")
+            rows.append((e["target"], e.get("env"), e.get("out")))
+    else:
+        rows = []
+        for line in p.read_text(encoding="utf-8").splitlines():
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            parts = line.split()
+            if len(parts) > 3:
+                raise ValueError(f"{p}: лишние поля в строке '{line}'")
+            parts += [None] * (3 - len(parts))
+            rows.append((parts[0], parts[1], parts[2]))
+
+    # Явные out занимаются первыми, чтобы автоимена с ними не совпали
+    used: set[str] = set()
+    for target, _, out in rows:
+        if out is None:
+            continue
+        key = str(Path(out).resolve())
+        if key in used:
+            raise ValueError(f"{p}: директория {out} указана для нескольких целей")
+        used.add(key)
+
+    targets: list[FleetTarget] = []
+    for target, env, out in rows:
+        env = env or default_env
+        if not env:
+            raise ValueError(f"Для цели {target} не указана среда (нужен --env)")
+        if out is None:
+            out = _unique_out(Path(out_root), Path(target).resolve().name, used)
+        targets.append(FleetTarget(target=target, env=env, out=out))
+    return targets
+
+
+def _unique_out(root: Path, name: str, used: set[str]) -> str:
+    """``root/name`` с суффиксом ``-N``, если директория уже занята."""
+    name = name or "target"
+    candidate, n = root / name, 2
+    while str(candidate.resolve()) in used:
+        candidate = root / f"{name}-{n}"
+        n += 1
+    used.add(str(candidate.resolve()))
+    return str(candidate)
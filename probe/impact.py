@@ -0,0 +1,175 @@
+"""Влияние одного файла на карту продукта — для `probe scan-file`.
+
+Редактор или pre-commit хук пересканирует один изменённый файл и хочет
+знать, что это меняет в API Surface: какие эндпоинты появились или пропали
+и у каких изменились ожидаемые статусы. Полный correlate() на каждое
+сохранение файла слишком дорог, поэтому ImpactContext один раз строит
+из досье-контекста счётчики API Surface, а на файл пересчитывает только
+затронутые им эндпоинты: findings файла из контекста вычитаются,
+новые — добавляются.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+from probe.models import Dossier, Finding
+from probe.runner import scan_one_file
+from probes.base import BaseProbe
+
+#: Факты, которые вводят эндпоинт в API Surface (как в correlator._api_surface)
+_ENDPOINT_FACTS = ("endpoint_tested", "auth_required", "public_endpoint")
+
+
+@dataclass
+class FileImpact:
+    """Findings одного файла и их влияние на API Surface контекста."""
+
+    path: str
+    findings: list[Finding]
+    added_endpoints: list[str] = field(default_factory=list)
+    removed_endpoints: list[str] = field(default_factory=list)
+    #: эндпоинт → (статусы в контексте, статусы с новым файлом)
+    changed_statuses: dict[str, tuple[list[str], list[str]]] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added_endpoints or self.removed_endpoints or self.changed_statuses)
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "findings": [f.model_dump(mode="json") for f in self.findings],
+            "added_endpoints": self.added_endpoints,
+            "removed_endpoints": self.removed_endpoints,
+            "changed_statuses": {ep: {"old": old, "new": new}
+                                 for ep, (old, new) in self.changed_statuses.items()},
+        }
+
+    def render(self) -> list[str]:
+        """Человекочитаемый отчёт построчно."""
+        lines = [f"{self.path}: findings: {len(self.findings)}"]
+        lines += [f"  + {ep}" for ep in self.added_endpoints]
+        lines += [f"  - {ep}" for ep in self.removed_endpoints]
+        for ep, (old, new) in self.changed_statuses.items():
+            lines.append(f"  ~ {ep}: {', '.join(old) or '—'} → {', '.join(new) or '—'}")
+        if not self.changed:
+            lines.append("  API Surface не изменился")
+        return lines
+
+
+class _Surface:
+    """Счётчики API Surface: поддерживают и добавление, и вычитание findings."""
+
+    def __init__(self) -> None:
+        self.refs: Counter[str] = Counter()
+        self.ep_classes: dict[str, Counter[str]] = defaultdict(Counter)
+        self.class_eps: dict[str, Counter[str]] = defaultdict(Counter)
+        self.class_statuses: dict[str, Counter[str]] = defaultdict(Counter)
+
+    def update(self, findings: Iterable[Finding], sign: int = 1) -> None:
+        for f in findings:
+            tc = f.data.get("test_class", "")
+            if f.fact in _ENDPOINT_FACTS:
+                self.refs[f.entity] += sign
+                self.ep_classes[f.entity][tc] += sign
+                self.class_eps[tc][f.entity] += sign
+            elif f.fact == "expected_status":
+                self.class_statuses[tc][str(f.data.get("status_code", ""))] += sign
+
+    def exists(self, ep: str) -> bool:
+        return self.refs[ep] > 0
+
+    def statuses(self, ep: str) -> list[str]:
+        found: set[str] = set()
+        for tc, n in self.ep_classes[ep].items():
+            if n > 0:
+                found.update(s for s, k in self.class_statuses[tc].items() if k > 0)
+        return sorted(found)
+
+    def affected(self, findings: Iterable[Finding]) -> set[str]:
+        """Эндпоинты, чья строка API Surface может зависеть от ``findings``."""
+        eps: set[str] = set()
+        for f in findings:
+            if f.fact in _ENDPOINT_FACTS:
+                eps.add(f.entity)
+            elif f.fact == "expected_status":
+                tc = f.data.get("test_class", "")
+                eps.update(ep for ep, n in self.class_eps[tc].items() if n > 0)
+        return eps
+
+
+class ImpactContext:
+    """Досье-контекст, подготовленное для быстрых пофайловых сравнений.
+
+    Построение — O(findings контекста); impact() — O(findings файла
+    и затронутых им эндпоинтов). Контекст не меняется: impact() — оценка
+    «что если», поэтому объект можно переиспользовать (и кэшировать).
+    """
+
+    def __init__(self, dossier: Dossier) -> None:
+        self.dossier = dossier
+        self._by_file: dict[str, list[Finding]] = defaultdict(list)
+        for f in dossier.findings:
+            self._by_file[f.location_file or ""].append(f)
+        self._surface = _Surface()
+        self._surface.update(dossier.findings)
+        self._lock = threading.Lock()
+
+    def impact(self, rel_path: str, findings: list[Finding]) -> FileImpact:
+        """Сравнить findings файла ``rel_path`` с тем, что о нём знает контекст."""
+        old = self._by_file.get(rel_path, [])
+        surface = self._surface
+        with self._lock:
+            eps = surface.affected(old)
+            surface.update(findings)
+            eps |= surface.affected(findings)
+            surface.update(findings, -1)
+
+            before = {ep: (surface.exists(ep), surface.statuses(ep)) for ep in eps}
+            surface.update(old, -1)
+            surface.update(findings)
+            after = {ep: (surface.exists(ep), surface.statuses(ep)) for ep in eps}
+            surface.update(findings, -1)
+            surface.update(old)
+
+        result = FileImpact(path=rel_path, findings=findings)
+        for ep in sorted(eps):
+            (was, old_statuses), (now, new_statuses) = before[ep], after[ep]
+            if now and not was:
+                result.added_endpoints.append(ep)
+            elif was and not now:
+                result.removed_endpoints.append(ep)
+            elif was and old_statuses != new_statuses:
+                result.changed_statuses[ep] = (old_statuses, new_statuses)
+        return result
+
+
+def scan_file_impact(
+    probes: Sequence[BaseProbe],
+    path: Path,
+    base: Path,
+    context: ImpactContext,
+    scan: Callable[[Sequence[BaseProbe], Path, Path], list[Finding]] = scan_one_file,
+) -> FileImpact:
+    """Просканировать один файл пофайловыми зондами и оценить его влияние.
+
+    Args:
+        probes: Зонды среды; запускаются только пофайловые.
+        path: Файл внутри ``base``.
+        base: Корень цели — от него считаются location, как при полном скане.
+        context: Подготовленный контекст (findings последнего полного скана).
+        scan: Функция пофайлового скана, например FileCache.scan.
+
+    Raises:
+        ValueError: ``path`` вне ``base``.
+    """
+    base = base.resolve()
+    path = path.resolve()
+    rel_path = path.relative_to(base).as_posix()
+    file_probes = [p for p in probes if p.file_glob and not p.is_async]
+    return context.impact(rel_path, scan(file_probes, path, base))
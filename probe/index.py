@@ -0,0 +1,115 @@
+"""Инвертированные индексы findings: поле → значение → номера строк.
+
+Индекс строится по ``probe``, ``fact``, ``tag``, ``entity``, ``test_class``
+(из data) и ``file`` (файл из location) и пополняется при добавлении
+findings, не перестраиваясь целиком. Постинги — ``array`` номеров строк
+в порядке добавления, поэтому они отсортированы, и пересечение
+идёт от самого короткого постинга двоичным поиском по остальным.
+
+Выборка ``rows(fact=..., tag=...)`` стоит O(k log n) по длине самого
+короткого постинга, а не O(N) по всем findings, — так корреляция
+миллиона findings не платит «секции × N».
+"""
+
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Union
+
+from probe.models import Finding, FindingRecord, location_file
+
+#: Индексируемые поля, в порядке аргументов query()
+INDEXED = ("probe", "fact", "tag", "entity", "test_class", "file")
+
+#: Значение критерия: строка или набор строк (любая из них)
+Criterion = Union[str, Iterable[str], None]
+
+_EMPTY = array("I")
+
+
+class FindingIndex:
+    """Инвертированные индексы по строкам досье."""
+
+    __slots__ = ("size", "_postings")
+
+    def __init__(self, findings: Iterable[Union[Finding, FindingRecord]] = ()) -> None:
+        self.size = 0
+        self._postings: dict[str, dict[str, array]] = {name: {} for name in INDEXED}
+        self.extend(findings)
+
+    def add(self, finding: Union[Finding, FindingRecord]) -> int:
+        """Проиндексировать очередную строку; вернуть её номер."""
+        row = self.size
+        postings = self._postings
+        _post(postings["probe"], finding.probe, row)
+        _post(postings["fact"], finding.fact, row)
+        _post(postings["entity"], finding.entity, row)
+        for tag in dict.fromkeys(finding.tags):
+            _post(postings["tag"], tag, row)
+        test_class = finding.data.get("test_class")
+        if test_class and isinstance(test_class, str):
+            _post(postings["test_class"], test_class, row)
+        file = location_file(finding.location)
+        if file is not None:
+            _post(postings["file"], file, row)
+        self.size = row + 1
+        return row
+
+    def extend(self, findings: Iterable[Union[Finding, FindingRecord]]) -> None:
+        for finding in findings:
+            self.add(finding)
+
+    def rows(self, **criteria: Criterion) -> Union[range, array, list[int]]:
+        """Номера строк (по возрастанию), подходящих под все критерии.
+
+        Критерий — строка или набор строк (подходит любая); ``None``
+        критерий не задаёт. Без критериев — все строки.
+
+        Raises:
+            TypeError: Поле не индексируется.
+        """
+        selected: list[array] = []
+        for name, value in criteria.items():
+            if value is None:
+                continue
+            postings = self._postings.get(name)
+            if postings is None:
+                raise TypeError(f"Поле не индексируется: {name!r} (есть: {', '.join(INDEXED)})")
+            if isinstance(value, str):
+                selected.append(postings.get(value, _EMPTY))
+            else:
+                selected.append(_union([postings.get(v, _EMPTY) for v in set(value)]))
+        if not selected:
+            return range(self.size)
+        selected.sort(key=len)
+        first, rest = selected[0], selected[1:]
+        if not rest:
+            return first
+        return [row for row in first if all(_contains(other, row) for other in rest)]
+
+    def counts(self, name: str) -> dict[str, int]:
+        """Число строк на каждое значение поля ``name``."""
+        return {value: len(rows) for value, rows in self._postings[name].items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+
+def _post(postings: dict[str, array], value: str, row: int) -> None:
+    rows = postings.get(value)
+    if rows is None:
+        rows = postings[value] = array("I")
+    rows.append(row)
+
+
+def _union(lists: list[array]) -> array:
+    if len(lists) == 1:
+        return lists[0]
+    return array("I", sorted(set().union(*lists)))
+
+
+def _contains(rows: array, row: int) -> bool:
+    i = bisect_left(rows, row)
+    return i < len(rows) and rows[i] == row
+
@@ -1,11 +1,16 @@
-"""Модели данных PROBE: Finding, Dossier, Diff, AnalysisResult."""
+"""Модели данных PROBE: Finding, FindingRecord, FindingBatch, Dossier, Diff, AnalysisResult."""
 
 from __future__ import annotations
 
+import hashlib
+import json
 from datetime import datetime, timezone
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, NamedTuple, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+if TYPE_CHECKING:
+    from probe.index import Criterion, FindingIndex
 
 
 class Finding(BaseModel):
@@ -26,6 +31,155 @@ class Finding(BaseModel):
 
     model_config = {"json_encoders": {datetime: lambda v: v.isoformat()}}
 
+    @property
+    def location_file(self) -> Optional[str]:
+        """Путь файла из ``location`` без номера строки (``путь[:строка]``)."""
+        return location_file(self.location)
+
+    @property
+    def fingerprint(self) -> str:
+        """Отпечаток содержимого факта (см. fingerprint())."""
+        return fingerprint(self.probe, self.fact, self.entity, self.data, self.location)
+
+
+#: Канонический JSON для отпечатков: ключи по порядку, без пробелов
+_CANONICAL = json.JSONEncoder(sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+                              default=str)
+
+
+def fingerprint(probe: str, fact: str, entity: str, data: dict[str, Any],
+                location: Optional[str] = None) -> str:
+    """Стабильный отпечаток факта: blake2b канонического JSON
+    (probe, fact, entity, data, location).
+
+    Ключи ``data`` сортируются, кортежи равны спискам. ``ts``, ``env``,
+    ``confidence`` и ``tags`` в отпечаток не входят: один и тот же факт
+    из разных сканов даёт один отпечаток.
+    """
+    payload = _CANONICAL.encode([probe, fact, entity, data, location])
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def location_file(location: Optional[str]) -> Optional[str]:
+    """Путь файла из ``location`` вида ``путь[:строка]``."""
+    if not location:
+        return None
+    path, sep, line = location.rpartition(":")
+    return path if sep and line.isdigit() else location
+
+
+class FindingRecord(NamedTuple):
+    """Внутренняя запись факта: кортеж без валидации и без часов.
+
+    Зонды выдают записи (BaseProbe.record()), runner превращает их
+    в Finding без валидации, как ``model_construct``, с общей временной
+    меткой. Валидация — только
+    на недоверенных границах (загрузка внешнего JSON, данные из сети).
+    """
+
+    probe: str
+    env: str
+    entity: str
+    fact: str
+    data: dict[str, Any]
+    location: Optional[str] = None
+    confidence: float = 1.0
+    tags: tuple[str, ...] = ()
+
+    def to_finding(self, ts: datetime) -> Finding:
+        """Finding без повторной валидации: поля записи уже корректны."""
+        probe, env, entity, fact, data, location, confidence, tags = self
+        return _finding(probe, env, entity, fact, data, location, confidence, list(tags), ts)
+
+
+class FindingBatch:
+    """Findings одного зонда с общими ``probe``, ``env`` и ``tags``.
+
+    Общие поля объявляются один раз, строки — кортежи
+    (entity, fact, data, location, confidence, доп. теги). Временной метки
+    у строк нет: она одна на скан и хранится в досье (``scanned_at``).
+    Батч — последовательность FindingRecord, поэтому его можно вернуть
+    из scan_file() как список; между процессами он передаётся компактнее
+    отдельных записей.
+    """
+
+    __slots__ = ("probe", "env", "tags", "rows")
+
+    def __init__(self, probe: str, env: str, tags: Iterable[str] = ()) -> None:
+        self.probe = probe
+        self.env = env
+        self.tags = tuple(tags)
+        self.rows: list[tuple] = []
+
+    def add(self, entity: str, fact: str, data: dict[str, Any],
+            location: Optional[str] = None, confidence: float = 1.0,
+            tags: Iterable[str] = ()) -> None:
+        """Добавить строку; ``tags`` дополняют общие теги батча."""
+        self.rows.append((entity, fact, data, location, confidence, tuple(tags)))
+
+    def to_findings(self, ts: datetime) -> list[Finding]:
+        """Finding всех строк с общей меткой ``ts``, без валидации."""
+        probe, env, shared = self.probe, self.env, list(self.tags)
+        return [_finding(probe, env, entity, fact, data, location, confidence,
+                         shared + list(extra) if extra else list(shared), ts)
+                for entity, fact, data, location, confidence, extra in self.rows]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index: int) -> FindingRecord:
+        entity, fact, data, location, confidence, extra = self.rows[index]
+        return FindingRecord(self.probe, self.env, entity, fact, data, location,
+                             confidence, self.tags + extra)
+
+    def __iter__(self) -> Iterator[FindingRecord]:
+        for i in range(len(self.rows)):
+            yield self[i]
+
+    def __repr__(self) -> str:
+        return f"FindingBatch({self.probe!r}, {self.env!r}, rows={len(self.rows)})"
+
+
+_new = object.__new__
+_set = object.__setattr__
+_FINDING_FIELDS = frozenset(Finding.model_fields)
+
+
+def _finding(probe: str, env: str, entity: str, fact: str, data: dict[str, Any],
+             location: Optional[str], confidence: float, tags: list[str],
+             ts: datetime) -> Finding:
+    """Finding без валидации — как ``Finding.model_construct``, но без его
+    обхода полей и дефолтов (model_construct медленнее валидации в pydantic-core).
+
+    Опирается на внутренние атрибуты pydantic; совпадение с model_construct
+    сторожит tests/test_models.py::TestFindingShortcut."""
+    finding = _new(Finding)
+    _set(finding, "__dict__", {
+        "probe": probe, "env": env, "entity": entity, "fact": fact, "data": data,
+        "ts": ts, "location": location, "confidence": confidence, "tags": tags,
+    })
+    _set(finding, "__pydantic_fields_set__", set(_FINDING_FIELDS))
+    _set(finding, "__pydantic_extra__", None)
+    _set(finding, "__pydantic_private__", None)
+    return finding
+
+
+def materialize(items: Iterable[Union[Finding, FindingRecord, FindingBatch]],
+                ts: Optional[datetime] = None) -> list[Finding]:
+    """Записи и батчи — в Finding с общей меткой ``ts`` (по умолчанию — сейчас);
+    готовые Finding — как есть."""
+    found: list[Finding] = []
+    for item in items:
+        if isinstance(item, (FindingRecord, FindingBatch)):
+            if ts is None:
+                ts = datetime.now(timezone.utc)
+            if isinstance(item, FindingBatch):
+                found.extend(item.to_findings(ts))
+                continue
+            item = item.to_finding(ts)
+        found.append(item)
+    return found
+
 
 class Dossier(BaseModel):
     """Досье — совокупность findings от одного или всех зондов."""
@@ -35,17 +189,73 @@ class Dossier(BaseModel):
     scanned_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     findings: list[Finding] = Field(default_factory=list)
 
+    _index: Optional[FindingIndex] = PrivateAttr(default=None)
+    _indexed: Optional[list[Finding]] = PrivateAttr(default=None)
+
+    def append(self, finding: Finding) -> None:
+        """Добавить finding; индексы пополняются сразу."""
+        self.findings.append(finding)
+        if self._index is not None and self._indexed is self.findings:
+            self._index.add(finding)
+
+    def extend(self, findings: Iterable[Finding]) -> None:
+        for finding in findings:
+            self.append(finding)
+
+    @property
+    def index(self) -> FindingIndex:
+        """Инвертированные индексы findings (probe.index).
+
+        Строятся при первом обращении и догоняют findings, добавленные
+        в конец списка (в том числе напрямую через ``findings.append``).
+        Новый список ``findings`` индексируется заново; после замены
+        элементов на месте нужен reindex().
+        """
+        findings = self.findings
+        index = self._index
+        if index is None or self._indexed is not findings or index.size > len(findings):
+            return self.reindex()
+        if index.size < len(findings):
+            index.extend(findings[index.size:])
+        return index
+
+    def reindex(self) -> FindingIndex:
+        """Перестроить индексы с нуля."""
+        from probe.index import FindingIndex
+
+        self._index = FindingIndex(self.findings)
+        self._indexed = self.findings
+        return self._index
+
+    def query(self, probe: Criterion = None, fact: Criterion = None, tag: Criterion = None,
+              entity: Criterion = None, test_class: Criterion = None,
+              file: Criterion = None) -> list[Finding]:
+        """Findings, подходящие под все заданные критерии, в порядке досье.
+
+        Критерий — строка или набор строк (подходит любая из них):
+        ``query(fact=("auth_required", "public_endpoint"), tag="security")``.
+        Выборка — пересечение постингов индекса, без прохода по findings.
+        """
+        findings = self.findings
+        rows = self.index.rows(probe=probe, fact=fact, tag=tag, entity=entity,
+                               test_class=test_class, file=file)
+        return [findings[row] for row in rows]
+
+    def counts(self, field: str) -> dict[str, int]:
+        """Число findings на каждое значение индексируемого поля."""
+        return self.index.counts(field)
+
     def by_probe(self, probe_name: str) -> list[Finding]:
         """Вернуть findings конкретного зонда."""
-        return [f for f in self.findings if f.probe == probe_name]
+        return self.query(probe=probe_name)
 
     def by_fact(self, fact: str) -> list[Finding]:
         """Вернуть findings с конкретным типом факта."""
-        return [f for f in self.findings if f.fact == fact]
+        return self.query(fact=fact)
 
     def by_tag(self, tag: str) -> list[Finding]:
         """Вернуть findings с конкретным тегом."""
-        return [f for f in self.findings if tag in f.tags]
+        return self.query(tag=tag)
 
 
 class Diff(BaseModel):
@@ -0,0 +1,72 @@
+"""Сквозной конвейер `probe run`: скан → карта продукта → аналитики в памяти.
+
+Раньше `probe scan` писал досье в JSON, а `probe map` и `probe analyze`
+каждый заново читали и валидировали все findings. Конвейер передаёт одно
+досье из runner прямо в correlate() и аналитики; findings сохраняются
+на диск, только если это попросили.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from probe.analyzers.base import BaseAnalyzer
+from probe.correlator import correlate
+from probe.defaults import DEFAULT_MAX_CONCURRENCY
+from probe.models import AnalysisResult, Dossier, Finding
+from probe.runner import ProgressCallback, run_probes
+from probes.base import BaseProbe
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RunResult:
+    """Результат конвейера: досье, Markdown карты продукта и выводы аналитиков."""
+
+    dossier: Dossier
+    product_map: str
+    analyses: dict[str, AnalysisResult] = field(default_factory=dict)
+
+
+def run_analyzers(analyzers: Iterable[BaseAnalyzer],
+                  findings: list[Finding]) -> dict[str, AnalysisResult]:
+    """Запустить аналитики на findings; упавший аналитик пропускается с ошибкой в логе."""
+    results: dict[str, AnalysisResult] = {}
+    for analyzer in analyzers:
+        try:
+            results[analyzer.name] = analyzer.analyze(findings)
+        except Exception as exc:
+            logger.error("[%s] ошибка: %s", analyzer.name, exc)
+    return results
+
+
+def run_pipeline(
+    probes: Sequence[BaseProbe],
+    target: str | Path,
+    env: str,
+    analyzers: Sequence[BaseAnalyzer] = (),
+    map_path: Optional[str | Path] = None,
+    max_workers: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: str = "auto",
+    dedup: str = "none",
+) -> RunResult:
+    """Просканировать цель и сразу построить карту продукта и анализ.
+
+    Args:
+        probes: Зонды среды.
+        target: Путь или URL цели.
+        env: Тип среды.
+        analyzers: Аналитики; получают findings досье без повторной загрузки.
+        map_path: Куда сохранить product-map.md; None — только вернуть строку.
+        max_workers, progress, max_concurrency, executor, dedup: См. runner.run_probes().
+    """
+    dossier = run_probes(probes, target, env, max_workers=max_workers, progress=progress,
+                         max_concurrency=max_concurrency, executor=executor, dedup=dedup)
+    product_map = correlate(dossier, out_path=map_path)
+    return RunResult(dossier, product_map, run_analyzers(analyzers, dossier.findings))
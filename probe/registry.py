@@ -0,0 +1,276 @@
+"""Реестр зондов и аналитиков: кэшированный манифест и ленивый импорт.
+
+Раньше CLI на каждом запуске импортировал все модули ``probes.<env>``
+и ``probe.analyzers`` и перебирал их через ``dir()``. Реестр делает это
+один раз и сохраняет манифест — имя, среду, модуль, класс и ``file_glob``
+каждого зонда. Пока файлы пакетов и набор плагинов не менялись, манифест
+читается из кэша, а модуль зонда импортируется только когда зонд
+действительно запускается.
+
+Сторонние зонды и аналитики подключаются через entry points::
+
+    [project.entry-points."probe.probes"]
+    my-probe = "my_pkg.probes:MyProbe"
+
+    [project.entry-points."probe.analyzers"]
+    my-analyzer = "my_pkg.analyzers:MyAnalyzer"
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import json
+import logging
+import os
+import pkgutil
+from dataclasses import asdict, dataclass
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+#: Группы entry points для сторонних зондов и аналитиков
+PROBE_GROUP = "probe.probes"
+ANALYZER_GROUP = "probe.analyzers"
+
+#: Версия формата манифеста; другая версия в кэше — пересборка
+MANIFEST_VERSION = 1
+
+_PROBES_PACKAGE = "probes"
+_ANALYZERS_PACKAGE = "probe.analyzers"
+
+
+@dataclass(frozen=True)
+class Entry:
+    """Запись манифеста: где лежит класс зонда или аналитика и что о нём известно."""
+
+    name: str
+    module: str
+    attr: str
+    #: Среда зонда; у аналитиков пустая
+    env: str = ""
+    #: Файлы, которые читает зонд (``BaseProbe.file_glob``)
+    file_glob: str = ""
+    #: Источник: ``builtin`` или имя дистрибутива плагина
+    source: str = "builtin"
+
+    def load(self) -> type:
+        """Импортировать модуль и вернуть класс."""
+        return getattr(importlib.import_module(self.module), self.attr)
+
+    def create(self) -> Any:
+        return self.load()()
+
+
+class Registry:
+    """Манифест зондов и аналитиков с ленивой загрузкой классов.
+
+    Args:
+        cache_dir: Где хранить манифест; None — ``$PROBE_CACHE_DIR``
+            или ``~/.cache/probe``.
+        plugins: Искать сторонние зонды через entry points.
+    """
+
+    def __init__(self, cache_dir: str | Path | None = None, plugins: bool = True) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.plugins = plugins
+        self._probes: Optional[dict[str, list[Entry]]] = None
+        self._analyzers: list[Entry] = []
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / "registry.json"
+
+    # -- выборка ------------------------------------------------------------
+
+    def envs(self) -> list[str]:
+        """Среды, для которых есть хотя бы один зонд."""
+        return sorted(self._manifest())
+
+    def probe_entries(self, env: str, names: Sequence[str] = ()) -> list[Entry]:
+        """Записи зондов среды (только ``names``, если заданы) — без импорта.
+
+        Raises:
+            KeyError: Для среды нет ни пакета, ни плагинов.
+            LookupError: Среди ``names`` есть неизвестный зонд.
+        """
+        manifest = self._manifest()
+        if env not in manifest:
+            raise KeyError(env)
+        entries = manifest[env]
+        if not names:
+            return list(entries)
+        by_name = {e.name: e for e in entries}
+        missing = [n for n in names if n not in by_name]
+        if missing:
+            raise LookupError(f"Зонды не найдены в среде {env}: {', '.join(missing)}")
+        return [by_name[n] for n in names]
+
+    def probes(self, env: str, names: Sequence[str] = ()) -> list[Any]:
+        """Экземпляры зондов среды; импортируются только их модули."""
+        return [entry.create() for entry in self.probe_entries(env, names)]
+
+    def analyzer_entries(self) -> list[Entry]:
+        self._manifest()
+        return list(self._analyzers)
+
+    def analyzers(self) -> list[Any]:
+        return [entry.create() for entry in self.analyzer_entries()]
+
+    # -- манифест -----------------------------------------------------------
+
+    def _manifest(self) -> dict[str, list[Entry]]:
+        if self._probes is None:
+            stamp = self._stamp()
+            cached = self._read(stamp)
+            if cached is None:
+                cached = self._build()
+                self._write(stamp, *cached)
+            probes, self._analyzers = cached
+            self._probes = {}
+            for entry in probes:
+                self._probes.setdefault(entry.env, []).append(entry)
+        return self._probes
+
+    def _stamp(self) -> list:
+        """Отпечаток источников манифеста: файлы пакетов и entry points."""
+        stamp: list = []
+        for package in _package_dirs():
+            for path in sorted(package.rglob("*.py")):
+                st = path.stat()
+                stamp.append([str(path), st.st_mtime_ns, st.st_size])
+        if self.plugins:
+            for group in (PROBE_GROUP, ANALYZER_GROUP):
+                for ep in metadata.entry_points(group=group):
+                    dist = ep.dist
+                    stamp.append([group, ep.name, ep.value,
+                                  dist.version if dist is not None else ""])
+        return stamp
+
+    def _read(self, stamp: list) -> Optional[tuple[list[Entry], list[Entry]]]:
+        try:
+            data = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != MANIFEST_VERSION or data.get("stamp") != stamp:
+            return None
+        return ([Entry(**e) for e in data["probes"]],
+                [Entry(**e) for e in data["analyzers"]])
+
+    def _write(self, stamp: list, probes: list[Entry], analyzers: list[Entry]) -> None:
+        data = {"version": MANIFEST_VERSION, "stamp": stamp,
+                "probes": [asdict(e) for e in probes],
+                "analyzers": [asdict(e) for e in analyzers]}
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(self.manifest_path)
+        except OSError as exc:
+            logger.debug("Манифест реестра не сохранён: %s", exc)
+
+    def _build(self) -> tuple[list[Entry], list[Entry]]:
+        """Собрать манифест: импортировать пакеты и плагины один раз."""
+        from probe.analyzers.base import BaseAnalyzer
+        from probes.base import BaseProbe
+
+        logger.debug("Сборка манифеста реестра")
+        probes: list[Entry] = []
+        pkg = importlib.import_module(_PROBES_PACKAGE)
+        for env_info in pkgutil.iter_modules(pkg.__path__):
+            if not env_info.ispkg:
+                continue
+            env_pkg = importlib.import_module(f"{_PROBES_PACKAGE}.{env_info.name}")
+            for cls in _classes(env_pkg, BaseProbe):
+                probes.append(_probe_entry(cls, env=env_info.name))
+
+        analyzers: list[Entry] = []
+        pkg = importlib.import_module(_ANALYZERS_PACKAGE)
+        for cls in _classes(pkg, BaseAnalyzer, skip=("base",)):
+            analyzers.append(Entry(name=cls.name, module=cls.__module__, attr=cls.__qualname__))
+
+        if self.plugins:
+            for cls, dist in _plugins(PROBE_GROUP, BaseProbe):
+                probes.append(_probe_entry(cls, dist))
+            for cls, dist in _plugins(ANALYZER_GROUP, BaseAnalyzer):
+                analyzers.append(Entry(name=cls.name, module=cls.__module__,
+                                       attr=cls.__qualname__, source=dist))
+        return probes, analyzers
+
+
+def default_cache_dir() -> Path:
+    """``$PROBE_CACHE_DIR``, иначе ``$XDG_CACHE_HOME/probe`` или ``~/.cache/probe``."""
+    if os.environ.get("PROBE_CACHE_DIR"):
+        return Path(os.environ["PROBE_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "probe"
+
+
+_default: Optional[Registry] = None
+
+
+def default_registry() -> Registry:
+    """Реестр процесса (манифест читается один раз)."""
+    global _default
+    if _default is None:
+        _default = Registry()
+    return _default
+
+
+def _package_dirs() -> list[Path]:
+    """Директории встроенных пакетов — без их импорта."""
+    dirs = []
+    for name in (_PROBES_PACKAGE, _ANALYZERS_PACKAGE):
+        spec = importlib.util.find_spec(name)
+        if spec is not None and spec.submodule_search_locations:
+            dirs.extend(Path(p) for p in spec.submodule_search_locations)
+    return dirs
+
+
+def _classes(pkg: Any, base: type, skip: Sequence[str] = ()) -> list[type]:
+    """Классы-наследники ``base`` с заданным ``name``, определённые в модулях пакета.
+
+    Порядок — как у прежнего автообнаружения: модули по имени, внутри
+    модуля — по имени атрибута.
+    """
+    found: list[type] = []
+    for module_info in pkgutil.iter_modules(pkg.__path__):
+        if module_info.name in skip or module_info.ispkg:
+            continue
+        module = importlib.import_module(f"{pkg.__name__}.{module_info.name}")
+        for attr_name in dir(module):
+            attr = getattr(module, attr_name)
+            if (
+                isinstance(attr, type)
+                and issubclass(attr, base)
+                and attr is not base
+                and attr.name
+                and attr.__module__ == module.__name__
+            ):
+                found.append(attr)
+    return found
+
+
+def _probe_entry(cls: type, source: str = "builtin", env: str = "") -> Entry:
+    """Запись зонда; встроенные зонды относятся к среде своего пакета."""
+    return Entry(name=cls.name, module=cls.__module__, attr=cls.__qualname__,
+                 env=env or cls.env, file_glob=cls.file_glob, source=source)
+
+
+def _plugins(group: str, base: type) -> list[tuple[type, str]]:
+    """Классы из entry points группы; битые плагины пропускаются с ошибкой в логе."""
+    found = []
+    for ep in metadata.entry_points(group=group):
+        dist = ep.dist.name if ep.dist is not None else ep.name
+        try:
+            cls = ep.load()
+        except Exception as exc:
+            logger.error("Плагин %s (%s) не загружен: %s", ep.name, ep.value, exc)
+            continue
+        if not (isinstance(cls, type) and issubclass(cls, base) and cls.name):
+            logger.error("Плагин %s (%s) не является %s", ep.name, ep.value, base.__name__)
+            continue
+        found.append((cls, dist))
+    return found
@@ -1,53 +1,742 @@
-"""Параллельный запуск зондов через ThreadPoolExecutor."""
+"""Параллельный запуск зондов: пул потоков/процессов для sync, event loop для async."""
 
 from __future__ import annotations
 
+import asyncio
+import importlib
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    BrokenExecutor,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-from typing import Sequence
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Sequence, Union
 
-from probe.models import Dossier, Finding
+from probe.dedup import Deduplicator
+from probe.defaults import DEFAULT_MAX_CONCURRENCY, EXECUTORS
+from probe.models import Dossier, Finding, FindingBatch, FindingRecord, materialize
+from probe.shard import shard_of
 from probes.base import BaseProbe
 
 logger = logging.getLogger(__name__)
 
+#: Сколько задач держать в очереди на каждый поток. Ограничивает память:
+#: результаты не накапливаются, если потребитель генератора медленнее зондов.
+_QUEUE_FACTOR = 4
+
+
+@dataclass
+class ScanProgress:
+    """Снимок прогресса сканирования для progress-callback."""
+
+    files_done: int = 0
+    files_total: int = 0
+    bytes_done: int = 0
+    bytes_total: int = 0
+    findings: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Секунд с начала сканирования."""
+        return time.monotonic() - self.started
+
+    @property
+    def findings_per_sec(self) -> float:
+        """Средняя скорость получения findings."""
+        elapsed = self.elapsed
+        return self.findings / elapsed if elapsed > 0 else 0.0
+
+
+@dataclass
+class ScanBatch:
+    """Порция findings: результат одного файла или целого не-пофайлового зонда."""
+
+    #: Порядковый номер файла в отсортированном списке (0 для целых зондов)
+    index: int
+    #: Путь к файлу относительно цели; None — batch целого зонда
+    path: Optional[str]
+    findings: list[Finding]
+
+
+@dataclass
+class ScanJob:
+    """Одна цель скана. Несколько job'ов могут делить общий пул."""
+
+    probes: Sequence[BaseProbe]
+    target: str | Path
+    env: str = ""
+    #: (i, n) — сканировать только i-й из n шардов файлов (см. probe.shard)
+    shard: Optional[tuple[int, int]] = None
+    #: Кэш findings по файлам между сканами (см. FileCache)
+    cache: Optional[FileCache] = None
+    #: Дедупликация findings досье: none, exact или merge (см. probe.dedup)
+    dedup: str = "none"
+
+
+ProgressCallback = Callable[[ScanProgress], None]
+
+#: Элемент вывода зонда: готовый Finding, запись или батч записей
+_Output = Union[Finding, FindingRecord, FindingBatch]
+
+
+class FileCache:
+    """Кэш findings пофайловых зондов между сканами одного процесса.
+
+    Ключ — набор зондов, корень цели, путь, mtime и размер файла:
+    неизменённый файл при повторном скане не парсится вовсе. Нужен
+    долгоживущим процессам (`probe daemon`); обычному скану ни к чему.
+    Потокобезопасен.
+    """
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, list[_Output]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def scan(self, probes: Sequence[BaseProbe], path: Path, base: Path) -> list[Finding]:
+        """scan_one_file() с кэшем."""
+        return materialize(self.records(probes, path, base))
+
+    def records(self, probes: Sequence[BaseProbe], path: Path,
+                base: Path) -> list[_Output]:
+        """Вывод зондов файла как есть (записи, батчи) — из кэша или свежий.
+
+        Кэшируются записи, а не Finding: при каждом скане они получают
+        временную метку этого скана.
+        """
+        try:
+            stat = path.stat()
+        except OSError:
+            return _scan_file(probes, path, base)
+        key = (tuple(p.name for p in probes), str(base), str(path),
+               stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            findings = self._entries.get(key)
+            if findings is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(findings)
+            self.misses += 1
+        findings = _scan_file(probes, path, base)
+        with self._lock:
+            self._entries[key] = findings
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return list(findings)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def collect_files(probes: Sequence[BaseProbe], target: str | Path) -> list[Path]:
+    """Собрать отсортированный список файлов цели, нужных пофайловым зондам."""
+    base = Path(target)
+    files: set[Path] = set()
+    for pattern in {p.file_glob for p in probes if p.file_glob}:
+        files.update(f for f in base.rglob(pattern) if f.is_file())
+    return sorted(files)
+
+
+def is_free_threaded() -> bool:
+    """Интерпретатор работает без GIL (сборки 3.13t/3.14t с выключенным GIL)."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def resolve_executor(kind: str) -> str:
+    """Выбрать backend пула для ``executor="auto"``.
+
+    ``auto`` — всегда потоки. Без GIL они масштабируют CPU-bound парсинг
+    по ядрам без старта процессов и pickling; с GIL остаются прежним
+    поведением по умолчанию. Процессы — только по явному ``process``.
+    """
+    if kind not in EXECUTORS:
+        raise ValueError(f"Неизвестный executor '{kind}', ожидается один из {EXECUTORS}")
+    if kind != "auto":
+        return kind
+    if is_free_threaded():
+        logger.debug("Интерпретатор без GIL: потоки масштабируют парсинг по ядрам")
+    return "thread"
+
+
+def iter_findings(
+    probes: Sequence[BaseProbe],
+    target: str | Path,
+    max_workers: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: str = "auto",
+) -> Iterator[ScanBatch]:
+    """Запустить зонды и отдавать findings порциями по мере готовности.
+
+    Пофайловые зонды (с ``file_glob``) запускаются по файлам: каждый batch —
+    все findings одного файла. Остальные зонды дают по одному batch на зонд.
+    Async-зонды (``scan_async``) выполняются в отдельном event loop под общим
+    семафором ``max_concurrency``, параллельно с пулом.
+    В очереди пула одновременно не больше ``max_workers * 4`` задач,
+    поэтому весь результат в памяти не держится.
+
+    Args:
+        probes: Список зондов для запуска.
+        target: Путь или URL цели.
+        max_workers: Максимальное число воркеров пула.
+        progress: Вызывается после каждого batch со снимком прогресса.
+        max_concurrency: Лимит одновременных I/O-операций всех async-зондов.
+        executor: ``thread``, ``process`` или ``auto`` (см. resolve_executor()).
+
+    Yields:
+        ScanBatch в порядке завершения.
+    """
+    jobs = [ScanJob(probes=probes, target=target)]
+    for _, batch in _execute(jobs, max_workers, progress, max_concurrency, executor):
+        if batch is not None:
+            yield batch
+
+
+def stream_findings(
+    probes: Sequence[BaseProbe],
+    target: str | Path,
+    max_workers: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: str = "auto",
+    shard: Optional[tuple[int, int]] = None,
+    dedup: str = "none",
+) -> Iterator[list[Finding]]:
+    """Findings скана порциями в детерминированном порядке — для потоковой записи.
+
+    Порция файла отдаётся, как только готовы все файлы перед ним: файлы
+    идут по пути, внутри файла — в порядке зондов. Findings целых
+    и async-зондов отдаются последней порцией, в порядке зондов. Досье
+    не собирается: в памяти только порции, обогнавшие очередной файл.
+    Повторы отбрасываются по мере выдачи; в режиме ``merge`` findings
+    отдаются одной порцией в конце. Аргументы — как у run_probes().
+    """
+    rank = {probe.name: i for i, probe in enumerate(probes)}
+    deduplicator = Deduplicator(dedup)
+    jobs = [ScanJob(probes=probes, target=target, shard=shard)]
+    ready: dict[int, list[Finding]] = {}
+    whole: list[Finding] = []
+    next_index = 0
+    for _, batch in _execute(jobs, max_workers, progress, max_concurrency, executor):
+        if batch is None:
+            continue
+        if batch.path is None:
+            whole.extend(batch.findings)
+            continue
+        ready[batch.index] = batch.findings
+        while next_index in ready:
+            findings = deduplicator.feed(ready.pop(next_index))
+            next_index += 1
+            if findings:
+                yield findings
+    whole.sort(key=lambda f: rank.get(f.probe, len(rank)))
+    tail = deduplicator.feed(whole) + deduplicator.flush()
+    if tail:
+        yield tail
+    if deduplicator.dropped:
+        logger.info("Дубликатов отброшено: %d", deduplicator.dropped)
+
 
 def run_probes(
     probes: Sequence[BaseProbe],
     target: str | Path,
     env: str,
     max_workers: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: str = "auto",
+    shard: Optional[tuple[int, int]] = None,
+    dedup: str = "none",
 ) -> Dossier:
     """Запустить зонды параллельно и собрать досье.
 
+    Findings упорядочены детерминированно: по порядку зондов, внутри зонда —
+    по пути файла, внутри файла — в порядке выдачи зондом. В режиме потоков
+    каждый воркер копит findings в собственном буфере, буферы сливаются
+    один раз в конце — общего списка под конкуренцией нет.
+
     Args:
         probes: Список зондов для запуска.
         target: Путь или URL цели.
         env: Тип среды.
-        max_workers: Максимальное число потоков.
+        max_workers: Максимальное число воркеров пула.
+        progress: Progress-callback, см. iter_findings().
+        max_concurrency: Лимит одновременных I/O-операций async-зондов.
+        executor: ``thread``, ``process`` или ``auto`` (см. resolve_executor()).
+        shard: (i, n) — только i-й из n шардов файлов; целые и async-зонды
+            запускаются лишь в шарде 0.
+        dedup: ``none``, ``exact`` — одинаковые факты один раз, ``merge`` —
+            повторы в разных местах сливаются в один факт (см. probe.dedup).
 
     Returns:
         Досье с findings от всех зондов.
     """
-    dossier = Dossier(target=str(target), env=env)
+    jobs = [ScanJob(probes=probes, target=target, env=env, shard=shard, dedup=dedup)]
+    for _, dossier in iter_dossiers(jobs, max_workers, progress, max_concurrency, executor):
+        return dossier
+    raise AssertionError("iter_dossiers не вернул досье")  # pragma: no cover
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(_run_one, probe, target): probe for probe in probes}
 
-        for future in as_completed(futures):
-            probe = futures[future]
-            try:
-                findings: list[Finding] = future.result()
-                dossier.findings.extend(findings)
-                logger.info("[%s] %d findings", probe.name, len(findings))
-            except Exception as exc:
-                logger.error("[%s] ошибка: %s", probe.name, exc)
+def iter_dossiers(
+    jobs: Sequence[ScanJob],
+    max_workers: int = 8,
+    progress: Optional[ProgressCallback] = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    executor: str = "auto",
+    pool: Optional[Executor] = None,
+) -> Iterator[tuple[int, Dossier]]:
+    """Просканировать несколько целей через один общий пул.
+
+    Пул, event loop и прогретые воркеры создаются один раз на все цели;
+    файлы всех целей идут в одну очередь, поэтому время скана определяется
+    суммарным числом файлов, а не числом целей. Досье цели отдаётся, как
+    только завершены все её задачи.
+
+    Готовый ``pool`` (например, тёплый пул `probe daemon`) используется
+    вместо нового и не закрывается; ``executor`` тогда не учитывается.
 
+    Yields:
+        (индекс job, досье) в порядке завершения целей.
+    """
+    buffers = _WorkerBuffers()
+    scanned_at = datetime.now(timezone.utc)
+    parts: dict[int, list[tuple[int, list[Finding]]]] = {i: [] for i in range(len(jobs))}
+    for job_index, batch in _execute(jobs, max_workers, progress, max_concurrency,
+                                     executor, buffers, pool, scanned_at):
+        if batch is not None:
+            if batch.findings:
+                parts[job_index].append((batch.index, batch.findings))
+            continue
+        job = jobs[job_index]
+        found = [*parts.pop(job_index), *buffers.drain(job_index)]
+        yield job_index, assemble_dossier(job, found, scanned_at)
+
+
+def assemble_dossier(job: ScanJob, parts: Iterable[tuple[int, list[Finding]]],
+                     scanned_at: Optional[datetime] = None) -> Dossier:
+    """Собрать досье job'а в детерминированном порядке (зонд, файл).
+
+    ``scanned_at`` — метка скана; findings из записей зондов несут её же.
+    Повторы отбрасываются или сливаются по ``job.dedup``.
+    """
+    dossier = Dossier(target=str(job.target), env=job.env)
+    if scanned_at is not None:
+        dossier.scanned_at = scanned_at
+    rank = {probe.name: i for i, probe in enumerate(job.probes)}
+    keyed = [
+        (rank.get(f.probe, len(rank)), index, f)
+        for index, findings in parts
+        for f in findings
+    ]
+    keyed.sort(key=lambda item: (item[0], item[1]))
+    deduplicator = Deduplicator(job.dedup)
+    dossier.findings.extend(deduplicator.feed(f for _, _, f in keyed))
+    dossier.findings.extend(deduplicator.flush())
+    if deduplicator.dropped:
+        logger.info("Дубликатов отброшено: %d", deduplicator.dropped)
+
+    counts = Counter(f.probe for f in dossier.findings)
+    for probe in job.probes:
+        logger.info("[%s] %d findings", probe.name, counts[probe.name])
     return dossier
 
 
-def _run_one(probe: BaseProbe, target: str | Path) -> list[Finding]:
-    """Запустить один зонд и вернуть его findings."""
+@dataclass
+class _Plan:
+    """Разбор job'а: классы зондов, файлы и число незавершённых задач."""
+
+    async_probes: list[BaseProbe]
+    file_probes: list[BaseProbe]
+    whole_probes: list[BaseProbe]
+    files: list[Path]
+    sizes: list[int]
+
+    @classmethod
+    def of(cls, job: ScanJob) -> _Plan:
+        async_probes = [p for p in job.probes if p.is_async]
+        file_probes = [p for p in job.probes if p.file_glob and not p.is_async]
+        whole_probes = [p for p in job.probes if not p.file_glob and not p.is_async]
+        files = collect_files(file_probes, job.target)
+        if job.shard is not None:
+            index, count = job.shard
+            base = Path(job.target)
+            files = [f for f in files
+                     if shard_of(f.relative_to(base).as_posix(), count) == index]
+            if index != 0:
+                async_probes, whole_probes = [], []
+        return cls(async_probes, file_probes, whole_probes, files,
+                   [_file_size(f) for f in files])
+
+    @property
+    def tasks_total(self) -> int:
+        return len(self.async_probes) + len(self.whole_probes) + len(self.files)
+
+
+def _execute(
+    jobs: Sequence[ScanJob],
+    max_workers: int,
+    progress: Optional[ProgressCallback],
+    max_concurrency: int,
+    executor: str,
+    buffers: Optional[_WorkerBuffers] = None,
+    pool: Optional[Executor] = None,
+    scanned_at: Optional[datetime] = None,
+) -> Iterator[tuple[int, Optional[ScanBatch]]]:
+    """Общий цикл iter_findings/iter_dossiers.
+
+    Отдаёт (индекс job, batch) по мере готовности и (индекс job, None),
+    когда все задачи job'а завершены. С ``buffers`` задачи пула потоков
+    складывают findings в буферы воркеров и возвращают только их число;
+    batch тогда приходит с пустым списком.
+
+    Зонды возвращают записи и батчи (FindingRecord, FindingBatch) —
+    в Finding они превращаются здесь, в родительском процессе, с одной
+    меткой ``scanned_at`` на весь скан: между процессами идут компактные
+    кортежи, а часы читаются один раз.
+    """
+    if scanned_at is None:
+        scanned_at = datetime.now(timezone.utc)
+    plans = [_Plan.of(job) for job in jobs]
+    remaining = [plan.tasks_total for plan in plans]
+    files_total = sum(len(plan.files) for plan in plans)
+    async_total = sum(len(plan.async_probes) for plan in plans)
+
+    own_pool = pool is None
+    if own_pool:
+        kind = resolve_executor(executor)
+    else:
+        kind = "thread" if isinstance(pool, ThreadPoolExecutor) else "process"
+    if kind != "thread":
+        buffers = None
+    logger.debug("Executor: %s, воркеров: %d, файлов: %d", kind, max_workers, files_total)
+
+    state = ScanProgress(files_total=files_total,
+                         bytes_total=sum(sum(plan.sizes) for plan in plans))
+    tasks = _tasks(jobs, plans, buffers, scanned_at)
+
+    for job_index, left in enumerate(remaining):
+        if not left:
+            yield job_index, None
+
+    limit = max_workers * _QUEUE_FACTOR + async_total
+    lane = _AsyncLane(max_concurrency) if async_total else None
+    make_pool = partial(_make_pool, kind, max_workers,
+                        _warm_modules(p for j in jobs for p in j.probes))
+    if own_pool:
+        pool = make_pool()
+    pending: dict[Future, _Task] = {}
+    try:
+        for job_index, (job, plan) in enumerate(zip(jobs, plans)):
+            for probe in plan.async_probes:
+                task = _Task(None, job_index, 0, None, 0, probe.name)
+                pending[lane.submit(probe, job.target)] = task
+        _fill(pool, tasks, pending, limit)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = pending.get(future)
+                if task is None:  # переотправлена при замене сломанного пула
+                    continue
+                job_index, index, rel_path, size = task.job, task.index, task.path, task.size
+                try:
+                    result = future.result()
+                except BrokenExecutor as exc:
+                    pool = _replace_broken_pool(pool, own_pool, make_pool, exc, pending)
+                    own_pool = True
+                    continue
+                except Exception as exc:
+                    logger.error("[%s] ошибка: %s", task.label, exc)
+                    result = []
+                del pending[future]
+                findings = [] if isinstance(result, int) else materialize(result, scanned_at)
+                if rel_path is not None:
+                    state.files_done += 1
+                    state.bytes_done += size
+                state.findings += result if isinstance(result, int) else len(findings)
+                if progress is not None:
+                    progress(state)
+                yield job_index, ScanBatch(index=index, path=rel_path, findings=findings)
+                remaining[job_index] -= 1
+                if not remaining[job_index]:
+                    yield job_index, None
+            try:
+                _fill(pool, tasks, pending, limit)
+            except BrokenExecutor as exc:
+                pool = _replace_broken_pool(pool, own_pool, make_pool, exc, pending)
+                own_pool = True
+                _fill(pool, tasks, pending, limit)
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        if lane is not None:
+            lane.close()
+
+
+def _replace_broken_pool(
+    pool: Executor,
+    own_pool: bool,
+    make_pool: Callable[[], Executor],
+    exc: BaseException,
+    pending: dict[Future, _Task],
+) -> Executor:
+    """Заменить сломанный пул (упал процесс-воркер) новым пулом того же вида.
+
+    Упавшей считается самая ранняя задача, завершённая поломкой пула: пул
+    раздаёт задачи по порядку, и она уже выполнялась. Она не повторяется —
+    иначе снова уронит воркер — и приходит в основной цикл как ошибка.
+    Остальные незавершённые задачи отправляются в новый пул; готовые
+    результаты и задачи async-зондов остаются как есть. Пул вызывающего
+    (``own_pool`` ложно) не закрывается.
+    """
+    logger.error("Пул воркеров сломан (%s), оставшиеся задачи — в новом пуле", exc)
+    if own_pool:
+        pool.shutdown(wait=False, cancel_futures=True)
+    crashed: Optional[_Task] = None
+    retry: list[_Task] = []
+    for future, task in list(pending.items()):
+        settled = future.done() and not future.cancelled()
+        broken = settled and isinstance(future.exception(), BrokenExecutor)
+        if task.fn is None or (settled and not broken):
+            continue
+        del pending[future]
+        if crashed is None and broken:
+            crashed = task
+        else:
+            retry.append(task)
+    replacement = make_pool()
+    for task in retry:
+        pending[replacement.submit(task.fn)] = task
+    if crashed is not None:
+        failed: Future = Future()
+        failed.set_exception(RuntimeError(f"воркер упал на этой задаче: {exc}"))
+        pending[failed] = crashed
+    return replacement
+
+
+def _make_pool(kind: str, max_workers: int, modules: tuple[str, ...] = ()) -> Executor:
+    """Создать пул; воркеры-процессы один раз импортируют зонды."""
+    if kind == "process":
+        return ProcessPoolExecutor(
+            max_workers=max_workers, initializer=_warm_worker,
+            initargs=(tuple(sys.path), modules),
+        )
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def _warm_modules(probes: Iterable[BaseProbe]) -> tuple[str, ...]:
+    """Модули, которые воркер импортирует заранее: парсер и модули зондов."""
+    modules = ["javalang"]
+    for probe in probes:
+        module = type(probe).__module__
+        if module not in modules:
+            modules.append(module)
+    return tuple(modules)
+
+
+def _warm_worker(path: tuple[str, ...], modules: tuple[str, ...]) -> None:
+    """Initializer воркера: тот же sys.path и однократный импорт зондов."""
+    sys.path[:] = list(path)
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as exc:
+            logger.debug("Воркер: модуль %s не прогрет: %s", module, exc)
+
+
+class _WorkerBuffers:
+    """Буферы findings, по одному на поток-воркер.
+
+    Воркер пишет только в свой буфер; блокировка берётся один раз —
+    при регистрации буфера нового потока.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buffers: list[dict[int, list[tuple[int, list[Finding]]]]] = []
+
+    def run(self, job: int, index: int, fn: Callable[[], list[_Output]],
+            scanned_at: Optional[datetime] = None) -> int:
+        findings = materialize(fn(), scanned_at)
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = {}
+            with self._lock:
+                self._buffers.append(buffer)
+        buffer.setdefault(job, []).append((index, findings))
+        return len(findings)
+
+    def drain(self, job: int) -> Iterator[tuple[int, list[Finding]]]:
+        """Забрать findings завершённого job'а из всех буферов."""
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            yield from buffer.pop(job, ())
+
+
+class _AsyncLane:
+    """Event loop в фоновом потоке для async-зондов.
+
+    Корутины отдаются как concurrent.futures.Future и ждутся вместе с
+    задачами пула потоков.
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._limiter = asyncio.Semaphore(max_concurrency)
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="probe-async", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, probe: BaseProbe, target: str | Path) -> Future:
+        return asyncio.run_coroutine_threadsafe(
+            _run_one_async(probe, target, self._limiter), self._loop
+        )
+
+    def close(self) -> None:
+        """Отменить незавершённые корутины и остановить loop."""
+        asyncio.run_coroutine_threadsafe(self._drain(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    @staticmethod
+    async def _drain() -> None:
+        current = asyncio.current_task()
+        tasks = [t for t in asyncio.all_tasks() if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class _Task(NamedTuple):
+    """Задача пула и её метаданные для batch'а и логов."""
+
+    fn: Optional[Callable[[], object]]
+    job: int
+    index: int
+    #: Путь файла относительно цели; None — задача целого или async-зонда
+    path: Optional[str]
+    size: int
+    #: Что писать в лог при ошибке: имя зонда или путь файла
+    label: str
+
+
+def _tasks(jobs: Sequence[ScanJob], plans: Sequence[_Plan],
+           buffers: Optional[_WorkerBuffers] = None,
+           scanned_at: Optional[datetime] = None) -> Iterator[_Task]:
+    """Ленивый поток задач пула по всем job'ам."""
+    for job_index, (job, plan) in enumerate(zip(jobs, plans)):
+        base = Path(job.target)
+        scan_file = job.cache.records if job.cache is not None else _scan_file
+        for probe in plan.whole_probes:
+            fn = partial(_run_one, probe, job.target)
+            yield _Task(_wrap(fn, job_index, 0, buffers, scanned_at), job_index, 0, None, 0, probe.name)
+        for i, path in enumerate(plan.files):
+            rel_path = path.relative_to(base).as_posix()
+            fn = partial(scan_file, plan.file_probes, path, base)
+            yield _Task(_wrap(fn, job_index, i, buffers, scanned_at), job_index, i,
+                        rel_path, plan.sizes[i], rel_path)
+
+
+def _wrap(fn: Callable[[], list[_Output]], job: int, index: int,
+          buffers: Optional[_WorkerBuffers], scanned_at: datetime) -> Callable[[], object]:
+    return fn if buffers is None else partial(buffers.run, job, index, fn, scanned_at)
+
+
+def _fill(executor, tasks, pending: dict, limit: int) -> None:
+    """Досабмитить задачи в executor, пока в работе меньше limit.
+
+    Если пул сломан, задача остаётся в ``pending`` с незавершённым future —
+    _replace_broken_pool() отправит её в новый пул.
+    """
+    while len(pending) < limit:
+        task = next(tasks, None)
+        if task is None:
+            return
+        try:
+            future = executor.submit(task.fn)
+        except BrokenExecutor:
+            pending[Future()] = task
+            raise
+        pending[future] = task
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _run_one(probe: BaseProbe, target: str | Path) -> list[_Output]:
+    """Запустить один зонд и вернуть его вывод (Finding, записи, батчи)."""
     logger.debug("Запуск зонда %s на %s", probe.name, target)
-    return probe.scan(target)
+    try:
+        return _collect([], probe.scan(target))
+    except Exception as exc:
+        logger.error("[%s] ошибка: %s", probe.name, exc)
+        return []
+
+
+async def _run_one_async(
+    probe: BaseProbe, target: str | Path, limiter: asyncio.Semaphore
+) -> list[_Output]:
+    """Запустить один async-зонд в event loop."""
+    logger.debug("Запуск async-зонда %s на %s", probe.name, target)
+    try:
+        return _collect([], await probe.scan_async(target, limiter))
+    except Exception as exc:
+        logger.error("[%s] ошибка: %s", probe.name, exc)
+        return []
+
+
+def scan_one_file(probes: Sequence[BaseProbe], path: Path, base: Path) -> list[Finding]:
+    """Запустить пофайловые зонды на одном файле, findings — в порядке зондов.
+
+    Записи и батчи зондов становятся Finding без валидации,
+    с одной временной меткой на файл.
+    """
+    return materialize(_scan_file(probes, path, base))
+
+
+def _scan_file(probes: Sequence[BaseProbe], path: Path, base: Path) -> list[_Output]:
+    """Вывод пофайловых зондов на одном файле как есть, в порядке зондов."""
+    output: list[_Output] = []
+    for probe in probes:
+        if not path.match(probe.file_glob):
+            continue
+        try:
+            _collect(output, probe.scan_file(path, base))
+        except Exception as exc:
+            logger.error("[%s] %s: ошибка: %s", probe.name, path, exc)
+    return output
+
+
+def _collect(output: list[_Output], result: Iterable[_Output] | FindingBatch) -> list[_Output]:
+    """Добавить вывод зонда; батч остаётся батчем, а не разворачивается в записи."""
+    if isinstance(result, FindingBatch):
+        output.append(result)
+    else:
+        output.extend(result)
+    return output
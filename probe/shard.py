@@ -0,0 +1,82 @@
+"""Шардирование скана между машинами и слияние результатов шардов.
+
+Файл попадает в шард по стабильному хэшу относительного пути, поэтому
+любая машина с той же целью независимо считает свою долю файлов —
+без координатора и общего состояния. Целые и async-зонды запускаются
+только в шарде 0, чтобы не повторять их на каждой машине.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import zlib
+from typing import Iterable, Iterator, Sequence
+
+from probe.models import Finding
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Разобрать ``"i/n"`` в (номер шарда, число шардов), 0 <= i < n.
+
+    Raises:
+        ValueError: Неверный формат или номер вне диапазона.
+    """
+    index, sep, count = spec.partition("/")
+    if not sep or not index.strip().isdigit() or not count.strip().isdigit():
+        raise ValueError(f"Шард задаётся как i/n, получено '{spec}'")
+    i, n = int(index), int(count)
+    if n < 1 or i >= n:
+        raise ValueError(f"Номер шарда должен быть в [0, {n}), получено '{spec}'")
+    return i, n
+
+
+def shard_of(rel_path: str, count: int) -> int:
+    """Шард файла по CRC32 его относительного POSIX-пути."""
+    return zlib.crc32(rel_path.encode("utf-8")) % count
+
+
+def merge_findings(
+    sources: Sequence[Iterable[Finding]],
+    probe_order: Sequence[str] = (),
+) -> Iterator[Finding]:
+    """K-way слияние findings шардов в порядке обычного досье с дедупликацией.
+
+    Каждый источник упорядочен как досье run_probes(): по зонду, внутри
+    зонда — по пути файла. Слияние сохраняет этот порядок, поэтому результат
+    совпадает со сканом без шардов. Одинаковые findings (без учёта ``ts``)
+    из разных шардов отдаются один раз; в памяти держатся только ключи
+    текущего файла.
+
+    Args:
+        sources: Findings каждого шарда в порядке его досье.
+        probe_order: Порядок зондов; неизвестные зонды идут следом по имени.
+    """
+    rank = {name: i for i, name in enumerate(probe_order)}
+
+    def key(f: Finding) -> tuple:
+        return rank.get(f.probe, len(rank)), f.probe, _path_key(f)
+
+    current: tuple | None = None
+    seen: set[tuple] = set()
+    for f in heapq.merge(*sources, key=key):
+        group = key(f)
+        if group != current:
+            current, seen = group, set()
+        identity = _identity(f)
+        if identity in seen:
+            continue
+        seen.add(identity)
+        yield f
+
+
+def _path_key(f: Finding) -> tuple[str, ...]:
+    """Путь файла finding'а как кортеж частей — в том же порядке,
+    в каком runner сортирует файлы (как Path)."""
+    path = f.location_file
+    return tuple(path.split("/")) if path else ()
+
+
+def _identity(f: Finding) -> tuple:
+    return (f.probe, f.env, f.entity, f.fact, f.location, f.confidence,
+            tuple(f.tags), json.dumps(f.data, sort_keys=True, default=str))
@@ -0,0 +1,714 @@
+"""Хранение результатов PROBE: запись и чтение findings, результаты аналитиков.
+
+Findings хранятся в одном из трёх форматов:
+
+- ``json`` — ``<env>_findings.json``, массив с отступами (читается глазами);
+- ``jsonl`` — ``<env>_findings.jsonl``, по компактному finding на строку.
+  Пишется потоком, пока идёт скан, без списка всех findings в памяти,
+  и примерно на 40% меньше;
+- ``binary`` — ``<env>_findings.probe``, колоночный контейнер с индексом
+  блоков по fact и зонду, читается через mmap (probe.binary).
+
+JSON и JSONL можно сжать gzip или xz (``.json.gz``, ``.jsonl.xz``):
+сжатие идёт потоком при записи, распаковка — потоком при чтении,
+без распакованной копии на диске.
+
+Читатели принимают все форматы: формат и сжатие файла определяются по суффиксам.
+Явно указанный файл может быть и хранилищем SQLite ``probe scan --store``
+(probe.store) — оно узнаётся по заголовку.
+Читает всё iter_finding_batches(): потоком, порциями, с фильтрами
+по fact, probe и confidence до валидации; валидация — порцией через
+TypeAdapter, разбор файлов — при необходимости в нескольких процессах.
+"""
+
+from __future__ import annotations
+
+import gc
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import groupby, islice
+from pathlib import Path
+from types import TracebackType
+from typing import (TYPE_CHECKING, Any, BinaryIO, Iterable, Iterator, NamedTuple, Optional,
+                    TextIO)
+
+from pydantic import TypeAdapter
+from pydantic_core import from_json
+
+from probe.defaults import FINDINGS_FORMATS, JSONL_MIN_FILES
+from probe.models import AnalysisResult, Dossier, Finding, _finding
+
+if TYPE_CHECKING:
+    from probe.index import Criterion
+
+#: Суффиксы файлов findings по форматам
+SUFFIXES = {"json": ".json", "jsonl": ".jsonl", "binary": ".probe"}
+#: Суффиксы сжатых файлов findings (только json и jsonl)
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "xz": ".xz"}
+#: Уровень gzip: 6 почти не уступает 9 по размеру и заметно быстрее
+_GZIP_LEVEL = 6
+#: Суффикс файла контрольной суммы рядом с файлом findings
+CHECKSUM_SUFFIX = ".sha256"
+#: Findings в одной порции iter_finding_batches()
+LOAD_BATCH_SIZE = 10_000
+#: Байт JSONL на кусок параллельной загрузки
+LOAD_SPLIT_SIZE = 32 << 20
+#: Символов, читаемых из JSON-файла за раз
+_READ_CHUNK = 1 << 20
+
+#: Валидация порции записей одним вызовом pydantic-core
+_FINDINGS = TypeAdapter(list[Finding])
+
+
+def resolve_format(fmt: str, files: int) -> str:
+    """Формат для ``auto``: jsonl, если у скана не меньше JSONL_MIN_FILES файлов."""
+    if fmt not in FINDINGS_FORMATS:
+        raise ValueError(f"Неизвестный формат '{fmt}', ожидается один из {FINDINGS_FORMATS}")
+    if fmt != "auto":
+        return fmt
+    return "jsonl" if files >= JSONL_MIN_FILES else "json"
+
+
+def findings_path(out: str | Path, env: str, fmt: str = "json",
+                  compress: Optional[str] = None) -> Path:
+    """Путь файла findings среды ``env`` в директории ``out``."""
+    return Path(out) / f"{env}_findings{_suffix(fmt, compress)}"
+
+
+def _suffix(fmt: str, compress: Optional[str]) -> str:
+    return SUFFIXES[fmt] + (COMPRESSION_SUFFIXES[compress] if compress else "")
+
+
+def file_format(path: str | Path) -> Optional[tuple[str, Optional[str]]]:
+    """Формат и сжатие файла findings по суффиксам: ``("jsonl", "gzip")``.
+
+    None — не файл findings (в том числе сжатый ``.probe``: контейнер
+    читается через mmap и сжатым не бывает).
+    """
+    name = Path(path).name
+    compress = None
+    for method, suffix in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            compress, name = method, name[:-len(suffix)]
+            break
+    for fmt, suffix in SUFFIXES.items():
+        if name.endswith(suffix):
+            return None if compress and fmt == "binary" else (fmt, compress)
+    return None
+
+
+def _open_text(path: Path, compress: Optional[str], mode: str) -> TextIO:
+    """Открыть файл findings в текстовом режиме, (рас)паковывая потоком."""
+    if compress == "gzip":
+        return gzip.open(path, mode + "t", compresslevel=_GZIP_LEVEL, encoding="utf-8")
+    if compress == "xz":
+        return lzma.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class FindingsWriter:
+    """Потоковая запись findings в файл формата ``json`` или ``jsonl``.
+
+    Findings пишутся во временный ``<файл>.part`` и переименовываются
+    в ``path`` при close(): прерванный скан не оставляет обрезанного файла.
+    Рядом пишется контрольная сумма ``<файл>.sha256`` (формат sha256sum):
+    по ней доверенная загрузка (``trusted``) узнаёт неизменённый файл PROBE.
+    Файл findings той же среды в другом формате удаляется, чтобы
+    директорию не прочитали дважды. ``compress`` (``gzip`` или ``xz``)
+    сжимает файл по мере записи.
+    """
+
+    def __init__(self, path: str | Path, fmt: str = "json",
+                 compress: Optional[str] = None) -> None:
+        if fmt not in ("json", "jsonl"):
+            raise ValueError(f"Формат '{fmt}' не пишется потоком, ожидается json или jsonl")
+        if compress is not None and compress not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Неизвестное сжатие '{compress}', ожидается gzip или xz")
+        self.path = Path(path)
+        self.fmt = fmt
+        self.count = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._part = self.path.with_name(self.path.name + ".part")
+        self._sink = _HashingWriter(open(self._part, "wb"))
+        self._file = _text_writer(self._sink, compress)
+
+    def write(self, findings: Iterable[Finding]) -> None:
+        """Дописать findings в файл."""
+        if self.fmt == "jsonl":
+            for f in findings:
+                self._file.write(f.model_dump_json() + "\n")
+                self.count += 1
+            return
+        for f in findings:
+            text = json.dumps(f.model_dump(mode="json"), ensure_ascii=False, indent=2)
+            self._file.write(("[\n  " if not self.count else ",\n  ")
+                             + text.replace("\n", "\n  "))
+            self.count += 1
+
+    def close(self) -> Path:
+        """Завершить файл и переименовать его в ``path``."""
+        if self._file.closed:
+            return self.path
+        if self.fmt == "json":
+            self._file.write("\n]" if self.count else "[]")
+        self._file.close()
+        self._sink.close()
+        checksum = checksum_path(self.path)
+        checksum.unlink(missing_ok=True)
+        os.replace(self._part, self.path)
+        checksum.write_text(f"{self._sink.hexdigest()}  {self.path.name}\n", encoding="utf-8")
+        _drop_other_formats(self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Бросить запись: временный файл удаляется, ``path`` не меняется."""
+        self._file.close()
+        self._sink.close()
+        self._part.unlink(missing_ok=True)
+
+    def __enter__(self) -> FindingsWriter:
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException], tb: Optional[TracebackType]) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_findings(dossier: Dossier, out: str | Path, fmt: str = "json",
+                   compress: Optional[str] = None) -> Path:
+    """Сохранить findings досье в ``<out>/<env>_findings.json`` (``.jsonl``, ``.probe``).
+
+    ``compress`` — ``gzip`` или ``xz`` для json и jsonl (``.json.gz``, ``.jsonl.xz``).
+    """
+    if fmt == "binary" and compress:
+        raise ValueError("Контейнер .probe не сжимается: он читается через mmap")
+    path = findings_path(out, dossier.env, fmt, compress)
+    if fmt == "binary":
+        from probe.binary import write_binary
+
+        write_binary(dossier, path)
+        checksum_path(path).unlink(missing_ok=True)
+        _drop_other_formats(path)
+        return path
+    with FindingsWriter(path, fmt, compress) as writer:
+        writer.write(dossier.findings)
+    return writer.path
+
+
+def _drop_other_formats(path: Path) -> None:
+    """Удалить файл findings той же среды в других форматах и сжатиях."""
+    fmt, compress = file_format(path) or ("json", None)
+    stem = path.name[:-len(_suffix(fmt, compress))]
+    for other_fmt in SUFFIXES:
+        for other in (None, *COMPRESSION_SUFFIXES):
+            if (other_fmt, other) != (fmt, compress) and file_format(_suffix(other_fmt, other)):
+                sibling = path.with_name(stem + _suffix(other_fmt, other))
+                sibling.unlink(missing_ok=True)
+                checksum_path(sibling).unlink(missing_ok=True)
+
+
+def checksum_path(path: Path) -> Path:
+    """Файл контрольной суммы findings: ``<файл>.sha256``."""
+    return path.with_name(path.name + CHECKSUM_SUFFIX)
+
+
+def verify_checksum(path: Path) -> bool:
+    """Записан ли файл PROBE и не изменён ли с тех пор (``<файл>.sha256`` совпадает)."""
+    try:
+        digest, _, name = checksum_path(path).read_text(encoding="utf-8").strip().partition("  ")
+    except OSError:
+        return False
+    return name == path.name and digest == _digest(path)
+
+
+def _digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(_READ_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _HashingWriter(io.RawIOBase):
+    """Бинарный файл, который считает sha256 записанных байт: контрольная
+    сумма готова к close() без повторного чтения файла."""
+
+    def __init__(self, fh: BinaryIO) -> None:
+        self._fh = fh
+        self._sha256 = hashlib.sha256()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        self._fh.write(data)
+        self._sha256.update(data)
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fh.close()
+        super().close()
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+def _text_writer(sink: _HashingWriter, compress: Optional[str]) -> TextIO:
+    """Текстовый поток поверх ``sink``, со сжатием ``compress``.
+
+    GzipFile и LZMAFile не закрывают чужой файл: ``sink`` закрывает вызывающий.
+    """
+    if compress == "gzip":
+        binary: Any = gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=_GZIP_LEVEL)
+    elif compress == "xz":
+        binary = lzma.LZMAFile(sink, "wb")
+    else:
+        binary = io.BufferedWriter(sink)
+    return io.TextIOWrapper(binary, encoding="utf-8")
+
+
+def write_analysis(name: str, result: AnalysisResult, out: str | Path) -> Path:
+    """Сохранить результат аналитика ``name`` в ``<out>/<name>.json``."""
+    out_dir = Path(out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_file = out_dir / f"{name}.json"
+    out_file.write_text(
+        json.dumps(result.model_dump(mode="json"), ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    return out_file
+
+
+def finding_files(path: str | Path) -> list[Path]:
+    """Файлы findings: сам файл или ``*.json``, ``*.jsonl``, ``*.probe`` директории.
+
+    Сжатые ``*.json.gz``, ``*.jsonl.xz`` и т.п. — тоже.
+    """
+    p = Path(path)
+    if p.is_dir():
+        return sorted(f for f in p.iterdir() if file_format(f) and f.is_file())
+    return [p] if p.is_file() else []
+
+
+def read_findings(path: str | Path, fact: Criterion = None, probe: Criterion = None,
+                  min_confidence: Optional[float] = None, workers: Optional[int] = 1,
+                  trusted: bool = False) -> list[Finding]:
+    """Прочитать findings из файла (JSON, JSONL, сжатых, .probe, SQLite) или директории.
+
+    Единственный загрузчик findings: на нём построены
+    correlator.load_findings() и analyzers.base.load_findings().
+    Несуществующий путь — пустой список. Фильтры, ``workers``
+    и ``trusted`` — как у iter_finding_batches().
+    """
+    return [f for batch in iter_finding_batches(path, fact=fact, probe=probe,
+                                                min_confidence=min_confidence,
+                                                workers=workers, trusted=trusted)
+            for f in batch]
+
+
+def iter_finding_batches(path: str | Path, batch_size: int = LOAD_BATCH_SIZE,
+                         fact: Criterion = None, probe: Criterion = None,
+                         min_confidence: Optional[float] = None, workers: Optional[int] = 1,
+                         trusted: bool = False) -> Iterator[list[Finding]]:
+    """Findings файла или директории порциями до ``batch_size``, потоком.
+
+    JSONL читается по строкам, JSON-массив — по элементам (без загрузки
+    файла целиком), так что в памяти одновременно только порция findings
+    и буфер чтения; сжатые файлы распаковываются тем же потоком.
+    Из хранилища SQLite (probe.store) findings выбираются запросом,
+    фильтры — в его WHERE. Из контейнера ``.probe`` читаются только блоки
+    с нужными fact и probe. Фильтры применяются к сырым записям до валидации:
+    отброшенные записи в Finding не превращаются. ``fact`` и ``probe`` —
+    строка или набор строк (подходит любая); строки JSONL, в которых нет
+    ни одной из этих строк, не разбираются вовсе.
+
+    Записи валидируются порцией через ``TypeAdapter(list[Finding])``;
+    строки JSONL без фильтров — прямо из JSON, без промежуточных dict.
+    С ``workers`` > 1 файлы JSON/JSONL (и большие несжатые JSONL — кусками
+    по LOAD_SPLIT_SIZE байт, по границам строк) разбираются в процессах
+    параллельно, порядок findings тот же; ``None`` — по числу CPU.
+    С ``trusted`` файлы, которые записал FindingsWriter и чья контрольная
+    сумма ``<файл>.sha256`` совпала, читаются без валидации; остальные
+    валидируются как обычно.
+
+    Raises:
+        ValueError: Файл не JSON/JSONL (json.JSONDecodeError) или запись
+            не является корректным Finding (pydantic.ValidationError).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    facts, probes = _values(fact), _values(probe)
+    rows = _RowFilter(facts, probes, min_confidence,
+                      tuple(n for n in (_needles(facts), _needles(probes)) if n))
+    sources: list[Any] = []
+    for findings_file in finding_files(path):
+        known = file_format(findings_file)
+        if known is None and _is_store(findings_file):
+            sources.append(_store_batches(findings_file, batch_size, facts, probes,
+                                          min_confidence))
+            continue
+        # Файл, переданный явно, читается как JSON, если суффикс не узнан
+        fmt, compress = known or ("json", None)
+        if fmt == "binary":
+            sources.append(_binary_batches(findings_file, facts, probes, min_confidence))
+            continue
+        sources.extend(_pieces(findings_file, fmt, compress,
+                               trusted and verify_checksum(findings_file), workers))
+    yield from _rebatch(_load(sources, rows, batch_size, workers), batch_size)
+
+
+class _Piece(NamedTuple):
+    """Файл JSON/JSONL или кусок JSONL ``[start, end)`` — единица параллельной загрузки.
+
+    Строке принадлежит кусок, в котором лежит её первый байт.
+    """
+
+    path: Path
+    fmt: str
+    compress: Optional[str]
+    trusted: bool
+    start: int = 0
+    end: Optional[int] = None
+
+
+class _RowFilter(NamedTuple):
+    """Фильтры iter_finding_batches() для сырых записей (передаются в процессы)."""
+
+    facts: Optional[frozenset[str]]
+    probes: Optional[frozenset[str]]
+    min_confidence: Optional[float]
+    needles: tuple[tuple[bytes, ...], ...]
+
+    @property
+    def empty(self) -> bool:
+        return self.facts is None and self.probes is None and self.min_confidence is None
+
+    def select(self, rows: Iterable[dict]) -> Iterator[dict]:
+        if self.empty:
+            yield from rows
+            return
+        facts, probes, min_confidence = self.facts, self.probes, self.min_confidence
+        for row in rows:
+            if facts is not None and row.get("fact") not in facts:
+                continue
+            if probes is not None and row.get("probe") not in probes:
+                continue
+            if min_confidence is not None and row.get("confidence", 1.0) < min_confidence:
+                continue
+            yield row
+
+
+def _pieces(path: Path, fmt: str, compress: Optional[str], trusted: bool,
+            workers: int) -> list[_Piece]:
+    """Разбить файл на куски для параллельной загрузки (только несжатый JSONL)."""
+    if workers <= 1 or fmt != "jsonl" or compress:
+        return [_Piece(path, fmt, compress, trusted)]
+    size = path.stat().st_size
+    bounds = range(0, size, LOAD_SPLIT_SIZE)
+    return [_Piece(path, fmt, compress, trusted, start, min(start + LOAD_SPLIT_SIZE, size))
+            for start in bounds] or [_Piece(path, fmt, compress, trusted)]
+
+
+def _load(sources: list[Any], rows: _RowFilter, batch_size: int,
+          workers: int) -> Iterator[list[Finding]]:
+    """Findings источников по порядку; подряд идущие куски — в пуле процессов."""
+    for is_piece, group in groupby(sources, key=lambda source: isinstance(source, _Piece)):
+        if not is_piece:
+            for source in group:
+                yield from source
+            continue
+        pieces = list(group)
+        if workers <= 1 or len(pieces) == 1:
+            for piece in pieces:
+                yield from _piece_batches(piece, rows, batch_size)
+            continue
+        # В работе не больше workers кусков: если потребитель медленнее
+        # процессов, разобранные куски не копятся в родителе
+        queue = iter(pieces)
+        with ProcessPoolExecutor(max_workers=min(workers, len(pieces))) as pool:
+            pending = deque(pool.submit(_load_piece, piece, rows, batch_size)
+                            for piece in islice(queue, workers))
+            while pending:
+                batches = pending.popleft().result()
+                for piece in islice(queue, 1):
+                    pending.append(pool.submit(_load_piece, piece, rows, batch_size))
+                for i, data in enumerate(batches):
+                    batches[i] = b""  # разобранная порция больше не держится
+                    with _gc_paused():
+                        found = [_finding(*fields) for fields in pickle.loads(data)]
+                    yield found
+
+
+def _load_piece(piece: _Piece, rows: _RowFilter, batch_size: int) -> list[bytes]:
+    """Воркер: порции по ``batch_size`` — pickle кортежей полей _finding(),
+    они передаются дешевле моделей.
+
+    Повторяющиеся probe, env, fact и ts сводятся к одному объекту: pickle
+    пишет его один раз на порцию, а не на каждый finding (ts — самое
+    дорогое поле). Результат — уже байты: родитель разбирает их по порции
+    при выключенном сборщике, а не в служебном потоке пула.
+    """
+    batches = []
+    for found in _piece_batches(piece, rows, batch_size):
+        shared: dict[Any, Any] = {}
+        same = shared.setdefault
+        with _gc_paused():
+            fields = [(same(f.probe, f.probe), same(f.env, f.env), f.entity,
+                       same(f.fact, f.fact), f.data, f.location, f.confidence, f.tags,
+                       same(f.ts, f.ts)) for f in found]
+            batches.append(pickle.dumps(fields, protocol=pickle.HIGHEST_PROTOCOL))
+    return batches
+
+
+def _piece_batches(piece: _Piece, rows: _RowFilter,
+                   batch_size: int) -> Iterator[list[Finding]]:
+    """Findings файла или куска порциями: валидация порцией или доверенная сборка."""
+    build = _TrustedRows().findings if piece.trusted else _FINDINGS.validate_python
+    if piece.fmt != "jsonl":
+        with _open_text(piece.path, piece.compress, "r") as fh:
+            selected = rows.select(_json_rows(fh))
+            while True:
+                with _gc_paused():
+                    chunk = list(islice(selected, batch_size))
+                    found = build(chunk) if chunk else None
+                if found is None:
+                    return
+                yield found
+    with _open_binary(piece.path, piece.compress) as fh:
+        lines = _jsonl_lines(_piece_lines(fh, piece), rows.needles)
+        while True:
+            with _gc_paused():
+                chunk = list(islice(lines, batch_size))
+                if not chunk:
+                    return
+                # Строки порции склеиваются в JSON-массив и разбираются одним
+                # вызовом pydantic-core; без фильтров — сразу валидируются из JSON
+                text = b"[" + b",".join(chunk) + b"]"
+                if rows.empty and not piece.trusted:
+                    found = _FINDINGS.validate_json(text)
+                else:
+                    found = build(list(rows.select(from_json(text))))
+            yield found
+
+
+def _open_binary(path: Path, compress: Optional[str]) -> BinaryIO:
+    if compress == "gzip":
+        return gzip.open(path, "rb")
+    if compress == "xz":
+        return lzma.open(path, "rb")
+    return open(path, "rb")
+
+
+def _piece_lines(fh: BinaryIO, piece: _Piece) -> Iterator[bytes]:
+    """Строки куска: с первой строки, начатой не раньше ``start``, до ``end``."""
+    if piece.end is None:
+        yield from fh
+        return
+    if piece.start:
+        fh.seek(piece.start - 1)
+        fh.readline()
+    end = piece.end
+    while fh.tell() < end:
+        line = fh.readline()
+        if not line:
+            return
+        yield line
+
+
+class _TrustedRows:
+    """Finding из записей доверенного файла без валидации (models._finding)."""
+
+    __slots__ = ("stamps",)
+
+    def __init__(self) -> None:
+        self.stamps: dict[str, datetime] = {}
+
+    def findings(self, rows: list[dict]) -> list[Finding]:
+        stamps = self.stamps
+        found = []
+        for row in rows:
+            ts = row["ts"]
+            when = stamps.get(ts)
+            if when is None:
+                when = stamps[ts] = datetime.fromisoformat(ts)
+            found.append(_finding(row["probe"], row["env"], row["entity"], row["fact"],
+                                  row["data"], row.get("location"), row.get("confidence", 1.0),
+                                  row.get("tags", []), when))
+        return found
+
+
+def _rebatch(batches: Iterable[list[Finding]], size: int) -> Iterator[list[Finding]]:
+    """Порции источников — в порции ровно по ``size`` (последняя — остаток)."""
+    batch: list[Finding] = []
+    for found in batches:
+        if not batch and len(found) == size:
+            yield found
+            continue
+        batch.extend(found)
+        while len(batch) >= size:
+            yield batch[:size]
+            batch = batch[size:]
+    if batch:
+        yield batch
+
+
+def _binary_batches(path: Path, facts: Optional[frozenset[str]],
+                    probes: Optional[frozenset[str]],
+                    min_confidence: Optional[float]) -> Iterator[list[Finding]]:
+    """Findings контейнера: fact и probe выбирают блоки, прочие не читаются."""
+    from probe.binary import BinaryDossier
+
+    with BinaryDossier(path) as dossier:
+        found = dossier.query(fact=facts, probe=probes)
+    if min_confidence is not None:
+        found = [f for f in found if f.confidence >= min_confidence]
+    yield found
+
+
+def _is_store(path: Path) -> bool:
+    from probe.store import is_store
+
+    return is_store(path)
+
+
+def _store_batches(path: Path, batch_size: int, facts: Optional[frozenset[str]],
+                   probes: Optional[frozenset[str]],
+                   min_confidence: Optional[float]) -> Iterator[list[Finding]]:
+    """Findings хранилища SQLite: фильтры уходят в WHERE (probe.store)."""
+    from probe.store import StoreDossier
+
+    with StoreDossier(path) as store:
+        yield from store.iter_batches(batch_size, fact=facts, probe=probes,
+                                      min_confidence=min_confidence)
+
+
+def _values(criterion: Criterion) -> Optional[frozenset[str]]:
+    if criterion is None:
+        return None
+    return frozenset((criterion,) if isinstance(criterion, str) else criterion)
+
+
+def _needles(values: Optional[frozenset[str]]) -> tuple[bytes, ...]:
+    """Подстроки, без одной из которых строка JSONL точно не подходит.
+
+    Только для значений, которые в JSON пишутся как есть (ASCII без
+    кавычек, обратной косой и управляющих символов); иначе — без префильтра.
+    """
+    if not values or not all(v.isascii() and v.isprintable() and '"' not in v and "\\" not in v
+                             for v in values):
+        return ()
+    return tuple(f'"{v}"'.encode() for v in values)
+
+
+def _jsonl_lines(lines: Iterable[bytes],
+                 needles: tuple[tuple[bytes, ...], ...]) -> Iterator[bytes]:
+    """Непустые строки JSONL, в которых есть подстроки всех групп ``needles``."""
+    for line in lines:
+        if needles and not all(any(n in line for n in group) for group in needles):
+            continue
+        if line.strip():
+            yield line
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Без проходов циклического сборщика: порция findings — сотни тысяч
+    объектов без циклов, и сборщик тратил бы на них больше, чем разбор."""
+    paused = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if paused:
+            gc.enable()
+
+
+def _json_rows(fh: TextIO) -> Iterator[dict]:
+    """Элементы JSON-массива (или единственный объект) по мере чтения файла."""
+    stream = _JsonStream(fh)
+    first = stream.peek()
+    if first is None:
+        return
+    if first != "[":
+        yield stream.value()
+        return
+    stream.skip()
+    if stream.peek() == "]":
+        return
+    while True:
+        yield stream.value()
+        sep = stream.peek()
+        if sep == "]":
+            return
+        if sep != ",":
+            raise json.JSONDecodeError("ожидается ',' или ']'", stream.buf, stream.pos)
+        stream.skip()
+
+
+class _JsonStream:
+    """Буфер чтения файла для инкрементального разбора JSON (raw_decode)."""
+
+    __slots__ = ("fh", "buf", "pos", "eof")
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, fh: TextIO) -> None:
+        self.fh = fh
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def peek(self) -> Optional[str]:
+        """Следующий непробельный символ (не потребляя его); None — конец файла."""
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return None
+
+    def skip(self) -> None:
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Разобрать очередное значение, дочитывая файл, пока оно не завершится."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Число на границе буфера могло оборваться — дочитать и разобрать заново
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fh.read(_READ_CHUNK)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
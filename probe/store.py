@@ -0,0 +1,431 @@
+"""Хранилище findings в SQLite: `probe scan --store`, `probe query`.
+
+Вопросы вида «какие тесты вызывают ``PUT /api/v1/documents/{id}/approve``
+под OPERATOR?» по JSON-файлам решаются grep'ом по гигабайтам. Хранилище
+складывает findings в таблицу с индексами по probe, fact, entity,
+test_class/test_method и файлу location, а теги — в отдельную таблицу,
+и фильтры превращаются в WHERE: SQLite читает только подходящие строки.
+
+Схема (версия — ``PRAGMA user_version``, см. ``VERSION``)::
+
+    scans     id, target, env, scanned_at, complete
+    findings  id, scan, probe, env, entity, fact, data (JSON), location,
+              file, test_class, test_method, confidence, tags (JSON), ts
+    tags      finding, tag
+    live      представление: findings завершённых сканов
+
+Скан пишется порциями, по транзакции на порцию (StoreWriter), и виден
+читателям только после close(): тогда же удаляется предыдущий скан той же
+пары (target, env). Прерванный скан не оставляет следов в ``live``.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Optional, Union
+
+from pydantic_core import to_json
+
+from probe.defaults import QUERY_FIELDS
+from probe.models import Dossier, Finding, _finding, location_file
+
+if TYPE_CHECKING:
+    from probe.columnar import ColumnarDossier
+    from probe.index import Criterion
+
+#: Версия схемы; хранилище другой версии не открывается (ValueError)
+VERSION = 1
+#: Findings в одной транзакции StoreWriter и в одной порции чтения
+STORE_BATCH_SIZE = 10_000
+
+_HEADER = b"SQLite format 3\x00"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    env TEXT NOT NULL,
+    scanned_at TEXT NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id INTEGER PRIMARY KEY,
+    scan INTEGER NOT NULL REFERENCES scans (id),
+    probe TEXT NOT NULL,
+    env TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    fact TEXT NOT NULL,
+    data TEXT NOT NULL,
+    location TEXT,
+    file TEXT,
+    test_class TEXT,
+    test_method TEXT,
+    confidence REAL NOT NULL,
+    tags TEXT NOT NULL,
+    ts TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tags (
+    finding INTEGER NOT NULL REFERENCES findings (id),
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS findings_scan ON findings (scan);
+CREATE INDEX IF NOT EXISTS findings_probe ON findings (probe);
+CREATE INDEX IF NOT EXISTS findings_fact ON findings (fact);
+CREATE INDEX IF NOT EXISTS findings_entity ON findings (entity);
+CREATE INDEX IF NOT EXISTS findings_test ON findings (test_class, test_method);
+CREATE INDEX IF NOT EXISTS findings_file ON findings (file);
+CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag, finding);
+CREATE INDEX IF NOT EXISTS tags_finding ON tags (finding);
+CREATE VIEW IF NOT EXISTS live AS
+    SELECT findings.* FROM findings JOIN scans ON scans.id = findings.scan
+    WHERE scans.complete;
+"""
+
+_COLUMNS = "probe, env, entity, fact, data, location, confidence, tags, ts"
+
+
+def is_store(path: str | Path) -> bool:
+    """Является ли файл базой SQLite (хранилищем findings)."""
+    p = Path(path)
+    if not p.is_file():
+        return False
+    with open(p, "rb") as fh:
+        return fh.read(len(_HEADER)) == _HEADER
+
+
+def connect(path: str | Path, create: bool = True) -> sqlite3.Connection:
+    """Открыть хранилище; с ``create`` — создать схему в новой базе.
+
+    Соединение можно передавать между потоками (досье в кэше `probe daemon`):
+    модуль sqlite3 сериализует обращения к нему.
+
+    Raises:
+        ValueError: Файл — не SQLite, база без схемы (при ``create=False``)
+            или другой версии схемы.
+    """
+    p = Path(path)
+    if create:
+        p.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(p, isolation_level=None, check_same_thread=False)
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0 and not create:
+            raise ValueError(f"{p}: не хранилище findings")
+        if version not in (0, VERSION):
+            raise ValueError(f"{p}: версия хранилища {version}, поддерживается {VERSION}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        if version == 0:
+            conn.executescript(_SCHEMA + f"PRAGMA user_version = {VERSION};")
+    except sqlite3.DatabaseError as exc:
+        conn.close()
+        raise ValueError(f"{p}: не хранилище findings ({exc})") from exc
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+
+class StoreWriter:
+    """Потоковая запись скана в хранилище, по транзакции на порцию findings.
+
+    API как у storage.FindingsWriter: ``write()``, ``count``, ``close()``,
+    ``abort()``, контекстный менеджер. Скан становится видимым при
+    close(), одновременно с удалением предыдущего скана (target, env).
+    """
+
+    def __init__(self, path: str | Path, target: str, env: str,
+                 scanned_at: Optional[datetime] = None,
+                 batch_size: int = STORE_BATCH_SIZE) -> None:
+        self.path = Path(path)
+        self.target = target
+        self.env = env
+        self.count = 0
+        self.batch_size = batch_size
+        self._pending: list[Finding] = []
+        self._stamps: dict[datetime, str] = {}
+        self._conn = connect(self.path)
+        scanned_at = scanned_at or datetime.now(timezone.utc)
+        with self._transaction():
+            self._scan = self._conn.execute(
+                "INSERT INTO scans (target, env, scanned_at) VALUES (?, ?, ?)",
+                (target, env, scanned_at.isoformat())).lastrowid
+        self._closed = False
+
+    def write(self, findings: Iterable[Finding]) -> None:
+        """Добавить findings; полные порции сразу пишутся в базу."""
+        pending = self._pending
+        for f in findings:
+            pending.append(f)
+            if len(pending) >= self.batch_size:
+                self._flush()
+                pending = self._pending
+
+    def close(self) -> Path:
+        """Дописать остаток и сделать скан видимым вместо предыдущего."""
+        if self._closed:
+            return self.path
+        self._flush()
+        with self._transaction():
+            _drop_scans(self._conn, "target = ? AND env = ? AND id < ?",
+                        (self.target, self.env, self._scan))
+            self._conn.execute("UPDATE scans SET complete = 1 WHERE id = ?", (self._scan,))
+        # Перенести журнал в файл базы: её mtime отмечает новый скан
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._finish()
+        return self.path
+
+    def abort(self) -> None:
+        """Бросить скан: его строки удаляются, предыдущий скан остаётся."""
+        if self._closed:
+            return
+        self._pending.clear()
+        with self._transaction():
+            _drop_scans(self._conn, "id = ?", (self._scan,))
+        self._finish()
+
+    def __enter__(self) -> StoreWriter:
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException], tb: Optional[TracebackType]) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _flush(self) -> None:
+        if not self._pending:
+            return
+        conn, scan = self._conn, self._scan
+        with self._transaction():
+            # Номера строк задаются явно, чтобы сразу связать с ними теги
+            first = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM findings").fetchone()[0]
+            rows, tags = [], []
+            stamps = self._stamps
+            for fid, f in enumerate(self._pending, first):
+                # У findings скана обычно одна метка ts: isoformat() — раз на метку
+                stamp = stamps.get(f.ts)
+                if stamp is None:
+                    stamp = stamps[f.ts] = f.ts.isoformat()
+                rows.append(_row(fid, scan, f, stamp))
+                tags.extend((fid, tag) for tag in dict.fromkeys(f.tags))
+            conn.executemany(
+                "INSERT INTO findings (id, scan, probe, env, entity, fact, data, location, "
+                "file, test_class, test_method, confidence, tags, ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            conn.executemany("INSERT INTO tags (finding, tag) VALUES (?, ?)", tags)
+        self.count += len(rows)
+        self._pending = []
+
+    def _transaction(self) -> _Transaction:
+        return _Transaction(self._conn)
+
+    def _finish(self) -> None:
+        self._closed = True
+        self._conn.close()
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` … ``COMMIT`` (``ROLLBACK`` при исключении)."""
+
+    __slots__ = ("conn",)
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException], tb: Optional[TracebackType]) -> None:
+        self.conn.execute("COMMIT" if exc_type is None else "ROLLBACK")
+
+
+def _drop_scans(conn: sqlite3.Connection, where: str, params: tuple) -> None:
+    scans = f"SELECT id FROM scans WHERE {where}"
+    conn.execute(f"DELETE FROM tags WHERE finding IN "
+                 f"(SELECT id FROM findings WHERE scan IN ({scans}))", params)
+    conn.execute(f"DELETE FROM findings WHERE scan IN ({scans})", params)
+    conn.execute(f"DELETE FROM scans WHERE {where}", params)
+
+
+def _row(fid: int, scan: int, f: Finding, ts: str) -> tuple:
+    data = f.data
+    test_class, test_method = data.get("test_class"), data.get("test_method")
+    return (fid, scan, f.probe, f.env, f.entity, f.fact, to_json(data).decode(), f.location,
+            location_file(f.location),
+            test_class if test_class and isinstance(test_class, str) else None,
+            test_method if test_method and isinstance(test_method, str) else None,
+            f.confidence, to_json(f.tags).decode(), ts)
+
+
+def write_store(dossier: Union[Dossier, ColumnarDossier], path: str | Path) -> Path:
+    """Записать досье в хранилище ``path`` вместо его прошлого скана (target, env)."""
+    with StoreWriter(path, dossier.target, dossier.env, dossier.scanned_at) as writer:
+        writer.write(dossier.findings)
+    return writer.path
+
+
+class StoreDossier:
+    """Досье из хранилища: выборки выполняются запросами к SQLite.
+
+    API как у Dossier: ``query``, ``by_*``, ``counts``, ``findings``
+    (все findings, читаются при первом обращении). ``target``, ``env``
+    и ``scanned_at`` — первого скана хранилища. query() дополнительно
+    принимает ``env``, ``test_method``, ``min_confidence``, ``data``
+    (равенство значений ключей data) и ``limit``.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        if not is_store(self.path):
+            raise ValueError(f"{self.path}: не хранилище findings")
+        self._conn = connect(self.path, create=False)
+        first = self._conn.execute("SELECT target, env, scanned_at FROM scans "
+                                   "WHERE complete ORDER BY id LIMIT 1").fetchone()
+        if first is None:
+            self.target, self.env = str(self.path), "unknown"
+            self.scanned_at = datetime.now(timezone.utc)
+        else:
+            self.target, self.env = first[0], first[1]
+            self.scanned_at = datetime.fromisoformat(first[2])
+        self._all: Optional[list[Finding]] = None
+        self._datetimes: dict[str, datetime] = {}
+
+    # -- Dossier API --------------------------------------------------------
+
+    def __len__(self) -> int:
+        if self._all is not None:
+            return len(self._all)
+        return self._conn.execute("SELECT COUNT(*) FROM live").fetchone()[0]
+
+    @property
+    def findings(self) -> list[Finding]:
+        """Все findings хранилища в порядке записи."""
+        if self._all is None:
+            self._all = self.query()
+        return self._all
+
+    def counts(self, field: str, **criteria: Any) -> dict[str, int]:
+        """Число findings на значение поля — GROUP BY, без чтения findings.
+
+        ``criteria`` — как у query(): считаются только подходящие findings.
+
+        Raises:
+            TypeError: Поле не из QUERY_FIELDS.
+        """
+        if field not in QUERY_FIELDS:
+            raise TypeError(f"Поле не индексируется: {field!r} (есть: {', '.join(QUERY_FIELDS)})")
+        where, params = _where(**criteria)
+        if field == "tag":
+            sql = (f"SELECT tags.tag, COUNT(*) FROM tags JOIN live ON live.id = tags.finding"
+                   f"{where} GROUP BY tags.tag ORDER BY MIN(tags.finding)")
+        else:
+            where = f"{where} AND {field} IS NOT NULL" if where else f" WHERE {field} IS NOT NULL"
+            sql = f"SELECT {field}, COUNT(*) FROM live{where} GROUP BY {field} ORDER BY MIN(id)"
+        return dict(self._conn.execute(sql, params).fetchall())
+
+    def query(self, probe: Criterion = None, fact: Criterion = None, tag: Criterion = None,
+              entity: Criterion = None, test_class: Criterion = None,
+              file: Criterion = None, *, env: Criterion = None,
+              test_method: Criterion = None, min_confidence: Optional[float] = None,
+              data: Optional[dict[str, Any]] = None,
+              limit: Optional[int] = None) -> list[Finding]:
+        """Findings под все критерии (см. Dossier.query), в порядке записи.
+
+        Все критерии становятся условиями WHERE. ``data`` — ``{ключ: значение}``:
+        значение ключа data равно заданному (строки сравниваются как текст).
+        """
+        return [f for batch in self.iter_batches(
+            probe=probe, fact=fact, tag=tag, entity=entity, test_class=test_class, file=file,
+            env=env, test_method=test_method, min_confidence=min_confidence, data=data,
+            limit=limit) for f in batch]
+
+    def iter_batches(self, batch_size: int = STORE_BATCH_SIZE,
+                     **criteria: Any) -> Iterator[list[Finding]]:
+        """Findings под критерии query() порциями до ``batch_size``."""
+        limit = criteria.pop("limit", None)
+        where, params = _where(**criteria)
+        sql = f"SELECT {_COLUMNS} FROM live{where} ORDER BY id"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        cursor = self._conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [self._finding(row) for row in rows]
+
+    def by_probe(self, probe_name: str) -> list[Finding]:
+        """Вернуть findings конкретного зонда."""
+        return self.query(probe=probe_name)
+
+    def by_fact(self, fact: str) -> list[Finding]:
+        """Вернуть findings с конкретным типом факта."""
+        return self.query(fact=fact)
+
+    def by_tag(self, tag: str) -> list[Finding]:
+        """Вернуть findings с конкретным тегом."""
+        return self.query(tag=tag)
+
+    def to_dossier(self) -> Dossier:
+        """Обычный Dossier со всеми findings в памяти."""
+        return Dossier(target=self.target, env=self.env, scanned_at=self.scanned_at,
+                       findings=self.findings)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> StoreDossier:
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]],
+                 exc: Optional[BaseException], tb: Optional[TracebackType]) -> None:
+        self.close()
+
+    def _finding(self, row: tuple) -> Finding:
+        probe, env, entity, fact, data, location, confidence, tags, ts = row
+        when = self._datetimes.get(ts)
+        if when is None:
+            when = self._datetimes[ts] = datetime.fromisoformat(ts)
+        return _finding(probe, env, entity, fact, json.loads(data), location, confidence,
+                        json.loads(tags), when)
+
+
+def _where(min_confidence: Optional[float] = None, data: Optional[dict[str, Any]] = None,
+           **criteria: Criterion) -> tuple[str, list]:
+    """Условие WHERE и его параметры для критериев query()."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    for name, criterion in criteria.items():
+        if criterion is None:
+            continue
+        if name not in QUERY_FIELDS:
+            raise TypeError(f"Поле не индексируется: {name!r} (есть: {', '.join(QUERY_FIELDS)})")
+        values = [criterion] if isinstance(criterion, str) else list(dict.fromkeys(criterion))
+        if not values:
+            clauses.append("0")
+            continue
+        marks = ", ".join("?" * len(values))
+        if name == "tag":
+            clauses.append(f"id IN (SELECT finding FROM tags WHERE tag IN ({marks}))")
+        else:
+            clauses.append(f"{name} IN ({marks})")
+        params.extend(values)
+    if min_confidence is not None:
+        clauses.append("confidence >= ?")
+        params.append(min_confidence)
+    for key, value in (data or {}).items():
+        path = "$." + json.dumps(key, ensure_ascii=False)
+        if isinstance(value, str):
+            clauses.append("CAST(json_extract(data, ?) AS TEXT) = ?")
+        else:
+            clauses.append("json_extract(data, ?) = json_extract(?, '$')")
+            value = json.dumps(value)
+        params.extend((path, value))
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
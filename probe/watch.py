@@ -0,0 +1,327 @@
+"""Режим наблюдения `probe watch`: живое досье и карта продукта.
+
+Полный скан выполняется один раз. Дальше наблюдатель (inotify на Linux,
+иначе опрос mtime/размера) собирает изменения файлов цели, пачка изменений
+гасится паузой ``debounce``, и LiveDossier пересканирует пофайловыми
+зондами только изменённые файлы, удалённые — вычёркивает. Досье
+обновляется на месте, findings и product-map.md перезаписываются,
+только если findings действительно изменились.
+
+Целые и async-зонды в режиме наблюдения не перезапускаются: их findings
+остаются от первого полного скана.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Callable, Iterable, Optional, Sequence
+
+from probe.dedup import dedup
+from probe.defaults import DEFAULT_DEBOUNCE
+from probe.models import Dossier, Finding
+from probe.runner import iter_findings, scan_one_file
+from probes.base import BaseProbe
+
+logger = logging.getLogger(__name__)
+
+#: Период опроса файлов, если inotify недоступен
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class LiveDossier:
+    """Досье цели, которое обновляется пофайлово.
+
+    Args:
+        probes: Зонды среды.
+        target: Корень цели.
+        env: Тип среды.
+        max_workers: Воркеры первого полного скана.
+        executor: Пул первого полного скана (см. runner.resolve_executor()).
+        dedup: Дедупликация досье, как у run_probes() (см. probe.dedup).
+    """
+
+    def __init__(self, probes: Sequence[BaseProbe], target: str | Path, env: str,
+                 max_workers: int = 8, executor: str = "auto", dedup: str = "none") -> None:
+        self.probes = list(probes)
+        self.dedup = dedup
+        self.base = Path(target).resolve()
+        self.file_probes = [p for p in self.probes if p.file_glob and not p.is_async]
+        self.dossier = Dossier(target=str(target), env=env)
+        self._rank = {p.name: i for i, p in enumerate(self.probes)}
+        self._files: dict[str, list[Finding]] = {}
+        self._whole: list[Finding] = []
+        for batch in iter_findings(self.probes, self.base, max_workers, executor=executor):
+            if batch.path is None:
+                self._whole.extend(batch.findings)
+            elif batch.findings:
+                self._files[batch.path] = batch.findings
+        self._assemble()
+
+    def tracks(self, rel_path: str) -> bool:
+        """Файл читает хотя бы один пофайловый зонд."""
+        path = PurePosixPath(rel_path)
+        return any(path.match(p.file_glob) for p in self.file_probes)
+
+    def update(self, paths: Iterable[Path]) -> list[str]:
+        """Пересканировать файлы (отсутствующие — удалить из досье).
+
+        Returns:
+            Отсортированные пути (относительно цели), чьи findings изменились.
+        """
+        changed: list[str] = []
+        for path in set(paths):
+            try:
+                rel_path = path.resolve().relative_to(self.base).as_posix()
+            except ValueError:
+                continue
+            if not self.tracks(rel_path):
+                continue
+            new = (scan_one_file(self.file_probes, self.base / rel_path, self.base)
+                   if (self.base / rel_path).is_file() else [])
+            if _facts(new) == _facts(self._files.get(rel_path, [])):
+                continue
+            if new:
+                self._files[rel_path] = new
+            else:
+                self._files.pop(rel_path, None)
+            changed.append(rel_path)
+        if changed:
+            self._assemble()
+        return sorted(changed)
+
+    def _assemble(self) -> None:
+        """Порядок findings — как у run_probes(): по зонду, внутри — по пути файла."""
+        order = {path: i for i, path in enumerate(sorted(self._files, key=PurePosixPath))}
+        keyed = [(self._rank.get(f.probe, len(self._rank)), -1, f) for f in self._whole]
+        keyed += [(self._rank.get(f.probe, len(self._rank)), order[path], f)
+                  for path, findings in self._files.items() for f in findings]
+        keyed.sort(key=lambda item: (item[0], item[1]))
+        self.dossier.findings[:] = dedup((f for _, _, f in keyed), self.dedup)
+        self.dossier.reindex()
+        self.dossier.scanned_at = datetime.now(timezone.utc)
+
+
+def _facts(findings: list[Finding]) -> list[dict]:
+    return [f.model_dump(exclude={"ts"}) for f in findings]
+
+
+# ---------------------------------------------------------------------------
+# Наблюдатели
+# ---------------------------------------------------------------------------
+
+class PollingWatcher:
+    """Изменения файлов по опросу mtime и размера — работает везде."""
+
+    def __init__(self, root: Path, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        self.root = Path(root)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Изменённые, новые и удалённые файлы; дерево обходится не чаще ``interval``."""
+        time.sleep(max(timeout, self.interval))
+        current = self._scan()
+        changed = {p for p, stamp in current.items() if self._snapshot.get(p) != stamp}
+        changed.update(p for p in self._snapshot if p not in current)
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        stamps: dict[Path, tuple[int, int]] = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = Path(dirpath, name)
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                stamps[path] = (st.st_mtime_ns, st.st_size)
+        return stamps
+
+
+class InotifyWatcher:
+    """Изменения файлов через inotify (Linux, без внешних зависимостей).
+
+    Наблюдатель помнит файлы дерева: директория, переименованная или
+    вынесенная из цели, отдаёт все свои прежние пути как изменённые.
+    Переполнение очереди событий или потеря корня — полный пересмотр дерева.
+
+    Raises:
+        OSError: inotify недоступен (не Linux, исчерпан лимит watch'ей).
+    """
+
+    _IN_MODIFY = 0x002
+    _IN_CLOSE_WRITE = 0x008
+    _IN_MOVED_FROM = 0x040
+    _IN_MOVED_TO = 0x080
+    _IN_CREATE = 0x100
+    _IN_DELETE = 0x200
+    _IN_DELETE_SELF = 0x400
+    _IN_MOVE_SELF = 0x800
+    _IN_Q_OVERFLOW = 0x4000
+    _IN_IGNORED = 0x8000
+    _IN_ISDIR = 0x40000000
+    _IN_NONBLOCK = 0o4000
+    _IN_CLOEXEC = 0o2000000
+    _MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+             | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, root: Path) -> None:
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify есть только в Linux")
+        self.root = Path(root)
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(self._IN_NONBLOCK | self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self._dirs: dict[int, Path] = {}
+        self._known: set[Path] = set()
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def poll(self, timeout: float) -> set[Path]:
+        """Пути из событий, пришедших за ``timeout`` секунд."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        changed: set[Path] = set()
+        if not ready:
+            return changed
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += length
+            if mask & self._IN_Q_OVERFLOW:
+                logger.warning("Очередь inotify переполнена, полный пересмотр %s", self.root)
+                return changed | self._rescan()
+            if mask & self._IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None:
+                continue
+            if mask & (self._IN_DELETE_SELF | self._IN_MOVE_SELF):
+                if parent == self.root:
+                    logger.warning("Корень %s удалён или перемещён, полный пересмотр", self.root)
+                    return changed | self._rescan()
+                continue
+            if not name:
+                continue
+            path = parent / name
+            if mask & self._IN_ISDIR:
+                if mask & (self._IN_CREATE | self._IN_MOVED_TO):
+                    # Новая директория: следить за ней и отдать уже лежащие в ней файлы
+                    changed.update(self._watch_tree(path))
+                elif mask & (self._IN_MOVED_FROM | self._IN_DELETE):
+                    # Директория ушла со старого пути: все её файлы там удалены
+                    changed.update(self._forget(path))
+                continue
+            if mask & (self._IN_MOVED_FROM | self._IN_DELETE):
+                self._known.discard(path)
+            else:
+                self._known.add(path)
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _watch_tree(self, root: Path) -> set[Path]:
+        """Следить за директориями дерева; файлы дерева становятся известными."""
+        found: set[Path] = set()
+        for dirpath, _, filenames in os.walk(root):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self._MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch {dirpath}")
+            self._dirs[wd] = Path(dirpath)
+            found.update(Path(dirpath, name) for name in filenames)
+        self._known |= found
+        return found
+
+    def _forget(self, prefix: Path) -> set[Path]:
+        """Снять наблюдение с поддерева и вернуть известные файлы под ним."""
+        gone = {p for p in self._known if p.is_relative_to(prefix)}
+        self._known -= gone
+        for wd, path in list(self._dirs.items()):
+            if path.is_relative_to(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        return gone
+
+    def _rescan(self) -> set[Path]:
+        """Полный пересмотр: прежние и текущие файлы дерева, наблюдение заново."""
+        return self._forget(self.root) | self._watch_tree(self.root)
+
+
+def make_watcher(root: Path, polling: bool = False,
+                 interval: float = DEFAULT_POLL_INTERVAL) -> InotifyWatcher | PollingWatcher:
+    """inotify, если доступен и не запрошен опрос; иначе PollingWatcher."""
+    if not polling:
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as exc:
+            logger.info("inotify недоступен (%s), наблюдение опросом", exc)
+    return PollingWatcher(root, interval)
+
+
+def debounced(watcher: InotifyWatcher | PollingWatcher, debounce: float = DEFAULT_DEBOUNCE,
+              stop: Callable[[], bool] = lambda: False) -> Iterable[set[Path]]:
+    """Пачки изменений: события копятся, пока не наступит пауза ``debounce``."""
+    while not stop():
+        pending = watcher.poll(debounce)
+        if not pending:
+            continue
+        while not stop():
+            more = watcher.poll(debounce)
+            if not more:
+                break
+            pending |= more
+        yield pending
+
+
+def watch(live: LiveDossier, watcher: InotifyWatcher | PollingWatcher,
+          on_update: Callable[[list[str]], None], debounce: float = DEFAULT_DEBOUNCE,
+          stop: Callable[[], bool] = lambda: False) -> None:
+    """Обновлять досье по пачкам изменений; ``on_update`` — если findings изменились."""
+    for paths in debounced(watcher, debounce, stop):
+        changed = live.update(paths)
+        if changed:
+            on_update(changed)
+
+
+def write_live(live: LiveDossier, out: str | Path, map_path: Optional[str | Path] = None) -> Path:
+    """Сохранить findings досье и (пере)построить карту продукта.
+
+    Returns:
+        Путь карты продукта (по умолчанию ``<out>/product-map.md``).
+    """
+    from probe.correlator import correlate
+    from probe.storage import write_findings
+
+    write_findings(live.dossier, out)
+    map_file = Path(map_path) if map_path is not None else Path(out) / "product-map.md"
+    map_file.parent.mkdir(parents=True, exist_ok=True)
+    correlate(live.dossier, out_path=map_file)
+    return map_file
@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
-from abc import ABC, abstractmethod
+import asyncio
+from abc import ABC
 from pathlib import Path
+from typing import Any, Optional, Sequence
 
-from probe.models import Finding
+from probe.models import Finding, FindingBatch, FindingRecord
+
+#: Лимит конкурентности, когда async-зонд запускают напрямую через scan()
+STANDALONE_CONCURRENCY = 256
 
 
 class BaseProbe(ABC):
@@ -15,18 +20,84 @@ class BaseProbe(ABC):
     name: str = ""
     #: Тип среды, для которой предназначен зонд
     env: str = ""
+    #: Glob-шаблон файлов, которые читает зонд. Пустая строка — зонд
+    #: не поддерживает пофайловый контракт и запускается целиком через scan()
+    file_glob: str = ""
+
+    def __new__(cls, *args, **kwargs):
+        if cls.scan is BaseProbe.scan and cls.scan_async is BaseProbe.scan_async:
+            raise TypeError(f"Зонд {cls.__name__} должен реализовать scan() или scan_async()")
+        return super().__new__(cls)
 
-    @abstractmethod
-    def scan(self, target: str | Path) -> list[Finding]:
+    def scan(self, target: str | Path) -> list[Finding | FindingRecord]:
         """Выполнить сканирование цели и вернуть список findings.
 
+        Зонд реализует либо этот метод, либо scan_async(). Для async-зонда
+        реализация по умолчанию запускает scan_async() в собственном event loop.
+
         Args:
             target: Путь к директории или URL цели.
 
         Returns:
-            Список атомарных фактов (findings). Пустой список — норма.
+            Список атомарных фактов: Finding или, дешевле, записи record()
+            и батчи batch(). Пустой список — норма.
+        """
+        return asyncio.run(self.scan_async(target, asyncio.Semaphore(STANDALONE_CONCURRENCY)))
+
+    def scan_file(self, path: Path, base: Path) -> list[Finding | FindingRecord]:
+        """Просканировать один файл цели (пофайловый контракт).
+
+        Runner вызывает метод для каждого файла, подходящего под ``file_glob``,
+        и отдаёт результаты по мере готовности, не дожидаясь всего дерева.
+
+        Args:
+            path: Путь к файлу.
+            base: Корень цели — от него считаются относительные location.
+
+        Returns:
+            Findings, найденные в этом файле: список или батч batch().
         """
-        ...
+        raise NotImplementedError(f"Зонд {self.name} не поддерживает пофайловое сканирование")
+
+    async def scan_async(self, target: str | Path,
+                         limiter: asyncio.Semaphore) -> list[Finding | FindingRecord]:
+        """Асинхронное сканирование для I/O-bound зондов — альтернатива scan().
+
+        Если зонд переопределяет метод, runner запускает его в event loop
+        вместо пула потоков. Каждую I/O-операцию зонд оборачивает в
+        ``async with limiter:`` — семафор общий на весь скан и ограничивает
+        число одновременных запросов от всех async-зондов.
+
+        Args:
+            target: Путь к директории или URL цели.
+            limiter: Глобальный семафор конкурентности скана.
+
+        Returns:
+            Список атомарных фактов (findings).
+        """
+        raise NotImplementedError(f"Зонд {self.name} не поддерживает async-сканирование")
+
+    def record(self, entity: str, fact: str, data: dict[str, Any],
+               location: Optional[str] = None, confidence: float = 1.0,
+               tags: Sequence[str] = ()) -> FindingRecord:
+        """Запись факта этого зонда — дешёвая альтернатива Finding(...).
+
+        Runner превращает записи в Finding без повторной валидации, поэтому
+        ``confidence`` должна быть в [0..1], а ``data`` — JSON-совместимой.
+        """
+        return FindingRecord(self.name, self.env, entity, fact, data,
+                             location, confidence, tuple(tags))
+
+    def batch(self, tags: Sequence[str] = ()) -> FindingBatch:
+        """Батч findings этого зонда: probe, env и общие ``tags`` — один раз,
+        дальше только строки ``batch.add(entity, fact, data, ...)``.
+        scan_file() может вернуть батч вместо списка."""
+        return FindingBatch(self.name, self.env, tags)
+
+    @property
+    def is_async(self) -> bool:
+        """Зонд реализует scan_async() и запускается в event loop."""
+        return type(self).scan_async is not BaseProbe.scan_async
 
     def __repr__(self) -> str:
         return f"<Probe {self.name!r} env={self.env!r}>"
@@ -0,0 +1,99 @@
+"""Общий кэш исходников и Java AST для пофайловых зондов.
+
+Несколько зондов читают и парсят один и тот же файл; кэш отдаёт им
+общий текст и общее (только для чтения) дерево javalang. Ключ — путь,
+mtime и размер файла, поэтому изменённый файл перечитывается сам.
+Размер кэша небольшой для обычного скана (зонды одного файла идут подряд)
+и увеличивается долгоживущим процессом — `probe daemon`.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    import javalang
+
+#: Файлов в кэше по умолчанию — хватает на зонды файлов, которые сейчас в работе
+DEFAULT_CACHE_SIZE = 64
+
+_MISSING = object()
+
+
+class SourceCache:
+    """LRU-кэш текста и AST файлов. Потокобезопасен."""
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def source(self, path: Path) -> str:
+        """Текст файла (UTF-8, битые байты пропускаются)."""
+        return self._get("source", path,
+                         lambda: path.read_text(encoding="utf-8", errors="ignore"))
+
+    def java_ast(self, path: Path) -> Optional[javalang.tree.CompilationUnit]:
+        """Дерево javalang файла; None — синтаксическая ошибка."""
+        import javalang  # только зондам, которые парсят Java
+
+        def parse() -> Optional[javalang.tree.CompilationUnit]:
+            try:
+                return javalang.parse.parse(self.source(path))
+            except javalang.parser.JavaSyntaxError:
+                return None
+
+        return self._get("ast", path, parse)
+
+    def resize(self, maxsize: int) -> None:
+        """Изменить ёмкость кэша, вытеснив лишнее."""
+        with self._lock:
+            self.maxsize = maxsize
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get(self, kind: str, path: Path, load: Callable[[], Any]) -> Any:
+        try:
+            stat = path.stat()
+        except OSError:
+            return load()
+        key = (kind, str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            value = self._entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        # Парсинг — вне блокировки: гонка за один файл лишь парсит его дважды
+        value = load()
+        with self._lock:
+            self._entries[key] = value
+            self._evict()
+        return value
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+#: Кэш процесса, общий для всех зондов
+CACHE = SourceCache()
+
+
+def read_source(path: Path) -> str:
+    """Текст файла из общего кэша."""
+    return CACHE.source(path)
+
+
+def parse_java(path: Path) -> Optional[javalang.tree.CompilationUnit]:
+    """AST Java-файла из общего кэша; None — файл не парсится."""
+    return CACHE.java_ast(path)
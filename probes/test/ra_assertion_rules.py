@@ -7,8 +7,9 @@ from pathlib import Path
 
 import javalang
 
-from probe.models import Finding
+from probe.models import FindingBatch, FindingRecord
 from probes.base import BaseProbe
+from probes.source import parse_java
 
 # Ключевые слова в имени теста, указывающие на негативный сценарий
 _NEGATIVE_KEYWORDS = frozenset([
@@ -62,25 +63,24 @@ class RaAssertionRules(BaseProbe):
 
     name = "ra-assertion-rules"
     env = "test"
+    file_glob = "*.java"
 
-    def scan(self, target: str | Path) -> list[Finding]:
+    def scan(self, target: str | Path) -> list[FindingRecord]:
         """Сканирует Java-тесты и собирает body()-ассерты."""
         target = Path(target)
-        findings: list[Finding] = []
-        for java_file in target.rglob("*.java"):
-            findings.extend(self._scan_file(java_file, target))
+        findings: list[FindingRecord] = []
+        for java_file in target.rglob(self.file_glob):
+            findings.extend(self.scan_file(java_file, target))
         return findings
 
-    def _scan_file(self, java_file: Path, base: Path) -> list[Finding]:
-        source = java_file.read_text(encoding="utf-8", errors="ignore")
+    def scan_file(self, java_file: Path, base: Path) -> FindingBatch:
         relative = java_file.relative_to(base).as_posix()
         class_name = java_file.stem
         entity_base = _entity_from_class(class_name)
-        findings: list[Finding] = []
+        findings = self.batch(tags=["rule"])
 
-        try:
-            tree = javalang.parse.parse(source)
-        except javalang.parser.JavaSyntaxError:
+        tree = parse_java(java_file)
+        if tree is None:
             return findings
 
         for path, node in tree.filter(javalang.tree.MethodInvocation):
@@ -107,15 +107,9 @@ class RaAssertionRules(BaseProbe):
             # entity: SomeClass.fieldName
             entity = f"{entity_base}.{field.split('.')[0].split('[')[0]}"
 
-            tags = ["rule"]
-            if is_negative:
-                tags.append("constraint")
-            else:
-                tags.append("business-rule")
+            tags = ["constraint"] if is_negative else ["business-rule"]
 
-            findings.append(Finding(
-                probe=self.name,
-                env=self.env,
+            findings.add(
                 entity=entity,
                 fact="business_rule",
                 data={
@@ -130,7 +124,7 @@ class RaAssertionRules(BaseProbe):
                 location=location,
                 confidence=field_conf,
                 tags=tags,
-            ))
+            )
 
         return findings
 
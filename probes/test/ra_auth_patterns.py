@@ -7,8 +7,9 @@ from pathlib import Path
 
 import javalang
 
-from probe.models import Finding
+from probe.models import FindingBatch, FindingRecord
 from probes.base import BaseProbe
+from probes.source import read_source
 
 # Паттерны авторизации (regex)
 _RE_SPEC = re.compile(r'\.spec\(\s*(\w+)\s*\)')
@@ -109,20 +110,21 @@ class RaAuthPatterns(BaseProbe):
 
     name = "ra-auth-patterns"
     env = "test"
+    file_glob = "*.java"
 
-    def scan(self, target: str | Path) -> list[Finding]:
+    def scan(self, target: str | Path) -> list[FindingRecord]:
         """Сканирует Java-тесты и фиксирует auth-паттерны для каждого эндпоинта."""
         target = Path(target)
-        findings: list[Finding] = []
-        for java_file in target.rglob("*.java"):
-            findings.extend(self._scan_file(java_file, target))
+        findings: list[FindingRecord] = []
+        for java_file in target.rglob(self.file_glob):
+            findings.extend(self.scan_file(java_file, target))
         return findings
 
-    def _scan_file(self, java_file: Path, base: Path) -> list[Finding]:
-        source = java_file.read_text(encoding="utf-8", errors="ignore")
+    def scan_file(self, java_file: Path, base: Path) -> FindingBatch:
+        source = read_source(java_file)
         relative = java_file.relative_to(base).as_posix()
         class_name = java_file.stem
-        findings: list[Finding] = []
+        findings = self.batch(tags=["auth", "security"])
 
         # Быстрая проверка: есть ли вообще @Test
         if "@Test" not in source:
@@ -139,17 +141,13 @@ class RaAuthPatterns(BaseProbe):
 
             fact = "public_endpoint" if auth["is_public"] else "auth_required"
             confidence = 1.0 if auth["auth_type"] in ("basic", "bearer") else 0.7
-            tags = ["auth", "security"]
-            if auth["role"]:
-                tags.append(f"role:{auth['role'].lower()}")
+            tags = [f"role:{auth['role'].lower()}"] if auth["role"] else []
 
             for http_m in _RE_HTTP.finditer(body):
                 http_verb = http_m.group(1).upper()
                 path = http_m.group(2)
                 entity = f"{http_verb} {path}"
-                findings.append(Finding(
-                    probe=self.name,
-                    env=self.env,
+                findings.add(
                     entity=entity,
                     fact=fact,
                     data={**auth, "test_class": class_name,
@@ -157,6 +155,6 @@ class RaAuthPatterns(BaseProbe):
                     location=f"{relative}:{start_line}",
                     confidence=confidence,
                     tags=tags,
-                ))
+                )
 
         return findings
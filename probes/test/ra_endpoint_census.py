@@ -7,8 +7,9 @@ from pathlib import Path
 
 import javalang
 
-from probe.models import Finding
+from probe.models import FindingBatch, FindingRecord
 from probes.base import BaseProbe
+from probes.source import parse_java
 
 # HTTP-методы RestAssured, которые соответствуют HTTP-глаголам
 HTTP_METHODS = {"get", "post", "put", "delete", "patch", "head", "options"}
@@ -19,27 +20,26 @@ class RaEndpointCensus(BaseProbe):
 
     name = "ra-endpoint-census"
     env = "test"
+    file_glob = "*.java"
 
-    def scan(self, target: str | Path) -> list[Finding]:
+    def scan(self, target: str | Path) -> list[FindingRecord]:
         """Сканирует директорию с Java-тестами и собирает эндпоинты."""
         target = Path(target)
-        findings: list[Finding] = []
+        findings: list[FindingRecord] = []
 
-        for java_file in target.rglob("*.java"):
-            findings.extend(self._scan_file(java_file, target))
+        for java_file in target.rglob(self.file_glob):
+            findings.extend(self.scan_file(java_file, target))
 
         return findings
 
-    def _scan_file(self, java_file: Path, base: Path) -> list[Finding]:
+    def scan_file(self, java_file: Path, base: Path) -> FindingBatch:
         """Парсит один Java-файл и извлекает вызовы RestAssured."""
-        source = java_file.read_text(encoding="utf-8", errors="ignore")
         relative = java_file.relative_to(base).as_posix()
         class_name = java_file.stem
-        findings: list[Finding] = []
+        findings = self.batch(tags=["api", "endpoint"])
 
-        try:
-            tree = javalang.parse.parse(source)
-        except javalang.parser.JavaSyntaxError:
+        tree = parse_java(java_file)
+        if tree is None:
             return findings
 
         # Ищем вызовы методов с именами HTTP-глаголов
@@ -63,7 +63,7 @@ class RaEndpointCensus(BaseProbe):
             location = f"{relative}:{line}"
 
             entity = f"{http_method} {url}"
-            tags = ["api", "endpoint"]
+            tags = []
             if http_method in ("POST", "PUT", "PATCH", "DELETE"):
                 tags.append("write")
             else:
@@ -71,9 +71,7 @@ class RaEndpointCensus(BaseProbe):
             if has_path_params:
                 tags.append("path-param")
 
-            findings.append(Finding(
-                probe=self.name,
-                env=self.env,
+            findings.add(
                 entity=entity,
                 fact="endpoint_tested",
                 data={
@@ -86,7 +84,7 @@ class RaEndpointCensus(BaseProbe):
                 location=location,
                 confidence=confidence,
                 tags=tags,
-            ))
+            )
 
         return findings
 
@@ -6,8 +6,9 @@ from pathlib import Path
 
 import javalang
 
-from probe.models import Finding
+from probe.models import FindingBatch, FindingRecord
 from probes.base import BaseProbe
+from probes.source import parse_java
 
 # Константы Apache HttpStatus → числовые коды
 HTTPSTATUS_CONSTANTS: dict[str, int] = {
@@ -42,24 +43,23 @@ class RaExpectedStatus(BaseProbe):
 
     name = "ra-expected-status"
     env = "test"
+    file_glob = "*.java"
 
-    def scan(self, target: str | Path) -> list[Finding]:
+    def scan(self, target: str | Path) -> list[FindingRecord]:
         """Сканирует Java-тесты и собирает ожидаемые статус-коды."""
         target = Path(target)
-        findings: list[Finding] = []
-        for java_file in target.rglob("*.java"):
-            findings.extend(self._scan_file(java_file, target))
+        findings: list[FindingRecord] = []
+        for java_file in target.rglob(self.file_glob):
+            findings.extend(self.scan_file(java_file, target))
         return findings
 
-    def _scan_file(self, java_file: Path, base: Path) -> list[Finding]:
-        source = java_file.read_text(encoding="utf-8", errors="ignore")
+    def scan_file(self, java_file: Path, base: Path) -> FindingBatch:
         relative = java_file.relative_to(base).as_posix()
         class_name = java_file.stem
-        findings: list[Finding] = []
+        findings = self.batch(tags=["api", "status", "contract"])
 
-        try:
-            tree = javalang.parse.parse(source)
-        except javalang.parser.JavaSyntaxError:
+        tree = parse_java(java_file)
+        if tree is None:
             return findings
 
         for path, node in tree.filter(javalang.tree.MethodInvocation):
@@ -78,9 +78,7 @@ class RaExpectedStatus(BaseProbe):
                 context = _status_context(code)
                 is_success = 200 <= code < 300
 
-                findings.append(Finding(
-                    probe=self.name,
-                    env=self.env,
+                findings.add(
                     entity=f"{class_name}::{test_method or '?'}",
                     fact="expected_status",
                     data={
@@ -92,8 +90,8 @@ class RaExpectedStatus(BaseProbe):
                     },
                     location=location,
                     confidence=confidence,
-                    tags=["api", "status", "contract", context],
-                ))
+                    tags=[context],
+                )
 
         return findings
 
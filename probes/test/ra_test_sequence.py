@@ -5,8 +5,9 @@ from __future__ import annotations
 import re
 from pathlib import Path
 
-from probe.models import Finding
+from probe.models import FindingRecord
 from probes.base import BaseProbe
+from probes.source import read_source
 
 # Признак упорядоченного класса
 _RE_TEST_METHOD_ORDER = re.compile(r'@TestMethodOrder\b')
@@ -82,37 +83,34 @@ class RaTestSequence(BaseProbe):
 
     name = "ra-test-sequence"
     env = "test"
+    file_glob = "*.java"
 
-    def scan(self, target: str | Path) -> list[Finding]:
+    def scan(self, target: str | Path) -> list[FindingRecord]:
         """Сканирует Java-тесты и собирает упорядоченные последовательности."""
         target = Path(target)
-        findings: list[Finding] = []
-        for java_file in target.rglob("*.java"):
-            f = self._scan_file(java_file, target)
-            if f:
-                findings.append(f)
+        findings: list[FindingRecord] = []
+        for java_file in target.rglob(self.file_glob):
+            findings.extend(self.scan_file(java_file, target))
         return findings
 
-    def _scan_file(self, java_file: Path, base: Path) -> Finding | None:
-        source = java_file.read_text(encoding="utf-8", errors="ignore")
+    def scan_file(self, java_file: Path, base: Path) -> list[FindingRecord]:
+        source = read_source(java_file)
 
         # Только классы с @TestMethodOrder
         if not _RE_TEST_METHOD_ORDER.search(source):
-            return None
+            return []
 
         class_name = java_file.stem
         relative = java_file.relative_to(base).as_posix()
         steps_raw = _extract_ordered_steps(source)
 
         if not steps_raw:
-            return None
+            return []
 
         steps = [_build_step(o, m, body) for o, m, body, _ in steps_raw]
         workflow = _workflow_name(class_name)
 
-        return Finding(
-            probe=self.name,
-            env=self.env,
+        return [self.record(
             entity=f"workflow:{workflow}",
             fact="business_workflow",
             data={
@@ -124,4 +122,4 @@ class RaTestSequence(BaseProbe):
             location=relative,
             confidence=1.0,
             tags=["workflow", "sequence", "business-process"],
-        )
+        )]
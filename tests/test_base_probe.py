@@ -34,6 +34,11 @@ class TestBaseProbe:
         assert findings[0].probe == "test-probe"
         assert findings[0].fact == "test_fact"
 
+    def test_record(self):
+        record = ConcreteProbe().record("e", "f", {"k": 1}, location="A.java:1", tags=["x"])
+        assert record.probe == "test-probe" and record.env == "test"
+        assert record.tags == ("x",) and record.confidence == 1.0
+
     def test_repr(self):
         probe = ConcreteProbe()
         assert "test-probe" in repr(probe)
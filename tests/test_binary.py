@@ -0,0 +1,117 @@
+"""Тесты бинарного контейнера досье: round-trip, выборки по блокам, версии."""
+
+from __future__ import annotations
+
+import struct
+from datetime import datetime, timezone
+
+import pytest
+
+from probe.binary import MAGIC, BinaryDossier, write_binary
+from probe.correlator import correlate, load_findings
+from probe.models import Dossier, Finding
+from probe.storage import read_findings, write_findings
+
+TS = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _findings() -> list[Finding]:
+    return [
+        Finding(probe="census", env="test", entity="GET /a", fact="endpoint_tested",
+                data={"test_class": "ATest", "method": "GET", "n": 1, "yes": True,
+                      "f": 1.0, "params": ["id"]},
+                location="A.java:3", tags=["api", "read"], ts=TS),
+        Finding(probe="auth", env="test", entity="GET /a", fact="auth_required",
+                data={"role": "ADMIN", "test_class": "ATest", "flag": True, "none": None},
+                location="A.java", confidence=0.7, tags=["auth"], ts=TS),
+        Finding(probe="census", env="test", entity="POST /ё", fact="endpoint_tested",
+                data={"test_class": "BTest"}, location=None, tags=[],
+                ts=datetime(2026, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)),
+        Finding(probe="status", env="db", entity="ATest.x", fact="expected_status",
+                data={"status_code": 200, "test_class": "ATest", "ratio": 0.5},
+                location="C:\\src\\X.java:007", ts=TS),
+        Finding(probe="seq", env="test", entity="workflow:x", fact="business_workflow",
+                data={"steps": [{"order": 1, "action": None}]}, location="S.java:9", ts=TS),
+    ]
+
+
+def _dump(findings) -> list[dict]:
+    return [f.model_dump(mode="json") for f in findings]
+
+
+@pytest.fixture
+def container(tmp_path):
+    dossier = Dossier(target="svc", env="test", scanned_at=TS, findings=_findings())
+    return dossier, write_binary(dossier, tmp_path / "d.probe")
+
+
+class TestBinaryDossier:
+    def test_round_trip(self, container):
+        dossier, path = container
+        with BinaryDossier(path) as binary:
+            assert (binary.target, binary.env, binary.scanned_at) == ("svc", "test", TS)
+            assert len(binary) == len(binary.findings) == 5
+            assert _dump(binary.findings) == _dump(dossier.findings)
+            assert _dump(binary.to_dossier().findings) == _dump(dossier.findings)
+
+    def test_reads_only_requested_blocks(self, container):
+        dossier, path = container
+        with BinaryDossier(path) as binary:
+            assert binary.counts("probe") == dossier.counts("probe")
+            assert binary.counts("fact") == dossier.counts("fact")
+            assert binary.blocks_loaded == 0
+            assert _dump(binary.by_fact("endpoint_tested")) == \
+                _dump(dossier.by_fact("endpoint_tested"))
+            assert binary.blocks_loaded == 1
+
+    def test_query_matches_dossier(self, container):
+        dossier, path = container
+        criteria = [{"fact": ("auth_required", "expected_status")}, {"test_class": "ATest"},
+                    {"probe": "census", "tag": "read"}, {"file": "A.java"}, {"tag": "nope"}]
+        with BinaryDossier(path) as binary:
+            for query in criteria:
+                assert _dump(binary.query(**query)) == _dump(dossier.query(**query))
+            assert correlate(binary) == correlate(dossier)
+
+    def test_columnar_source(self, tmp_path, container):
+        dossier, _ = container
+        write_findings(dossier, tmp_path / "json")
+        path = write_binary(load_findings(tmp_path / "json", columnar=True), tmp_path / "c.probe")
+        with BinaryDossier(path) as binary:
+            assert _dump(binary.findings) == _dump(dossier.findings)
+
+    def test_empty(self, tmp_path):
+        path = write_binary(Dossier(target="t", env="test"), tmp_path / "e.probe")
+        with BinaryDossier(path) as binary:
+            assert len(binary) == 0 and list(binary.findings) == []
+            assert binary.counts("probe") == {}
+
+    def test_rejects_other_files(self, tmp_path, container):
+        _, path = container
+        other = tmp_path / "x.probe"
+        other.write_bytes(b"not a container at all, sorry")
+        with pytest.raises(ValueError):
+            BinaryDossier(other)
+        newer = bytearray(path.read_bytes())
+        struct.pack_into("<H", newer, len(MAGIC), 99)
+        other.write_bytes(bytes(newer))
+        with pytest.raises(ValueError, match="версия"):
+            BinaryDossier(other)
+
+
+class TestStorageIntegration:
+    def test_binary_format(self, tmp_path):
+        dossier = Dossier(target="t", env="test", findings=_findings())
+        write_findings(dossier, tmp_path)
+        path = write_findings(dossier, tmp_path, "binary")
+        assert [p.name for p in tmp_path.iterdir()] == ["test_findings.probe"]
+        assert _dump(read_findings(tmp_path)) == _dump(dossier.findings)
+        assert [f.entity for f in read_findings(path, fact="endpoint_tested",
+                                                min_confidence=0.5)] == ["GET /a", "POST /ё"]
+
+    def test_load_findings_opens_lazily(self, container):
+        _, path = container
+        dossier = load_findings(path)
+        assert isinstance(dossier, BinaryDossier) and dossier.blocks_loaded == 0
+        dossier.close()
+        assert [f.probe for f in load_findings(path, probe="auth").findings] == ["auth"]
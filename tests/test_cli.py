@@ -0,0 +1,49 @@
+"""Тесты CLI: ленивые импорты и время старта `probe`."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+
+#: Бюджет на `import probe.cli` (кумулятивно по -X importtime), микросекунды
+IMPORT_BUDGET_US = 250_000
+
+
+def _run(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, timeout=60, check=True)
+
+
+def _loaded(code: str, *modules: str) -> dict[str, bool]:
+    """Какие из ``modules`` оказались в sys.modules после ``code``."""
+    probe = f"{code}\nimport json, sys\nprint(json.dumps({{m: m in sys.modules for m in {list(modules)!r}}}))"
+    return json.loads(_run(probe).stdout.splitlines()[-1])
+
+
+def _cli(*args: str) -> str:
+    return (f"from probe.cli import cli\n"
+            f"try:\n    cli({list(args)!r})\nexcept SystemExit:\n    pass")
+
+
+class TestStartup:
+    def test_help_skips_pydantic_and_javalang(self):
+        loaded = _loaded(_cli("--help"), "pydantic", "javalang", "probe.runner", "probe.models")
+        assert not any(loaded.values()), loaded
+
+    def test_map_skips_javalang(self, tmp_path):
+        (tmp_path / "test_findings.json").write_text(json.dumps([
+            {"probe": "p", "env": "test", "entity": "GET /a", "fact": "endpoint_tested",
+             "data": {"test_class": "ATest"}},
+        ]), encoding="utf-8")
+        out = tmp_path / "map.md"
+        loaded = _loaded(_cli("map", "-f", str(tmp_path), "-o", str(out)),
+                         "javalang", "probes.base", "probe.runner")
+        assert out.exists()
+        assert not any(loaded.values()), loaded
+
+    def test_import_time_budget(self):
+        lines = _run("import probe.cli").stderr.splitlines()
+        cumulative = [int(line.split("|")[1]) for line in lines
+                      if line.rstrip().endswith("| probe.cli")]
+        assert cumulative and cumulative[0] < IMPORT_BUDGET_US
@@ -0,0 +1,113 @@
+"""Тесты колоночного досье: точность round-trip, выборки, память."""
+
+from __future__ import annotations
+
+import gc
+import json
+import tracemalloc
+from datetime import datetime, timezone
+
+from probe.columnar import ColumnarDossier
+from probe.correlator import correlate, load_findings
+from probe.models import Dossier, Finding, FindingBatch
+from probe.storage import write_findings
+
+TS = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _findings() -> list[Finding]:
+    return [
+        Finding(probe="census", env="test", entity="GET /a", fact="endpoint_tested",
+                data={"test_class": "ATest", "method": "GET"}, location="A.java:3",
+                tags=["api", "read"], ts=TS),
+        Finding(probe="auth", env="test", entity="GET /a", fact="auth_required",
+                data={"role": "ADMIN", "test_class": "ATest"}, location="A.java",
+                confidence=0.7, tags=["auth", "role:admin"], ts=TS),
+        Finding(probe="census", env="test", entity="POST /b", fact="endpoint_tested",
+                data={"test_class": "BTest", "path_params": ["id"]}, location=None,
+                tags=["api"], ts=datetime(2026, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)),
+        Finding(probe="seq", env="test", entity="workflow:x", fact="business_workflow",
+                data={"steps": [{"order": 1}]}, location="C:\\src\\X.java:007", ts=TS),
+    ]
+
+
+def _dump(findings) -> list[dict]:
+    return [f.model_dump(mode="json") for f in findings]
+
+
+class TestColumnarDossier:
+    def test_round_trip(self):
+        findings = _findings()
+        columnar = ColumnarDossier("t", "test", TS, findings)
+        assert len(columnar) == len(findings)
+        assert _dump(columnar.findings) == _dump(findings)
+        # Ключи data, которых нет в строке, не появляются
+        assert columnar.findings[0].data == {"test_class": "ATest", "method": "GET"}
+
+    def test_naive_ts_is_utc(self):
+        naive = _findings()[0].model_copy(update={"ts": datetime(2026, 1, 1, 12, 0)})
+        columnar = ColumnarDossier("t", "test", TS, [naive])
+        assert columnar.findings[0].ts == datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    def test_selections_match_dossier(self):
+        dossier = Dossier(target="t", env="test", findings=_findings())
+        columnar = ColumnarDossier.from_dossier(dossier)
+        for probe in ("census", "auth", "nope"):
+            assert _dump(columnar.by_probe(probe)) == _dump(dossier.by_probe(probe))
+        for fact in ("endpoint_tested", "business_workflow", "nope"):
+            assert _dump(columnar.by_fact(fact)) == _dump(dossier.by_fact(fact))
+        for tag in ("api", "role:admin", "nope"):
+            assert _dump(columnar.by_tag(tag)) == _dump(dossier.by_tag(tag))
+        assert correlate(columnar) == correlate(dossier)
+        assert _dump(columnar.to_dossier().findings) == _dump(dossier.findings)
+
+    def test_view_slicing_and_records(self):
+        batch = FindingBatch("p", "test", tags=["x"])
+        for i in range(5):
+            batch.add(f"e{i}", "f", {"i": i}, f"F.java:{i}")
+        columnar = ColumnarDossier("t", "test", TS, [batch])
+        view = columnar.findings[1:4]
+        assert [f.entity for f in view] == ["e1", "e2", "e3"]
+        assert view[-1].data == {"i": 3}
+        assert {f.ts for f in columnar.findings} == {TS}
+        assert columnar.findings[0] is not columnar.findings[0]
+
+    def test_load_findings_columnar(self, tmp_path):
+        write_findings(Dossier(target="t", env="test", findings=_findings()), tmp_path)
+        columnar = load_findings(tmp_path, columnar=True)
+        assert isinstance(columnar, ColumnarDossier)
+        assert columnar.env == "test"
+        assert _dump(columnar.findings) == _dump(load_findings(tmp_path).findings)
+
+    def test_memory_reduction(self):
+        rows = [{"probe": "ra-auth-patterns", "env": "test",
+                 "entity": f"POST /api/v1/movements/{i % 200}", "fact": "auth_required",
+                 "data": {"test_class": f"Test{i % 50}", "test_method": f"test{i % 30}",
+                          "status_code": 200, "role": "ADMIN"},
+                 "location": f"src/test/java/Test{i % 50}.java:{i % 700}",
+                 "tags": ["auth", "security"], "ts": TS.isoformat()} for i in range(5000)]
+        text = json.dumps(rows)
+
+        gc.collect()
+        tracemalloc.start()
+        findings = [Finding(**r) for r in json.loads(text)]
+        as_objects = tracemalloc.get_traced_memory()[0]
+        del findings
+        gc.collect()
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        columnar = ColumnarDossier("t", "test", TS, (Finding(**r) for r in json.loads(text)))
+        as_columns = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        assert len(columnar) == 5000
+        assert as_objects > 8 * as_columns
+
+    def test_query_matches_dossier(self):
+        dossier = Dossier(target="t", env="test", findings=_findings())
+        columnar = ColumnarDossier.from_dossier(dossier)
+        criteria = [{"test_class": "ATest"}, {"file": "A.java"}, {"probe": "census", "tag": "read"},
+                    {"fact": ("auth_required", "business_workflow")}]
+        for query in criteria:
+            assert _dump(columnar.query(**query)) == _dump(dossier.query(**query))
+        assert columnar.counts("fact") == dossier.counts("fact")
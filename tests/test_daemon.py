@@ -0,0 +1,168 @@
+"""Тесты демона: тёплые реестры и кэши, запросы по Unix-сокету."""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from probe.client import request
+from probe.daemon import ProbeDaemon
+from probes.source import SourceCache
+from tests.test_runner import FileProbe, WholeProbe, _make_tree
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "getuid"), reason="нужны Unix-сокеты")
+
+
+@pytest.fixture
+def sock_dir():
+    # Короткий путь: длина пути Unix-сокета ограничена ~100 байтами
+    path = Path(tempfile.mkdtemp(prefix="pd-"))
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def daemon(sock_dir):
+    discovered: list[str] = []
+
+    def discover(env: str):
+        discovered.append(env)
+        return [FileProbe(), WholeProbe()]
+
+    d = ProbeDaemon(sock_dir / "probe.sock", discover, lambda: [], max_workers=2)
+    d.discovered = discovered
+    d.start()
+    yield d
+    d.shutdown()
+
+
+class TestDaemon:
+    def test_scan_reuses_registry_and_file_cache(self, daemon, tmp_path):
+        target = tmp_path / "svc"
+        target.mkdir()
+        _make_tree(target, 4)
+        out = tmp_path / "out"
+        msg = {"op": "scan", "target": str(target), "env": "test", "out": str(out)}
+
+        first = request(daemon.socket_path, msg, timeout=10)
+        assert any("Findings: 5" in line for line in first["lines"])
+        assert daemon.files.misses == 4 and daemon.files.hits == 0
+
+        request(daemon.socket_path, msg, timeout=10)
+        assert daemon.files.hits == 4
+        assert daemon.discovered == ["test"]
+
+        (target / "T0.java").write_text("class T0 { int x; }\n", encoding="utf-8")
+        request(daemon.socket_path, msg, timeout=10)
+        assert daemon.files.misses == 5
+
+        saved = json.loads((out / "test_findings.json").read_text(encoding="utf-8"))
+        assert [f["entity"] for f in saved] == ["T0", "T1", "T2", "T3", "target"]
+
+        request(daemon.socket_path, {**msg, "format": "jsonl"}, timeout=10)
+        assert sorted(p.name for p in out.iterdir()) == \
+            ["test_findings.jsonl", "test_findings.jsonl.sha256"]
+        request(daemon.socket_path, {**msg, "format": "jsonl", "compress": "gzip"}, timeout=10)
+        assert sorted(p.name for p in out.iterdir()) == \
+            ["test_findings.jsonl.gz", "test_findings.jsonl.gz.sha256"]
+        db = tmp_path / "findings.db"
+        reply = request(daemon.socket_path, {**msg, "store": str(db)}, timeout=10)
+        assert reply["lines"][-1] == f"Findings: 5 -> {db}"
+
+    def test_map_and_analyze(self, daemon, tmp_path):
+        findings = tmp_path / "findings"
+        findings.mkdir()
+        (findings / "test_findings.json").write_text(json.dumps([
+            {"probe": "p", "env": "test", "entity": "GET /a", "fact": "endpoint_tested",
+             "data": {"test_class": "ATest"}},
+        ]), encoding="utf-8")
+        out = tmp_path / "map.md"
+        reply = request(daemon.socket_path, {"op": "map", "findings": str(findings),
+                                             "out": str(out)}, timeout=10)
+        assert reply["lines"][0] == "Загружено findings: 1"
+        assert "GET /a" in out.read_text(encoding="utf-8")
+
+        reply = request(daemon.socket_path, {"op": "analyze", "findings": str(findings),
+                                             "out": str(tmp_path / "analysis")}, timeout=10)
+        assert reply["lines"] == ["Загружено findings: 1"]
+
+    def test_error_reply(self, daemon):
+        with pytest.raises(RuntimeError):
+            request(daemon.socket_path, {"op": "nope"}, timeout=10)
+
+    def test_second_daemon_refused(self, daemon):
+        other = ProbeDaemon(daemon.socket_path, lambda env: [], lambda: [])
+        with pytest.raises(RuntimeError):
+            other.start()
+
+    def test_stale_socket_replaced(self, sock_dir):
+        path = sock_dir / "stale.sock"
+        path.write_text("")
+        d = ProbeDaemon(path, lambda env: [], lambda: [])
+        d.start()
+        try:
+            assert request(path, {"op": "stats"}, timeout=10)["op"] == "ok"
+        finally:
+            d.shutdown()
+        assert not path.exists()
+
+    def test_shutdown_request(self, sock_dir):
+        d = ProbeDaemon(sock_dir / "stop.sock", lambda env: [], lambda: [])
+        d.start()
+        reply = request(d.socket_path, {"op": "shutdown"}, timeout=10)
+        assert reply["lines"] == ["Демон остановлен"]
+        assert d._closed.wait(10)
+        assert not d.socket_path.exists()
+
+    def test_not_running(self, sock_dir):
+        with pytest.raises(ConnectionError):
+            request(sock_dir / "missing.sock", {"op": "stats"})
+
+
+class TestSourceCache:
+    def test_ast_shared_and_invalidated(self, tmp_path):
+        cache = SourceCache(maxsize=8)
+        f = tmp_path / "A.java"
+        f.write_text("class A {}\n", encoding="utf-8")
+        tree = cache.java_ast(f)
+        assert cache.java_ast(f) is tree
+
+        f.write_text("class A { int x; }\n", encoding="utf-8")
+        os.utime(f, ns=(0, 0))
+        assert cache.java_ast(f) is not tree
+
+    def test_syntax_error_is_none(self, tmp_path):
+        f = tmp_path / "Bad.java"
+        f.write_text("class {", encoding="utf-8")
+        assert SourceCache().java_ast(f) is None
+
+    def test_lru_bound(self, tmp_path):
+        cache = SourceCache(maxsize=2)
+        for i in range(5):
+            f = tmp_path / f"F{i}.java"
+            f.write_text("x", encoding="utf-8")
+            cache.source(f)
+        assert len(cache._entries) == 2
+
+
+class TestDaemonScanFile:
+    def test_scan_file_uses_cached_context(self, daemon, tmp_path):
+        target = tmp_path / "svc"
+        target.mkdir()
+        _make_tree(target, 3)
+        out = tmp_path / "out"
+        request(daemon.socket_path, {"op": "scan", "target": str(target), "env": "test",
+                                     "out": str(out)}, timeout=10)
+        msg = {"op": "scan_file", "path": str(target / "T1.java"), "target": str(target),
+               "context": str(out / "test_findings.json"), "env": None}
+
+        reply = request(daemon.socket_path, msg, timeout=10)
+        assert [f["entity"] for f in reply["impact"]["findings"]] == ["T1"]
+        first = daemon._loaded[("impact", msg["context"])][1]
+        request(daemon.socket_path, msg, timeout=10)
+        assert daemon._loaded[("impact", msg["context"])][1] is first
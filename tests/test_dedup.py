@@ -0,0 +1,52 @@
+"""Тесты дедупликации findings по отпечатку содержимого."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from probe.dedup import Deduplicator, dedup
+from probe.models import Finding
+
+TS = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _finding(entity: str = "GET /a", location: str | None = "A.java:3", **kwargs) -> Finding:
+    values = dict(probe="ra-auth-patterns", env="test", entity=entity, fact="auth_required",
+                  data={"role": "ADMIN", "test_class": "ATest"}, location=location, ts=TS)
+    values.update(kwargs)
+    return Finding(**values)
+
+
+class TestDedup:
+    def test_exact_keeps_first_occurrence(self):
+        findings = [_finding(), _finding("GET /b"), _finding(confidence=0.5),
+                    _finding(location="A.java:9"), _finding("GET /b")]
+        unique = dedup(findings)
+        assert unique == [findings[0], findings[1], findings[3]]
+        assert dedup(findings, "none") == findings
+
+    def test_exact_across_batches(self):
+        deduplicator = Deduplicator("exact")
+        assert len(deduplicator.feed([_finding(), _finding("GET /b")])) == 2
+        assert deduplicator.feed([_finding("GET /b"), _finding("GET /c")]) == \
+            [_finding("GET /c")]
+        assert deduplicator.flush() == [] and deduplicator.dropped == 1
+
+    def test_merge_collects_evidence(self):
+        findings = [_finding(), _finding("GET /b"), _finding(location="B.java:7", tags=["auth"]),
+                    _finding(location=None, confidence=0.4), _finding(location="A.java:3")]
+        merged = dedup(findings, "merge")
+        assert [f.entity for f in merged] == ["GET /a", "GET /b"]
+        first = merged[0]
+        assert first.location == "A.java:3" and first.confidence == 1.0
+        assert first.data == {"role": "ADMIN", "test_class": "ATest",
+                              "evidence": ["A.java:3", "B.java:7"]}
+        assert first.tags == ["auth"]
+        assert merged[1] is findings[1]
+        assert findings[0].data == {"role": "ADMIN", "test_class": "ATest"}
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            Deduplicator("fuzzy")
@@ -0,0 +1,95 @@
+"""Тесты diff двух сканов: ключ идентичности, разделы на диске, Diff JSON, changelog."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from click.testing import CliRunner
+
+from probe.cli import cli
+from probe.diff import diff_findings, identity
+from probe.models import Diff, Dossier, Finding
+from probe.storage import write_findings
+
+TS = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _finding(entity: str, fact: str = "endpoint_tested", location: str | None = "A.java:1",
+             **data) -> Finding:
+    return Finding(probe="p", env="test", entity=entity, fact=fact,
+                   data={"test_class": "ATest", **data}, location=location, ts=TS)
+
+
+def _scans() -> tuple[list[Finding], list[Finding]]:
+    old = [_finding("GET /a"), _finding("GET /b"),
+           _finding("GET /a", "auth_required", role="ADMIN"),
+           _finding("GET /c", location="C.java:1"), _finding("GET /c", location="C.java:9")]
+    new = [_finding("GET /a", location="A.java:5"),
+           _finding("GET /a", "auth_required", role="OPERATOR"),
+           _finding("GET /c", location="C.java:9"), _finding("POST /d", "auth_required",
+                                                              is_public=True)]
+    return old, new
+
+
+class TestDiffFindings:
+    def test_added_removed_changed(self):
+        old, new = _scans()
+        with diff_findings(old, new) as result:
+            diff = result.to_diff()
+        assert [f.entity for f in diff.added] == ["GET /a", "POST /d"]
+        assert [(f.entity, f.location) for f in diff.removed] == \
+            [("GET /b", "A.java:1"), ("GET /a", "A.java:1"), ("GET /c", "C.java:1")]
+        assert [(was.location, now.location) for was, now in diff.changed] == \
+            [("A.java:1", "A.java:5")]
+
+    def test_identity_ignores_location_and_evidence(self):
+        f = _finding("GET /a")
+        merged = _finding("GET /a", location="B.java:2", evidence=["A.java:1", "B.java:2"])
+        assert identity(f) == identity(merged) != identity(_finding("GET /b"))
+        with diff_findings([f], [merged]) as result:
+            assert result.counts == {"added": 0, "removed": 0, "changed": 1}
+
+    def test_spilled_partitions_match_memory(self, tmp_path):
+        old, new = _scans()
+        old, new = old * 40, new * 30
+        with diff_findings(old, new) as memory, diff_findings(old, new, memory=1) as disk:
+            assert disk.counts == memory.counts
+            assert disk.write_json(tmp_path / "disk.json").read_bytes() == \
+                memory.write_json(tmp_path / "memory.json").read_bytes()
+            assert disk._tmp is not None
+
+    def test_json_round_trip(self, tmp_path):
+        old, new = _scans()
+        with diff_findings(old, new) as result:
+            path = result.write_json(tmp_path / "diff.json")
+            assert Diff.model_validate_json(path.read_text(encoding="utf-8")) == \
+                result.to_diff()
+        with diff_findings([], []) as result:
+            path = result.write_json(tmp_path / "empty.json")
+            assert Diff.model_validate_json(path.read_text(encoding="utf-8")) == Diff()
+
+    def test_changelog(self):
+        old, new = _scans()
+        with diff_findings(old, new) as result:
+            changelog = result.changelog()
+        assert "## Новые эндпоинты\n\n- `POST /d` — PUBLIC" in changelog
+        assert "## Удалённые эндпоинты\n\n- `GET /b`\n" in changelog
+        assert "| `GET /a` | ADMIN | OPERATOR |" in changelog
+        assert "| auth_required | 2 | 1 | 0 |" in changelog
+        with diff_findings(old, old) as result:
+            assert "API surface не изменилась." in result.changelog()
+
+
+class TestDiffCommand:
+    def test_files(self, tmp_path):
+        old, new = _scans()
+        write_findings(Dossier(target="svc", env="test", findings=old), tmp_path / "old", "jsonl")
+        write_findings(Dossier(target="svc", env="test", findings=new), tmp_path / "new")
+        out, changelog = tmp_path / "diff.json", tmp_path / "changes.md"
+        result = CliRunner().invoke(cli, ["diff", str(tmp_path / "old"), str(tmp_path / "new"),
+                                          "-o", str(out), "-c", str(changelog)])
+        assert result.exit_code == 0, result.output
+        assert "Добавлено: 2  удалено: 3  изменено: 1" in result.output
+        diff = Diff.model_validate_json(out.read_text(encoding="utf-8"))
+        assert [f.entity for f in diff.added] == ["GET /a", "POST /d"]
+        assert changelog.read_text(encoding="utf-8").startswith("# Changelog API Surface")
@@ -0,0 +1,185 @@
+"""Тесты распределённого скана: координатор и воркеры на localhost."""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from probe.cli import coordinator, run_cmd, scan, watch_cmd
+from probe.distributed import Coordinator, _LeaseTable, pack_finding, run_worker, unpack_finding
+from probe.models import Finding
+from probe.pipeline import run_pipeline
+from probe.runner import run_probes
+from probes.base import BaseProbe
+from tests.test_runner import FileProbe, WholeProbe, _make_tree
+
+
+class DupFileProbe(BaseProbe):
+    """Пофайловый зонд с повторами: факт файла дважды и общий факт в каждом файле."""
+    name = "dup-file-probe"
+    env = "test"
+    file_glob = "*.java"
+
+    def scan(self, target) -> list[Finding]:
+        raise NotImplementedError
+
+    def scan_file(self, path: Path, base: Path) -> list[Finding]:
+        own = dict(probe=self.name, env=self.env, entity=path.stem, fact="file_seen",
+                   data={}, location=path.relative_to(base).as_posix())
+        return [Finding(**own), Finding(**own),
+                Finding(probe=self.name, env=self.env, entity="shared", fact="file_seen",
+                        data={"n": 1})]
+
+
+class DupWholeProbe(WholeProbe):
+    name = "dup-whole-probe"
+
+    def scan(self, target) -> list[Finding]:
+        return super().scan(target) * 2
+
+
+def _dup_probes(env: str = "test") -> list[BaseProbe]:
+    return [DupFileProbe(), DupWholeProbe()]
+
+
+def _key(findings: list[Finding]) -> list[tuple]:
+    return [(f.probe, f.entity, f.fact, f.location, repr(f.data)) for f in findings]
+
+
+def _start_workers(coord: Coordinator, target, count: int,
+                   discover=lambda env: [FileProbe(), WholeProbe()]) -> list[threading.Thread]:
+    threads = [
+        threading.Thread(
+            target=run_worker,
+            args=(coord.address, target, discover),
+            kwargs={"worker_id": f"w{i}"},
+        )
+        for i in range(count)
+    ]
+    for t in threads:
+        t.start()
+    return threads
+
+
+class TestPacking:
+    def test_roundtrip(self):
+        f = Finding(probe="p", env="test", entity="GET /x", fact="endpoint_tested",
+                    data={"a": [1, 2]}, location="A.java:3", confidence=0.5, tags=["api"])
+        row = json.loads(json.dumps(pack_finding(f)))
+        assert unpack_finding(row) == f
+
+
+class TestLeaseTable:
+    def test_partition(self):
+        table = _LeaseTable(5, 2, ttl=10)
+        leases = [table.acquire() for _ in range(4)]
+        assert [files for _, files in leases] == [[0, 1], [2, 3], [4], []]
+
+    def test_incomplete_lease_requeued(self):
+        table = _LeaseTable(2, 2, ttl=10)
+        lease_id, files = table.acquire()
+        assert table.add_batch(lease_id, 0, [])
+        assert not table.complete(lease_id)
+        assert table.acquire()[1] == [0, 1]
+
+    def test_expired_lease_reassigned(self):
+        table = _LeaseTable(2, 2, ttl=0.0)
+        first, files = table.acquire()
+        second, again = table.acquire()
+        assert again == files and second != first
+        assert not table.add_batch(first, 0, [])
+
+    def test_finished(self):
+        table = _LeaseTable(1, 4, ttl=10)
+        lease_id, _ = table.acquire()
+        table.add_batch(lease_id, 0, [])
+        assert table.complete(lease_id)
+        assert table.finished.is_set()
+
+
+class TestDistributedScan:
+    def test_identical_to_single_node(self, tmp_path):
+        _make_tree(tmp_path, 17)
+        probes = [FileProbe(), WholeProbe()]
+        coord = Coordinator(probes, tmp_path, "test", port=0, lease_size=3)
+        threads = _start_workers(coord, tmp_path, 3)
+        dossier = coord.run(timeout=30)
+        for t in threads:
+            t.join(timeout=10)
+
+        single = run_probes(probes, tmp_path, "test")
+        assert _key(dossier.findings) == _key(single.findings)
+
+    def test_dedup_matches_scan_and_run(self, tmp_path):
+        _make_tree(tmp_path, 7)
+        coord = Coordinator(_dup_probes(), tmp_path, "test", port=0, lease_size=2,
+                            dedup="exact")
+        threads = _start_workers(coord, tmp_path, 2, _dup_probes)
+        dossier = coord.run(timeout=30)
+        for t in threads:
+            t.join(timeout=10)
+        scanned = run_probes(_dup_probes(), tmp_path, "test", dedup="exact")
+        assert len(scanned.findings) == 7 + 1 + 1
+        assert _key(dossier.findings) == _key(scanned.findings)
+        run = run_pipeline(_dup_probes(), tmp_path, "test", dedup="exact").dossier
+        assert _key(run.findings) == _key(scanned.findings)
+
+    def test_cli_commands_dedup_by_default(self):
+        for command in (scan, run_cmd, watch_cmd, coordinator):
+            option = next(p for p in command.params if p.name == "dedup")
+            assert option.default == "exact", command.name
+
+    def test_dead_worker_lease_reassigned(self, tmp_path):
+        _make_tree(tmp_path, 6)
+        coord = Coordinator([FileProbe()], tmp_path, "test", port=0,
+                            lease_size=2, lease_ttl=0.3)
+        coord.start()
+
+        # «Зависший» воркер берёт аренду и молчит
+        dead = socket.create_connection(coord.address, timeout=10)
+        dead.sendall(b'{"op": "lease"}\n')
+        stolen = json.loads(dead.makefile("r").readline())
+        assert stolen["op"] == "lease"
+
+        threads = _start_workers(coord, tmp_path, 1)
+        dossier = coord.run(timeout=30)
+        for t in threads:
+            t.join(timeout=10)
+        dead.close()
+
+        assert sorted(f.entity for f in dossier.findings) == [f"T{i}" for i in range(6)]
+
+    def test_no_files(self, tmp_path):
+        coord = Coordinator([FileProbe(), WholeProbe()], tmp_path, "test", port=0)
+        dossier = coord.run(timeout=10)
+        assert [f.probe for f in dossier.findings] == ["whole-probe"]
+
+    def test_timeout(self, tmp_path):
+        _make_tree(tmp_path, 1)
+        coord = Coordinator([FileProbe()], tmp_path, "test", port=0)
+        with pytest.raises(TimeoutError):
+            coord.run(timeout=0.1)
+
+
+class TestWorkerSafety:
+    def test_missing_probe_rejected(self, tmp_path):
+        _make_tree(tmp_path, 2)
+        coord = Coordinator([FileProbe()], tmp_path, "test", port=0)
+        coord.start()
+        try:
+            with pytest.raises(RuntimeError):
+                run_worker(coord.address, tmp_path, lambda env: [WholeProbe()])
+        finally:
+            with pytest.raises(TimeoutError):
+                coord.run(timeout=0.1)
+
+    def test_path_outside_target_rejected(self, tmp_path):
+        from probe.distributed import _inside
+
+        assert _inside(tmp_path.resolve(), "a/B.java") == tmp_path.resolve() / "a" / "B.java"
+        with pytest.raises(ValueError):
+            _inside(tmp_path.resolve(), "../../etc/passwd")
@@ -0,0 +1,110 @@
+"""Тесты fleet-скана: манифест целей и общий пул для нескольких целей."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from probe.fleet import FleetTarget, load_targets
+from probe.runner import ScanJob, iter_dossiers, run_probes
+from tests.test_runner import FileProbe, WholeProbe, _make_tree
+
+
+class TestLoadTargets:
+    def test_text_format(self, tmp_path):
+        f = tmp_path / "targets.txt"
+        f.write_text(
+            "# сервисы\n"
+            "services/alpha\n"
+            "\n"
+            "services/beta db\n"
+            "services/gamma api out/gamma  # свой out\n",
+            encoding="utf-8",
+        )
+        targets = load_targets(f, "test", "findings")
+        assert targets == [
+            FleetTarget("services/alpha", "test", str(Path("findings") / "alpha")),
+            FleetTarget("services/beta", "db", str(Path("findings") / "beta")),
+            FleetTarget("services/gamma", "api", "out/gamma"),
+        ]
+
+    def test_json_manifest(self, tmp_path):
+        f = tmp_path / "fleet.json"
+        f.write_text(json.dumps([
+            {"target": "a/svc", "env": "test", "out": "o/a"},
+            {"target": "b/svc"},
+        ]), encoding="utf-8")
+        targets = load_targets(f, "db", "root")
+        assert targets[0] == FleetTarget("a/svc", "test", "o/a")
+        assert targets[1] == FleetTarget("b/svc", "db", str(Path("root") / "svc"))
+
+    def test_duplicate_names_get_suffix(self, tmp_path):
+        f = tmp_path / "targets.txt"
+        f.write_text("a/svc\nb/svc\n", encoding="utf-8")
+        outs = [t.out for t in load_targets(f, "test", "o")]
+        assert outs == [str(Path("o") / "svc"), str(Path("o") / "svc-2")]
+
+    def test_explicit_out_reserved(self, tmp_path):
+        f = tmp_path / "targets.txt"
+        f.write_text(f"x/svc test {Path('o') / 'svc'}\ny/svc\n", encoding="utf-8")
+        outs = [t.out for t in load_targets(f, "test", "o")]
+        assert outs == [str(Path("o") / "svc"), str(Path("o") / "svc-2")]
+
+    def test_duplicate_explicit_out(self, tmp_path):
+        f = tmp_path / "targets.txt"
+        f.write_text("a test o/x\nb test o/x\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_targets(f, "test", "o")
+
+    def test_extra_fields(self, tmp_path):
+        f = tmp_path / "targets.txt"
+        f.write_text("z/a test o b extra\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_targets(f, "test", "o")
+
+    def test_manifest_entry_not_object(self, tmp_path):
+        f = tmp_path / "fleet.json"
+        f.write_text(json.dumps(["a/svc"]), encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_targets(f, "test", "o")
+
+    def test_missing_env(self, tmp_path):
+        f = tmp_path / "targets.txt"
+        f.write_text("a/svc\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_targets(f, None, "o")
+
+
+class TestIterDossiers:
+    def test_dossier_per_target(self, tmp_path):
+        trees = []
+        for i, count in enumerate((3, 5, 0)):
+            root = tmp_path / f"svc{i}"
+            root.mkdir()
+            trees.append(_make_tree(root, count))
+        jobs = [ScanJob(probes=[FileProbe(), WholeProbe()], target=t, env="test")
+                for t in trees]
+
+        dossiers = dict(iter_dossiers(jobs, max_workers=3))
+        assert sorted(dossiers) == [0, 1, 2]
+        assert [len(dossiers[i].by_probe("file-probe")) for i in range(3)] == [3, 5, 0]
+        assert all(len(d.by_probe("whole-probe")) == 1 for d in dossiers.values())
+        assert dossiers[1].target == str(trees[1])
+
+    def test_same_as_single_scan(self, tmp_path):
+        a, b = tmp_path / "a", tmp_path / "b"
+        a.mkdir()
+        b.mkdir()
+        _make_tree(a, 4)
+        _make_tree(b, 2)
+        probes = [FileProbe()]
+        fleet = dict(iter_dossiers([ScanJob(probes, a, "test"), ScanJob(probes, b, "test")]))
+        for index, root in enumerate((a, b)):
+            single = run_probes(probes, root, "test")
+            assert [f.location for f in fleet[index].findings] == \
+                [f.location for f in single.findings]
+
+    def test_empty_job_list(self):
+        assert list(iter_dossiers([])) == []
@@ -0,0 +1,106 @@
+"""Тесты scan-file: findings одного файла и их влияние на API Surface."""
+
+from __future__ import annotations
+
+import shutil
+import time
+
+import pytest
+
+from probe.impact import ImpactContext, scan_file_impact
+from probe.models import Dossier, Finding
+from probe.runner import run_probes
+from tests.test_runner import SAMPLE_DIR
+
+AUTH_TEST = "src/test/java/AuthTest.java"
+
+
+def _finding(fact: str, entity: str, test_class: str, location: str, **data) -> Finding:
+    return Finding(probe="p", env="test", entity=entity, fact=fact,
+                   data={"test_class": test_class, **data}, location=location)
+
+
+@pytest.fixture
+def sample(tmp_path):
+    if not SAMPLE_DIR.exists():
+        pytest.skip("sample-restassured не найден")
+    from probe.cli import _discover_probes
+
+    root = tmp_path / "sample"
+    shutil.copytree(SAMPLE_DIR, root)
+    probes = _discover_probes("test")
+    return root, probes, ImpactContext(run_probes(probes, root, "test"))
+
+
+class TestImpactContext:
+    def test_counts_match_correlator_rules(self):
+        dossier = Dossier(target="t", env="test", findings=[
+            _finding("endpoint_tested", "GET /a", "ATest", "A.java:3"),
+            _finding("expected_status", "status", "ATest", "A.java:4", status_code=200),
+            _finding("endpoint_tested", "GET /a", "BTest", "B.java:3"),
+        ])
+        context = ImpactContext(dossier)
+
+        # A.java теперь ждёт 404: статусы GET /a меняются, эндпоинт остаётся (есть в B)
+        new = [_finding("endpoint_tested", "GET /a", "ATest", "A.java:3"),
+               _finding("expected_status", "status", "ATest", "A.java:4", status_code=404)]
+        impact = context.impact("A.java", new)
+        assert impact.changed_statuses == {"GET /a": (["200"], ["404"])}
+        assert not impact.added_endpoints and not impact.removed_endpoints
+
+        # B.java больше не трогает GET /a, но A.java ещё трогает
+        assert not context.impact("B.java", []).changed
+
+        # Новый файл с новым эндпоинтом
+        impact = context.impact("C.java", [_finding("auth_required", "POST /c", "CTest", "C.java:1")])
+        assert impact.added_endpoints == ["POST /c"]
+
+    def test_context_is_not_mutated(self):
+        dossier = Dossier(target="t", env="test", findings=[
+            _finding("endpoint_tested", "GET /a", "ATest", "A.java:3"),
+        ])
+        context = ImpactContext(dossier)
+        assert context.impact("A.java", []).removed_endpoints == ["GET /a"]
+        assert context.impact("A.java", []).removed_endpoints == ["GET /a"]
+
+
+class TestScanFileImpact:
+    def test_unchanged_file(self, sample):
+        root, probes, context = sample
+        impact = scan_file_impact(probes, root / AUTH_TEST, root, context)
+        assert impact.findings
+        assert not impact.changed
+
+    def test_edited_file(self, sample):
+        root, probes, context = sample
+        path = root / AUTH_TEST
+        source = path.read_text(encoding="utf-8")
+        source = source.replace('.get("/admin/users")', '.get("/admin/roles")')
+        source = source.replace(".statusCode(403)", ".statusCode(418)")
+        path.write_text(source, encoding="utf-8")
+
+        impact = scan_file_impact(probes, path, root, context)
+        assert "GET /admin/roles" in impact.added_endpoints
+        assert "GET /admin/users" in impact.removed_endpoints
+        assert impact.changed_statuses
+        assert all("418" in new for _, new in impact.changed_statuses.values())
+
+    def test_outside_target(self, sample, tmp_path):
+        root, probes, context = sample
+        outside = tmp_path / "Other.java"
+        outside.write_text("class Other {}", encoding="utf-8")
+        with pytest.raises(ValueError):
+            scan_file_impact(probes, outside, root, context)
+
+    def test_warm_latency(self, sample):
+        root, probes, context = sample
+        path = root / AUTH_TEST
+        scan_file_impact(probes, path, root, context)
+        best = float("inf")
+        for i in range(3):
+            # Каждый раз файл «изменён»: кэш AST не помогает, как в редакторе
+            path.write_text(path.read_text(encoding="utf-8") + f"\n// edit {i}\n", encoding="utf-8")
+            started = time.perf_counter()
+            scan_file_impact(probes, path, root, context)
+            best = min(best, time.perf_counter() - started)
+        assert best < 0.1
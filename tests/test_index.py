@@ -0,0 +1,79 @@
+"""Тесты инвертированных индексов досье и query()."""
+
+from __future__ import annotations
+
+import pytest
+
+from probe.index import FindingIndex
+from probe.models import Dossier, Finding, FindingRecord
+
+
+def _f(probe: str, fact: str, entity: str = "e", tags=(), **data) -> Finding:
+    location = data.pop("location", None)
+    return Finding(probe=probe, env="test", entity=entity, fact=fact, data=data,
+                   location=location, tags=list(tags))
+
+
+def _dossier() -> Dossier:
+    return Dossier(target="t", env="test", findings=[
+        _f("census", "endpoint_tested", "GET /a", ["api"], test_class="ATest", location="A.java:3"),
+        _f("auth", "auth_required", "GET /a", ["auth", "security"], role="ADMIN",
+           test_class="ATest", location="A.java:9"),
+        _f("auth", "public_endpoint", "GET /b", ["auth"], is_public=True, test_class="BTest",
+           location="B.java"),
+        _f("status", "expected_status", "ATest.x", ["api"], status_code=200, test_class="ATest"),
+    ])
+
+
+class TestFindingIndex:
+    def test_postings_are_ordered_rows(self):
+        index = FindingIndex(_dossier().findings)
+        assert list(index.rows(fact="auth_required")) == [1]
+        assert list(index.rows(tag="api")) == [0, 3]
+        assert list(index.rows(test_class="ATest")) == [0, 1, 3]
+        assert list(index.rows(file="A.java")) == [0, 1]
+        assert list(index.rows()) == [0, 1, 2, 3]
+        assert list(index.rows(entity="nope")) == []
+
+    def test_intersection_and_union(self):
+        index = FindingIndex(_dossier().findings)
+        assert list(index.rows(test_class="ATest", tag="api")) == [0, 3]
+        assert list(index.rows(fact=("auth_required", "public_endpoint"))) == [1, 2]
+        assert list(index.rows(fact=["auth_required", "public_endpoint"], file="B.java")) == [2]
+
+    def test_records_and_counts(self):
+        index = FindingIndex()
+        assert index.add(FindingRecord("p", "test", "e", "f", {}, "X.java:1", tags=("t", "t"))) == 0
+        assert index.counts("tag") == {"t": 1}
+        assert index.counts("file") == {"X.java": 1}
+
+    def test_unknown_field(self):
+        with pytest.raises(TypeError):
+            FindingIndex().rows(confidence="1.0")
+
+
+class TestDossierQuery:
+    def test_query_matches_scan(self):
+        dossier = _dossier()
+        for fact in ("endpoint_tested", "auth_required", "nope"):
+            assert dossier.by_fact(fact) == [f for f in dossier.findings if f.fact == fact]
+        assert dossier.query(probe="auth", tag="security") == [dossier.findings[1]]
+        assert dossier.counts("probe") == {"census": 1, "auth": 2, "status": 1}
+
+    def test_append_updates_index(self):
+        dossier = _dossier()
+        assert len(dossier.by_probe("auth")) == 2
+        dossier.append(_f("auth", "auth_required", "GET /c"))
+        dossier.extend([_f("auth", "auth_required", "GET /d")])
+        # Добавленное напрямую в список индекс догоняет при следующем запросе
+        dossier.findings.append(_f("auth", "auth_required", "GET /e"))
+        assert [f.entity for f in dossier.by_probe("auth")][2:] == ["GET /c", "GET /d", "GET /e"]
+
+    def test_replaced_list_is_reindexed(self):
+        dossier = _dossier()
+        assert dossier.by_fact("expected_status")
+        dossier.findings = dossier.findings[:2]
+        assert dossier.by_fact("expected_status") == []
+        dossier.findings[0] = _f("other", "expected_status")
+        dossier.reindex()
+        assert [f.probe for f in dossier.by_fact("expected_status")] == ["other"]
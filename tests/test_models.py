@@ -1,7 +1,13 @@
 """Тесты моделей данных PROBE."""
 
 import pytest
-from probe.models import Dossier, Finding, Diff
+from datetime import datetime, timezone
+
+import pickle
+
+from probe.models import (
+    Dossier, Finding, FindingBatch, FindingRecord, Diff, _finding, materialize,
+)
 
 
 def make_finding(**kwargs) -> Finding:
@@ -41,6 +47,114 @@ class TestFinding:
         assert d["tags"] == ["api", "get"]
         assert isinstance(d["ts"], str)
 
+    def test_fingerprint_is_content_only(self):
+        f = make_finding(data={"b": [1, 2], "a": "ё"}, location="A.java:3")
+        same = make_finding(data={"a": "ё", "b": (1, 2)}, location="A.java:3", env="db",
+                            confidence=0.5, tags=["x"], ts=datetime(2020, 1, 1))
+        assert f.fingerprint == same.fingerprint
+        assert len(f.fingerprint) == 32
+        assert make_finding(data={"b": [1, 2], "a": "ё"}, location="A.java:4").fingerprint \
+            != f.fingerprint
+        assert make_finding(data={"b": [2, 1], "a": "ё"}, location="A.java:3").fingerprint \
+            != f.fingerprint
+
+
+class TestFindingShortcut:
+    """_finding() обходит model_construct ради скорости и опирается на внутренности
+    pydantic; результат должен оставаться неотличим от ``model_construct``."""
+
+    FIELDS = dict(probe="p", env="test", entity="E", fact="f", data={"k": [1, 2]},
+                  location="A.java:3", confidence=0.5, tags=["t"],
+                  ts=datetime(2024, 1, 2, tzinfo=timezone.utc))
+
+    def _pair(self) -> tuple[Finding, Finding]:
+        fast = _finding(**self.FIELDS)
+        return fast, Finding.model_construct(**self.FIELDS)
+
+    def test_internal_state(self):
+        fast, built = self._pair()
+        assert fast.__dict__ == built.__dict__
+        assert list(fast.__dict__) == list(built.__dict__)
+        assert fast.model_fields_set == built.model_fields_set
+        assert fast.__pydantic_extra__ == built.__pydantic_extra__
+        assert fast.__pydantic_private__ == built.__pydantic_private__
+
+    def test_equality(self):
+        fast, built = self._pair()
+        assert fast == built and built == fast
+        assert fast == Finding(**self.FIELDS)
+
+    def test_model_dump(self):
+        fast, built = self._pair()
+        assert fast.model_dump() == built.model_dump()
+        assert fast.model_dump(exclude_unset=True) == built.model_dump(exclude_unset=True)
+        assert fast.model_dump_json() == built.model_dump_json()
+
+    def test_model_copy(self):
+        fast, built = self._pair()
+        assert fast.model_copy() == built.model_copy()
+        updated = fast.model_copy(update={"entity": "F"})
+        assert updated == built.model_copy(update={"entity": "F"})
+        assert updated.model_fields_set == built.model_fields_set
+        deep = fast.model_copy(deep=True)
+        assert deep == built and deep.data is not fast.data
+
+    def test_pickle(self):
+        fast, built = self._pair()
+        assert pickle.loads(pickle.dumps(fast)) == built
+
+
+class TestFindingRecord:
+    def test_to_finding_matches_validated(self):
+        ts = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        record = FindingRecord("p", "test", "GET /a", "endpoint_tested", {"k": 1},
+                               "A.java:3", 0.7, ("api",))
+        f = record.to_finding(ts)
+        assert isinstance(f, Finding)
+        assert f == Finding(probe="p", env="test", entity="GET /a", fact="endpoint_tested",
+                            data={"k": 1}, location="A.java:3", confidence=0.7,
+                            tags=["api"], ts=ts)
+        assert f.model_dump(mode="json")["tags"] == ["api"]
+
+    def test_materialize_shares_timestamp(self):
+        existing = make_finding()
+        records = [FindingRecord("p", "test", f"e{i}", "f", {}) for i in range(3)]
+        found = materialize([existing, *records])
+        assert found[0] is existing
+        assert len({f.ts for f in found[1:]}) == 1
+        assert all(f.tags == [] and f.location is None for f in found[1:])
+
+
+class TestFindingBatch:
+    def _batch(self) -> FindingBatch:
+        batch = FindingBatch("p", "test", tags=["api"])
+        batch.add("GET /a", "endpoint_tested", {"k": 1}, "A.java:3")
+        batch.add("POST /b", "endpoint_tested", {}, "A.java:9", 0.7, tags=["write"])
+        return batch
+
+    def test_rows_share_fields(self):
+        batch = self._batch()
+        assert len(batch) == 2
+        assert batch[1] == FindingRecord("p", "test", "POST /b", "endpoint_tested", {},
+                                         "A.java:9", 0.7, ("api", "write"))
+        assert [r.entity for r in batch] == ["GET /a", "POST /b"]
+
+    def test_to_findings_one_timestamp(self):
+        ts = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        found = materialize([self._batch()], ts)
+        assert [f.tags for f in found] == [["api"], ["api", "write"]]
+        assert all(f.ts is ts for f in found)
+        assert found[1] == self._batch()[1].to_finding(ts)
+
+    def test_pickles_smaller_than_findings(self):
+        batch = FindingBatch("ra-auth-patterns", "test", tags=["auth", "security"])
+        for i in range(100):
+            batch.add(f"GET /r/{i}", "auth_required", {"role": "ADMIN"}, f"A.java:{i}")
+        restored = pickle.loads(pickle.dumps(batch))
+        assert list(restored) == list(batch)
+        findings = materialize([batch])
+        assert len(pickle.dumps(batch)) * 2 < len(pickle.dumps(findings))
+
 
 class TestDossier:
     def test_create_empty(self):
@@ -0,0 +1,79 @@
+"""Тесты конвейера `probe run` и общего загрузчика findings."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from probe.analyzers.base import BaseAnalyzer
+from probe.analyzers.base import load_findings as load_findings_flat
+from probe.correlator import correlate, load_findings
+from probe.models import AnalysisResult
+from probe.pipeline import run_analyzers, run_pipeline
+from probe.storage import read_findings, write_findings
+from tests.test_runner import SAMPLE_DIR, FileProbe, WholeProbe, _make_tree
+
+
+class CountAnalyzer(BaseAnalyzer):
+    name = "count"
+
+    def analyze(self, findings):
+        return AnalysisResult(analyzer=self.name, data={"n": len(findings)}, summary="ok")
+
+
+class FailingAnalyzer(BaseAnalyzer):
+    name = "failing"
+
+    def analyze(self, findings):
+        raise RuntimeError("boom")
+
+
+def _facts(findings):
+    return [f.model_dump(mode="json", exclude={"ts"}) for f in findings]
+
+
+class TestRunPipeline:
+    def test_matches_scan_map_analyze(self, tmp_path):
+        target = tmp_path / "svc"
+        target.mkdir()
+        _make_tree(target, 3)
+        probes = [FileProbe(), WholeProbe()]
+        result = run_pipeline(probes, target, "test", [CountAnalyzer(), FailingAnalyzer()],
+                              map_path=tmp_path / "map.md")
+
+        saved = write_findings(result.dossier, tmp_path / "findings")
+        reloaded = load_findings(saved)
+        assert _facts(reloaded.findings) == _facts(result.dossier.findings)
+        assert (tmp_path / "map.md").read_text(encoding="utf-8") == result.product_map
+        assert result.product_map.split("\n")[3:] == correlate(reloaded).split("\n")[3:]
+        assert list(result.analyses) == ["count"]
+        assert result.analyses["count"].data == {"n": 4}
+
+    def test_sample_project(self):
+        if not SAMPLE_DIR.exists():
+            pytest.skip("sample-restassured не найден")
+        from probe.cli import _discover_analyzers, _discover_probes
+
+        result = run_pipeline(_discover_probes("test"), SAMPLE_DIR, "test", _discover_analyzers())
+        assert "## API Surface" in result.product_map
+        assert result.analyses
+
+
+class TestRunAnalyzers:
+    def test_failing_analyzer_is_skipped(self):
+        assert list(run_analyzers([FailingAnalyzer(), CountAnalyzer()], [])) == ["count"]
+
+
+class TestReadFindings:
+    def test_file_dir_and_missing(self, tmp_path):
+        rows = [{"probe": "p", "env": "db", "entity": "e", "fact": "f", "data": {}}]
+        (tmp_path / "a.json").write_text(json.dumps(rows), encoding="utf-8")
+        (tmp_path / "b.json").write_text(json.dumps(rows[0]), encoding="utf-8")
+
+        assert len(read_findings(tmp_path)) == 2
+        assert len(read_findings(tmp_path / "a.json")) == 1
+        assert read_findings(tmp_path / "missing") == []
+        # Оба прежних загрузчика — обёртки над read_findings
+        assert _facts(load_findings_flat(tmp_path)) == _facts(load_findings(tmp_path).findings)
+        assert load_findings(tmp_path).env == "db"
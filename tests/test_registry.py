@@ -0,0 +1,99 @@
+"""Тесты реестра: кэш манифеста, ленивый импорт, entry points."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from importlib import metadata
+from pathlib import Path
+
+import pytest
+
+from probe import registry
+from probe.registry import PROBE_GROUP, Registry
+from probes.base import BaseProbe
+
+ROOT = Path(__file__).parent.parent
+BUILTIN_TEST_PROBES = ["ra-assertion-rules", "ra-auth-patterns", "ra-endpoint-census",
+                       "ra-expected-status", "ra-test-sequence"]
+
+
+class PluginProbe(BaseProbe):
+    """Сторонний зонд для среды db, подключаемый через entry point."""
+    name = "plugin-probe"
+    env = "db"
+
+    def scan(self, target):
+        return []
+
+
+def _entry_points(*eps: metadata.EntryPoint):
+    def entry_points(group: str):
+        return [ep for ep in eps if ep.group == group]
+    return entry_points
+
+
+class TestRegistry:
+    def test_builtin_probes_in_discovery_order(self, tmp_path):
+        reg = Registry(tmp_path, plugins=False)
+        assert [e.name for e in reg.probe_entries("test")] == BUILTIN_TEST_PROBES
+        assert all(e.file_glob == "*.java" for e in reg.probe_entries("test"))
+        assert [e.name for e in reg.analyzer_entries()] == ["entity-model", "state-machine"]
+
+    def test_manifest_cached(self, tmp_path, monkeypatch):
+        Registry(tmp_path, plugins=False).envs()
+        assert (tmp_path / "registry.json").exists()
+
+        def fail(self):
+            raise AssertionError("манифест должен читаться из кэша")
+
+        monkeypatch.setattr(Registry, "_build", fail)
+        assert Registry(tmp_path, plugins=False).envs() == ["test"]
+
+    def test_manifest_rebuilt_on_change(self, tmp_path, monkeypatch):
+        Registry(tmp_path, plugins=False).envs()
+        builds = []
+        original = Registry._build
+        monkeypatch.setattr(Registry, "_build", lambda self: builds.append(1) or original(self))
+        monkeypatch.setattr(Registry, "_stamp", lambda self: ["changed"])
+        Registry(tmp_path, plugins=False).envs()
+        assert builds == [1]
+
+    def test_select_by_name(self, tmp_path):
+        reg = Registry(tmp_path, plugins=False)
+        probes = reg.probes("test", ["ra-test-sequence", "ra-auth-patterns"])
+        assert [p.name for p in probes] == ["ra-test-sequence", "ra-auth-patterns"]
+        with pytest.raises(LookupError):
+            reg.probes("test", ["nope"])
+
+    def test_unknown_env(self, tmp_path):
+        with pytest.raises(KeyError):
+            Registry(tmp_path, plugins=False).probe_entries("infra")
+
+    def test_entry_point_plugin(self, tmp_path, monkeypatch):
+        ep = metadata.EntryPoint(name="plugin-probe", value=f"{__name__}:PluginProbe",
+                                 group=PROBE_GROUP)
+        broken = metadata.EntryPoint(name="broken", value="no_such_module:Probe",
+                                     group=PROBE_GROUP)
+        monkeypatch.setattr(registry.metadata, "entry_points", _entry_points(ep, broken))
+        reg = Registry(tmp_path)
+        assert reg.envs() == ["db", "test"]
+        [probe] = reg.probes("db")
+        assert isinstance(probe, PluginProbe)
+
+    def test_only_selected_module_imported(self, tmp_path):
+        env = {**os.environ, "PROBE_CACHE_DIR": str(tmp_path)}
+        code = (
+            "import sys\n"
+            "from probe.registry import Registry\n"
+            "Registry(plugins=False).envs()\n"
+            "for m in [m for m in sys.modules if m.startswith(('probes', 'javalang'))]:\n"
+            "    del sys.modules[m]\n"
+            "probes = Registry(plugins=False).probes('test', ['ra-test-sequence'])\n"
+            "loaded = sorted(m for m in sys.modules if m.startswith('probes.test.'))\n"
+            "print(loaded, 'javalang' in sys.modules)\n"
+        )
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                             capture_output=True, text=True, check=True).stdout
+        assert out.strip() == "['probes.test.ra_test_sequence'] False"
@@ -0,0 +1,427 @@
+"""Тесты runner: iter_findings, progress-callback, run_probes."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from probe import runner
+from probe.models import Finding, FindingBatch, FindingRecord
+from probe.runner import (
+    ScanBatch,
+    ScanJob,
+    ScanProgress,
+    collect_files,
+    is_free_threaded,
+    iter_dossiers,
+    iter_findings,
+    resolve_executor,
+    run_probes,
+    stream_findings,
+)
+from probes.base import BaseProbe
+
+
+class FileProbe(BaseProbe):
+    """Пофайловый зонд: один finding на каждый .java-файл."""
+    name = "file-probe"
+    env = "test"
+    file_glob = "*.java"
+
+    def scan(self, target) -> list[Finding]:
+        base = Path(target)
+        return [f for p in sorted(base.rglob(self.file_glob)) for f in self.scan_file(p, base)]
+
+    def scan_file(self, path: Path, base: Path) -> list[Finding]:
+        return [Finding(probe=self.name, env=self.env, entity=path.stem,
+                        fact="file_seen", data={},
+                        location=path.relative_to(base).as_posix())]
+
+
+class WholeProbe(BaseProbe):
+    """Зонд без пофайлового контракта."""
+    name = "whole-probe"
+    env = "test"
+
+    def scan(self, target) -> list[Finding]:
+        return [Finding(probe=self.name, env=self.env, entity="target",
+                        fact="target_seen", data={})]
+
+
+class BrokenProbe(BaseProbe):
+    name = "broken-probe"
+    env = "test"
+    file_glob = "*.java"
+
+    def scan(self, target) -> list[Finding]:
+        raise RuntimeError("boom")
+
+    def scan_file(self, path: Path, base: Path) -> list[Finding]:
+        raise RuntimeError("boom")
+
+
+class CrashingProbe(FileProbe):
+    """Роняет процесс-воркер на файле ``crash_on``; findings помечают, где они сделаны."""
+    name = "crashing-probe"
+
+    def __init__(self, parent_pid: int, crash_on: str) -> None:
+        self.parent_pid = parent_pid
+        self.crash_on = crash_on
+
+    def scan_file(self, path: Path, base: Path) -> list[Finding]:
+        in_worker = os.getpid() != self.parent_pid
+        if in_worker and path.stem == self.crash_on:
+            os._exit(1)
+        return [f.model_copy(update={"data": {"in_worker": in_worker}})
+                for f in super().scan_file(path, base)]
+
+
+class _RecordingProcessPool(ProcessPoolExecutor):
+    """Пул процессов, который запоминает вызовы shutdown()."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.shutdowns = 0
+
+    def shutdown(self, *args, **kwargs) -> None:
+        self.shutdowns += 1
+        super().shutdown(*args, **kwargs)
+
+
+def _make_tree(tmp_path: Path, count: int = 5) -> Path:
+    for i in range(count):
+        (tmp_path / f"T{i}.java").write_text(f"class T{i} {{}}\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("не java", encoding="utf-8")
+    return tmp_path
+
+
+class TestCollectFiles:
+    def test_only_declared_globs(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        files = collect_files([FileProbe()], tmp_path)
+        assert [f.name for f in files] == ["T0.java", "T1.java", "T2.java"]
+
+    def test_no_file_probes(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        assert collect_files([WholeProbe()], tmp_path) == []
+
+
+class TestIterFindings:
+    def test_yields_per_file_batches(self, tmp_path):
+        _make_tree(tmp_path, 4)
+        batches = list(iter_findings([FileProbe()], tmp_path, max_workers=2))
+        assert all(isinstance(b, ScanBatch) for b in batches)
+        assert sorted(b.path for b in batches) == [f"T{i}.java" for i in range(4)]
+        assert all(len(b.findings) == 1 for b in batches)
+
+    def test_whole_probe_single_batch(self, tmp_path):
+        _make_tree(tmp_path, 2)
+        batches = list(iter_findings([WholeProbe(), FileProbe()], tmp_path))
+        whole = [b for b in batches if b.path is None]
+        assert len(whole) == 1
+        assert whole[0].findings[0].fact == "target_seen"
+
+    def test_progress_callback(self, tmp_path):
+        _make_tree(tmp_path, 6)
+        snapshots: list[tuple[int, int, int]] = []
+
+        def on_progress(state: ScanProgress) -> None:
+            snapshots.append((state.files_done, state.files_total, state.findings))
+
+        list(iter_findings([FileProbe()], tmp_path, max_workers=1, progress=on_progress))
+        assert len(snapshots) == 6
+        assert snapshots[-1] == (6, 6, 6)
+        assert [s[0] for s in snapshots] == sorted(s[0] for s in snapshots)
+
+    def test_progress_bytes(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        states: list[ScanProgress] = []
+        list(iter_findings([FileProbe()], tmp_path, progress=states.append))
+        final = states[-1]
+        assert final.bytes_total > 0
+        assert final.bytes_done == final.bytes_total
+        assert final.findings_per_sec >= 0
+
+    def test_broken_probe_does_not_stop_scan(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        batches = list(iter_findings([BrokenProbe(), FileProbe()], tmp_path))
+        assert sum(len(b.findings) for b in batches) == 3
+
+    def test_early_close(self, tmp_path):
+        _make_tree(tmp_path, 50)
+        gen = iter_findings([FileProbe()], tmp_path, max_workers=2)
+        first = next(gen)
+        gen.close()
+        assert len(first.findings) == 1
+
+
+class TestRunProbes:
+    def test_deterministic_order(self, tmp_path):
+        _make_tree(tmp_path, 10)
+        dossier = run_probes([FileProbe(), WholeProbe()], tmp_path, "test", max_workers=4)
+        assert [f.probe for f in dossier.findings] == ["file-probe"] * 10 + ["whole-probe"]
+        assert [f.entity for f in dossier.findings[:10]] == [f"T{i}" for i in range(10)]
+
+    def test_matches_sequential_scan(self, tmp_path):
+        _make_tree(tmp_path, 7)
+        probe = FileProbe()
+        dossier = run_probes([probe], tmp_path, "test")
+        assert [f.location for f in dossier.findings] == \
+            [f.location for f in probe.scan(tmp_path)]
+
+    def test_records_become_findings(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        dossier = run_probes([RecordProbe()], tmp_path, "test")
+        assert all(isinstance(f, Finding) for f in dossier.findings)
+        assert [f.tags for f in dossier.findings] == [["java"]] * 6
+        # Метка одна на скан и совпадает с меткой досье
+        assert {f.ts for f in dossier.findings} == {dossier.scanned_at}
+
+    def test_batches_across_processes(self, tmp_path):
+        _make_tree(tmp_path, 4)
+        probes = [BatchProbe(), RecordProbe()]
+        by_thread = run_probes(probes, tmp_path, "test", executor="thread")
+        by_process = run_probes(probes, tmp_path, "test", max_workers=2, executor="process")
+        assert _fingerprint(by_process.findings) == _fingerprint(by_thread.findings)
+        assert [f.tags for f in by_thread.findings[:2]] == [["java", "batch"], ["java"]]
+
+
+class TestStreamFindings:
+    def test_file_order_then_whole_probes(self, tmp_path):
+        _make_tree(tmp_path, 12)
+        chunks = list(stream_findings([WholeProbe(), FileProbe()], tmp_path, max_workers=4))
+        assert [len(c) for c in chunks] == [1] * 13
+        flat = [f for chunk in chunks for f in chunk]
+        files = [p.stem for p in sorted(tmp_path.glob("*.java"))]
+        assert [f.entity for f in flat] == files + ["target"]
+
+    def test_same_findings_as_run_probes(self, tmp_path):
+        _make_tree(tmp_path, 6)
+        probes = [RecordProbe(), FileProbe()]
+        streamed = [f for chunk in stream_findings(probes, tmp_path) for f in chunk]
+        dossier = run_probes(probes, tmp_path, "test")
+        assert sorted(_fingerprint(streamed)) == sorted(_fingerprint(dossier.findings))
+        # Внутри файла — порядок зондов
+        assert [f.probe for f in streamed[:3]] == ["record-probe", "record-probe", "file-probe"]
+
+    def test_dedup(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        probes = [FileProbe(), WholeProbe(), WholeProbe()]
+        streamed = [f for chunk in stream_findings(probes, tmp_path, dedup="exact")
+                    for f in chunk]
+        dossier = run_probes(probes, tmp_path, "test", dedup="exact")
+        assert [f.entity for f in streamed] == [f.entity for f in dossier.findings[:3]] + \
+            ["target"]
+        assert len(dossier.findings) == 4
+        assert len(run_probes(probes, tmp_path, "test").findings) == 5
+
+
+class RecordProbe(BaseProbe):
+    """Пофайловый зонд на FindingRecord: два факта на файл."""
+    name = "record-probe"
+    env = "test"
+    file_glob = "*.java"
+
+    def scan(self, target) -> list[FindingRecord]:
+        raise NotImplementedError
+
+    def scan_file(self, path: Path, base: Path) -> list[FindingRecord]:
+        location = path.relative_to(base).as_posix()
+        return [self.record(path.stem, fact, {}, location, tags=["java"])
+                for fact in ("file_seen", "file_named")]
+
+
+class BatchProbe(RecordProbe):
+    """Тот же вывод, что у RecordProbe, но одним FindingBatch на файл."""
+    name = "batch-probe"
+
+    def scan_file(self, path: Path, base: Path) -> FindingBatch:
+        batch = self.batch(tags=["java"])
+        location = path.relative_to(base).as_posix()
+        batch.add(path.stem, "file_seen", {}, location, tags=["batch"])
+        batch.add(path.stem, "file_named", {}, location)
+        return batch
+
+
+class AsyncProbe(BaseProbe):
+    """I/O-bound зонд: много «запросов» под общим семафором."""
+    name = "async-probe"
+    env = "api"
+
+    def __init__(self, requests: int = 50) -> None:
+        self.requests = requests
+        self.in_flight = 0
+        self.peak = 0
+
+    async def scan_async(self, target, limiter: asyncio.Semaphore) -> list[Finding]:
+        async def request(i: int) -> Finding:
+            async with limiter:
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                await asyncio.sleep(0.001)
+                self.in_flight -= 1
+            return Finding(probe=self.name, env=self.env, entity=f"GET /r/{i}",
+                           fact="endpoint_alive", data={"i": i})
+
+        return list(await asyncio.gather(*(request(i) for i in range(self.requests))))
+
+
+class FailingAsyncProbe(BaseProbe):
+    name = "failing-async"
+    env = "api"
+
+    async def scan_async(self, target, limiter: asyncio.Semaphore) -> list[Finding]:
+        raise RuntimeError("connection refused")
+
+
+class TestAsyncProbes:
+    def test_is_async(self):
+        assert AsyncProbe().is_async
+        assert not FileProbe().is_async
+
+    def test_async_only_probe_runs_standalone(self, tmp_path):
+        probe = AsyncProbe(requests=4)
+        assert len(probe.scan(tmp_path)) == 4
+
+    def test_probe_without_scan_rejected(self):
+        class Empty(BaseProbe):
+            name = "empty"
+
+        with pytest.raises(TypeError):
+            Empty()
+
+    def test_async_and_sync_mixed(self, tmp_path):
+        _make_tree(tmp_path, 3)
+        dossier = run_probes([AsyncProbe(), FileProbe()], tmp_path, "test")
+        assert len(dossier.by_probe("async-probe")) == 50
+        assert len(dossier.by_probe("file-probe")) == 3
+
+    def test_semaphore_limits_concurrency(self, tmp_path):
+        probe = AsyncProbe(requests=100)
+        dossier = run_probes([probe], tmp_path, "api", max_concurrency=5)
+        assert len(dossier.findings) == 100
+        assert 1 <= probe.peak <= 5
+
+    def test_async_error_is_logged(self, tmp_path):
+        dossier = run_probes([FailingAsyncProbe(), AsyncProbe(3)], tmp_path, "api")
+        assert len(dossier.findings) == 3
+
+    def test_async_order_in_dossier(self, tmp_path):
+        _make_tree(tmp_path, 2)
+        dossier = run_probes([FileProbe(), AsyncProbe(2)], tmp_path, "test")
+        assert [f.probe for f in dossier.findings] == \
+            ["file-probe", "file-probe", "async-probe", "async-probe"]
+
+
+SAMPLE_DIR = Path(__file__).parent.parent / "examples" / "sample-restassured"
+
+
+def _fingerprint(findings: list[Finding]) -> list[tuple]:
+    return [(f.probe, f.entity, f.fact, f.location, repr(f.data)) for f in findings]
+
+
+class TestExecutors:
+    def test_resolve_explicit(self):
+        assert resolve_executor("thread") == "thread"
+        assert resolve_executor("process") == "process"
+
+    def test_resolve_unknown(self):
+        with pytest.raises(ValueError):
+            resolve_executor("fibers")
+
+    def test_auto_free_threaded_prefers_threads(self, monkeypatch):
+        monkeypatch.setattr(sys, "_is_gil_enabled", lambda: False, raising=False)
+        assert is_free_threaded()
+        assert resolve_executor("auto") == "thread"
+
+    def test_auto_with_gil_stays_on_threads(self, monkeypatch):
+        monkeypatch.setattr(sys, "_is_gil_enabled", lambda: True, raising=False)
+        assert not is_free_threaded()
+        assert resolve_executor("auto") == "thread"
+
+    def test_crashed_worker_task_fails_rest_retried_in_processes(self, tmp_path, caplog):
+        _make_tree(tmp_path, 8)
+        dossier = run_probes([CrashingProbe(os.getpid(), "T3")], tmp_path, "test",
+                             max_workers=1, executor="process")
+        assert [f.entity for f in dossier.findings] == [f"T{i}" for i in range(8) if i != 3]
+        assert all(f.data["in_worker"] for f in dossier.findings)
+        assert "Пул воркеров сломан" in caplog.text
+        assert "[T3.java] ошибка: воркер упал" in caplog.text
+
+    def test_broken_caller_pool_is_not_shut_down(self, tmp_path):
+        _make_tree(tmp_path, 6)
+        job = ScanJob(probes=[CrashingProbe(os.getpid(), "T2")], target=tmp_path, env="test")
+        with _RecordingProcessPool(max_workers=1) as pool:
+            (_, dossier), = iter_dossiers([job], max_workers=1, pool=pool)
+            assert pool.shutdowns == 0
+        assert [f.entity for f in dossier.findings] == ["T0", "T1", "T3", "T4", "T5"]
+
+    def test_process_matches_thread(self, tmp_path):
+        _make_tree(tmp_path, 6)
+        probes = [FileProbe(), WholeProbe()]
+        by_thread = run_probes(probes, tmp_path, "test", executor="thread")
+        by_process = run_probes(probes, tmp_path, "test", max_workers=2, executor="process")
+        assert _fingerprint(by_process.findings) == _fingerprint(by_thread.findings)
+
+    def test_warm_modules(self):
+        modules = runner._warm_modules([FileProbe(), WholeProbe()])
+        assert modules == ("javalang", __name__)
+
+    def test_worker_buffers_drain_snapshot(self):
+        buffers = runner._WorkerBuffers()
+        buffers.run(0, 0, lambda: [1])
+        drained = buffers.drain(0)
+        assert next(drained) == (0, [1])
+        # Регистрация нового буфера во время drain не ломает итерацию
+        threading.Thread(target=buffers.run, args=(1, 0, lambda: [2])).start()
+        assert list(drained) == []
+
+    def test_worker_buffers_merge(self):
+        buffers = runner._WorkerBuffers()
+        assert buffers.run(0, 1, lambda: [1, 2]) == 2
+        assert buffers.run(0, 0, lambda: [3]) == 1
+        assert buffers.run(1, 0, lambda: [4]) == 1
+        assert sorted(buffers.drain(0)) == [(0, [3]), (1, [1, 2])]
+        assert list(buffers.drain(0)) == []
+        assert list(buffers.drain(1)) == [(0, [4])]
+
+
+class TestFreeThreadedStress:
+    """Зонды без общего изменяемого состояния: результат потоков = последовательный.
+
+    На сборке без GIL тест реально гоняет парсинг параллельно; с GIL проверяет
+    ту же детерминированность слияния буферов.
+    """
+
+    def test_real_probes_many_threads(self, tmp_path):
+        if not SAMPLE_DIR.exists():
+            pytest.skip("sample-restassured не найден")
+        from probe.cli import _discover_probes
+
+        for i in range(6):
+            shutil.copytree(SAMPLE_DIR, tmp_path / f"copy{i:02d}")
+        probes = _discover_probes("test")
+        state_before = [dict(vars(p)) for p in probes]
+
+        expected = [f for p in probes for f in sorted(
+            p.scan(tmp_path), key=lambda f: f.location.split(":")[0])]
+        for _ in range(2):
+            dossier = run_probes(probes, tmp_path, "test", max_workers=16, executor="thread")
+            assert _fingerprint(dossier.findings) == _fingerprint(expected)
+
+        assert [dict(vars(p)) for p in probes] == state_before
+
+
+class TestErrorLabels:
+    def test_pool_failure_logs_probe_name(self, tmp_path, caplog, monkeypatch):
+        monkeypatch.setattr(runner, "_run_one", lambda probe, target: 1 / 0)
+        run_probes([WholeProbe()], tmp_path, "test")
+        assert "[whole-probe]" in caplog.text
+        assert "[None]" not in caplog.text
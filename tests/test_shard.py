@@ -0,0 +1,87 @@
+"""Тесты шардирования скана и k-way слияния шардов."""
+
+from __future__ import annotations
+
+import shutil
+
+import pytest
+
+from probe.models import Finding
+from probe.runner import collect_files, run_probes
+from probe.shard import merge_findings, parse_shard, shard_of
+from tests.test_runner import SAMPLE_DIR, FileProbe, WholeProbe, _fingerprint, _make_tree
+
+
+class TestParseShard:
+    def test_valid(self):
+        assert parse_shard("0/1") == (0, 1)
+        assert parse_shard("3/4") == (3, 4)
+
+    @pytest.mark.parametrize("spec", ["4/4", "1/0", "a/2", "2", "-1/3", "1/2/3"])
+    def test_invalid(self, spec):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+
+class TestShardOf:
+    def test_stable(self):
+        # CRC32 не зависит от PYTHONHASHSEED и процесса
+        assert shard_of("src/FooTest.java", 7) == shard_of("src/FooTest.java", 7)
+        assert shard_of("src/FooTest.java", 1) == 0
+
+    def test_shards_partition_files(self, tmp_path):
+        _make_tree(tmp_path, 40)
+        probes = [FileProbe(), WholeProbe()]
+        per_shard = [run_probes(probes, tmp_path, "test", shard=(i, 4)) for i in range(4)]
+        seen = [f.location for d in per_shard for f in d.by_probe("file-probe")]
+        assert sorted(seen) == sorted(
+            f.relative_to(tmp_path).as_posix() for f in collect_files(probes, tmp_path))
+        assert len(seen) == len(set(seen))
+        # Целый зонд — только в шарде 0
+        assert [len(d.by_probe("whole-probe")) for d in per_shard] == [1, 0, 0, 0]
+
+
+class TestMergeFindings:
+    def test_merge_matches_unsharded(self, tmp_path):
+        root = tmp_path / "tree"
+        (root / "a").mkdir(parents=True)
+        (root / "a-b").mkdir()
+        _make_tree(root / "a", 6)
+        _make_tree(root / "a-b", 6)
+        _make_tree(root, 6)
+        probes = [FileProbe(), WholeProbe()]
+        full = run_probes(probes, root, "test")
+        shards = [run_probes(probes, root, "test", shard=(i, 3)).findings for i in range(3)]
+        merged = list(merge_findings(shards, [p.name for p in probes]))
+        assert _fingerprint(merged) == _fingerprint(full.findings)
+
+    def test_real_probes(self, tmp_path):
+        if not SAMPLE_DIR.exists():
+            pytest.skip("sample-restassured не найден")
+        from probe.cli import _discover_probes
+
+        for i in range(3):
+            shutil.copytree(SAMPLE_DIR, tmp_path / f"copy{i}")
+        probes = _discover_probes("test")
+        full = run_probes(probes, tmp_path, "test")
+        shards = [run_probes(probes, tmp_path, "test", shard=(i, 5)).findings
+                  for i in range(5)]
+        merged = list(merge_findings(shards, [p.name for p in probes]))
+        assert _fingerprint(merged) == _fingerprint(full.findings)
+
+    def test_dedup_ignores_ts(self):
+        def finding(entity: str, line: int) -> Finding:
+            return Finding(probe="p", env="test", entity=entity, fact="f",
+                           data={"x": 1}, location=f"A.java:{line}")
+
+        a = [finding("e1", 1), finding("e2", 2)]
+        b = [finding("e2", 2), finding("e3", 3)]
+        merged = list(merge_findings([a, b], ["p"]))
+        assert [f.entity for f in merged] == ["e1", "e2", "e3"]
+
+    def test_unknown_probes_after_known(self):
+        def finding(probe: str) -> Finding:
+            return Finding(probe=probe, env="test", entity="e", fact="f", data={})
+
+        merged = list(merge_findings([[finding("z")], [finding("b")], [finding("a")]], ["z"]))
+        assert [f.probe for f in merged] == ["z", "a", "b"]
@@ -0,0 +1,313 @@
+"""Тесты хранения findings: форматы json и jsonl, сжатие, потоковая запись, чтение."""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import lzma
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+from probe.analyzers.base import load_findings as load_findings_flat
+from probe.correlator import load_findings
+from probe.models import Dossier, Finding
+from probe.storage import (
+    FindingsWriter,
+    _pieces,
+    _piece_lines,
+    checksum_path,
+    file_format,
+    findings_path,
+    iter_finding_batches,
+    read_findings,
+    resolve_format,
+    verify_checksum,
+    write_findings,
+)
+
+TS = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _dossier(count: int = 3) -> Dossier:
+    return Dossier(target="t", env="test", findings=[
+        Finding(probe="p", env="test", entity=f"Сущность {i}", fact="f",
+                data={"i": i, "nested": {"ok": True, "list": [1, None]}},
+                location=f"A.java:{i}", tags=["x"], ts=TS)
+        for i in range(count)
+    ])
+
+
+def _dump(findings) -> list[dict]:
+    return [f.model_dump(mode="json") for f in findings]
+
+
+class TestWriteFindings:
+    @pytest.mark.parametrize("count", [0, 1, 3])
+    def test_json_unchanged(self, tmp_path, count):
+        dossier = _dossier(count)
+        out_file = write_findings(dossier, tmp_path)
+        assert out_file == tmp_path / "test_findings.json"
+        assert out_file.read_text(encoding="utf-8") == json.dumps(
+            _dump(dossier.findings), ensure_ascii=False, indent=2)
+
+    def test_jsonl_round_trip(self, tmp_path):
+        dossier = _dossier()
+        out_file = write_findings(dossier, tmp_path, "jsonl")
+        lines = out_file.read_text(encoding="utf-8").splitlines()
+        assert out_file.suffix == ".jsonl" and len(lines) == 3
+        assert "  " not in lines[0] and "Сущность" in lines[0]
+        assert _dump(read_findings(out_file)) == _dump(dossier.findings)
+        assert _dump(read_findings(tmp_path)) == _dump(dossier.findings)
+
+    def test_other_format_replaced(self, tmp_path):
+        write_findings(_dossier(), tmp_path)
+        write_findings(_dossier(), tmp_path, "jsonl")
+        assert sorted(p.name for p in tmp_path.iterdir()) == \
+            ["test_findings.jsonl", "test_findings.jsonl.sha256"]
+        assert len(read_findings(tmp_path)) == 3
+
+    def test_directory_with_both_formats(self, tmp_path):
+        write_findings(_dossier(2), tmp_path / "a", "jsonl")
+        (tmp_path / "a" / "other.json").write_text(
+            json.dumps(_dump(_dossier(1).findings)), encoding="utf-8")
+        assert len(read_findings(tmp_path / "a")) == 3
+
+
+class TestFindingsWriter:
+    def test_streams_batches(self, tmp_path):
+        path = findings_path(tmp_path, "test", "jsonl")
+        with FindingsWriter(path, "jsonl") as writer:
+            writer.write(_dossier(2).findings)
+            writer.write(iter(_dossier(1).findings))
+            assert not path.exists()
+        assert writer.count == 3
+        assert len(read_findings(path)) == 3
+
+    def test_error_keeps_previous_file(self, tmp_path):
+        path = write_findings(_dossier(1), tmp_path, "jsonl")
+        with pytest.raises(RuntimeError):
+            with FindingsWriter(path, "jsonl") as writer:
+                writer.write(_dossier(5).findings)
+                raise RuntimeError("скан прерван")
+        assert len(read_findings(path)) == 1
+        assert sorted(p.name for p in tmp_path.iterdir()) == \
+            ["test_findings.jsonl", "test_findings.jsonl.sha256"]
+
+    def test_unknown_format(self, tmp_path):
+        with pytest.raises(ValueError):
+            FindingsWriter(tmp_path / "x", "xml")
+
+
+class TestCompressedFindings:
+    @pytest.mark.parametrize("fmt", ["json", "jsonl"])
+    @pytest.mark.parametrize("compress,opener", [("gzip", gzip.open), ("xz", lzma.open)])
+    def test_round_trip(self, tmp_path, fmt, compress, opener):
+        dossier = _dossier()
+        out_file = write_findings(dossier, tmp_path, fmt, compress)
+        assert out_file == findings_path(tmp_path, "test", fmt, compress)
+        assert out_file.name.endswith({"gzip": ".gz", "xz": ".xz"}[compress])
+        with opener(out_file, "rt", encoding="utf-8") as fh:
+            plain = fh.read()
+        assert plain == write_findings(dossier, tmp_path / "plain", fmt).read_text(
+            encoding="utf-8")
+        assert _dump(read_findings(out_file)) == _dump(dossier.findings)
+        assert _dump(read_findings(tmp_path)) == _dump(dossier.findings)
+        assert [f.entity for f in read_findings(tmp_path, fact="f", min_confidence=0.5)] == \
+            [f.entity for f in dossier.findings]
+        assert len(load_findings(tmp_path, columnar=True)) == 3
+
+    def test_replaces_other_formats(self, tmp_path):
+        write_findings(_dossier(), tmp_path, "jsonl")
+        write_findings(_dossier(), tmp_path, "json", "xz")
+        assert sorted(p.name for p in tmp_path.iterdir()) == \
+            ["test_findings.json.xz", "test_findings.json.xz.sha256"]
+        write_findings(_dossier(1), tmp_path, "jsonl", "gzip")
+        assert sorted(p.name for p in tmp_path.iterdir()) == \
+            ["test_findings.jsonl.gz", "test_findings.jsonl.gz.sha256"]
+        write_findings(_dossier(2), tmp_path)
+        assert sorted(p.name for p in tmp_path.iterdir()) == \
+            ["test_findings.json", "test_findings.json.sha256"]
+
+    def test_file_format(self):
+        assert file_format("a/test_findings.jsonl.gz") == ("jsonl", "gzip")
+        assert file_format("test_findings.json.xz") == ("json", "xz")
+        assert file_format("test_findings.probe") == ("binary", None)
+        assert file_format("test_findings.probe.gz") is None
+        assert file_format("notes.txt.gz") is None
+
+    def test_binary_not_compressed(self, tmp_path):
+        with pytest.raises(ValueError):
+            write_findings(_dossier(), tmp_path, "binary", "gzip")
+        with pytest.raises(ValueError):
+            FindingsWriter(tmp_path / "x.json.zst", "json", "zstd")
+
+
+class TestResolveFormat:
+    def test_auto_by_files(self):
+        assert resolve_format("auto", 10) == "json"
+        assert resolve_format("auto", 100_000) == "jsonl"
+        assert resolve_format("json", 100_000) == "json"
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            resolve_format("yaml", 1)
+
+
+def _rows() -> list[dict]:
+    return [
+        {"probe": "census", "env": "db", "entity": "GET /a", "fact": "endpoint_tested",
+         "data": {"n": 1.5, "s": "a]}\"b"}, "confidence": 0.9},
+        {"probe": "auth", "env": "db", "entity": "GET /a", "fact": "auth_required",
+         "data": {"role": "ADMIN"}, "confidence": 0.4},
+        {"probe": "census", "env": "db", "entity": "GET /b", "fact": "endpoint_tested",
+         "data": {}, "tags": ["ÿ"]},
+    ]
+
+
+class TestIterFindingBatches:
+    @pytest.fixture(params=["json", "json-compact", "jsonl"])
+    def findings_file(self, request, tmp_path, monkeypatch):
+        # Маленький буфер: элементы массива и числа рвутся на границах чтения
+        monkeypatch.setattr("probe.storage._READ_CHUNK", 7)
+        if request.param == "jsonl":
+            path = tmp_path / "f.jsonl"
+            path.write_text("".join(json.dumps(r) + "\n\n" for r in _rows()), encoding="utf-8")
+        else:
+            path = tmp_path / "f.json"
+            indent = 2 if request.param == "json" else None
+            path.write_text(json.dumps(_rows(), indent=indent, ensure_ascii=False),
+                            encoding="utf-8")
+        return path
+
+    def test_streams_all_rows(self, findings_file):
+        batches = list(iter_finding_batches(findings_file, batch_size=2))
+        assert [len(b) for b in batches] == [2, 1]
+        found = [f for b in batches for f in b]
+        assert [f.entity for f in found] == ["GET /a", "GET /a", "GET /b"]
+        assert found[0].data == {"n": 1.5, "s": 'a]}"b'}
+        assert found[2].tags == ["ÿ"]
+
+    def test_filters(self, findings_file):
+        def entities(**filters):
+            return [(f.probe, f.entity) for f in read_findings(findings_file, **filters)]
+
+        assert entities(fact="auth_required") == [("auth", "GET /a")]
+        assert entities(probe="census", min_confidence=0.95) == [("census", "GET /b")]
+        assert entities(fact={"auth_required", "endpoint_tested"}, min_confidence=0.5) == \
+            [("census", "GET /a"), ("census", "GET /b")]
+        assert entities(probe="nope") == []
+
+    def test_filtered_rows_are_not_validated(self, tmp_path):
+        rows = _rows() + [{"probe": "broken", "fact": "x", "confidence": 7}]
+        (tmp_path / "f.json").write_text(json.dumps(rows), encoding="utf-8")
+        assert len(read_findings(tmp_path, probe=["census", "auth"])) == 3
+        with pytest.raises(ValueError):
+            read_findings(tmp_path)
+
+    @pytest.mark.parametrize("text, count", [("[]", 0), (" [ ] ", 0), ("", 0),
+                                             (json.dumps(_rows()[0]), 1)])
+    def test_edge_documents(self, tmp_path, text, count):
+        (tmp_path / "f.json").write_text(text, encoding="utf-8")
+        assert len(read_findings(tmp_path)) == count
+
+    @pytest.mark.parametrize("text", ["[{}", "[" + json.dumps(_rows()[0]) + " 1]", "{"])
+    def test_malformed(self, tmp_path, text):
+        (tmp_path / "f.json").write_text(text, encoding="utf-8")
+        with pytest.raises(ValueError):
+            read_findings(tmp_path)
+
+    def test_load_findings_env_and_filters(self, tmp_path):
+        write_findings(Dossier(target="t", env="db", findings=[Finding(**r) for r in _rows()]),
+                       tmp_path, "jsonl")
+        dossier = load_findings(tmp_path, fact="auth_required")
+        assert dossier.env == "db" and [f.probe for f in dossier.findings] == ["auth"]
+        columnar = load_findings(tmp_path, columnar=True, min_confidence=0.5)
+        assert len(columnar) == 2
+        assert [f.entity for f in load_findings_flat(tmp_path, probe="census")] == \
+            ["GET /a", "GET /b"]
+
+
+class TestParallelLoad:
+    @pytest.mark.parametrize("split", [1, 50, 173, 10_000])
+    def test_pieces_cover_every_line_once(self, tmp_path, monkeypatch, split):
+        monkeypatch.setattr("probe.storage.LOAD_SPLIT_SIZE", split)
+        path = tmp_path / "f.jsonl"
+        lines = [json.dumps({"i": i, "pad": "x" * (i % 37)}) + "\n" for i in range(60)]
+        path.write_text("".join(lines), encoding="utf-8")
+        read = []
+        for piece in _pieces(path, "jsonl", None, False, workers=4):
+            with open(path, "rb") as fh:
+                read.extend(line.decode() for line in _piece_lines(fh, piece))
+        assert read == lines
+
+    def test_matches_sequential(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("probe.storage.LOAD_SPLIT_SIZE", 1000)
+        write_findings(_dossier(40), tmp_path, "jsonl")
+        other = Dossier(target="t", env="db", findings=[Finding(**r) for r in _rows()])
+        write_findings(other, tmp_path, "json", "gzip")
+        sequential = read_findings(tmp_path)
+        assert len(sequential) == 43
+        assert _dump(read_findings(tmp_path, workers=3)) == _dump(sequential)
+        assert [f.entity for f in read_findings(tmp_path, workers=3, fact="f",
+                                                min_confidence=0.5)] == \
+            [f.entity for f in _dossier(40).findings]
+        batches = list(iter_finding_batches(tmp_path, batch_size=16, workers=2))
+        assert [len(b) for b in batches] == [16, 16, 11]
+
+    def test_bounded_pieces_in_flight(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("probe.storage.LOAD_SPLIT_SIZE", 2000)
+        submitted = []
+
+        class Pool(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append(args[0])
+                return super().submit(fn, *args)
+
+        monkeypatch.setattr("probe.storage.ProcessPoolExecutor", Pool)
+        path = write_findings(_dossier(100), tmp_path, "jsonl")
+        pieces = _pieces(path, "jsonl", None, False, workers=2)
+        assert len(pieces) > 6
+        batches = iter_finding_batches(path, batch_size=4, workers=2)
+        assert len(next(batches)) == 4
+        assert len(submitted) <= 3
+        rest = list(batches)
+        assert {len(b) for b in rest[:-1]} == {4} and len(submitted) == len(pieces)
+        assert sum(map(len, rest)) == 96
+
+
+class TestTrustedLoad:
+    def test_checksum_written(self, tmp_path):
+        path = write_findings(_dossier(), tmp_path, "jsonl", "gzip")
+        digest, name = checksum_path(path).read_text(encoding="utf-8").split()
+        assert name == path.name and len(digest) == 64
+        assert verify_checksum(path)
+        assert _dump(read_findings(path, trusted=True)) == _dump(_dossier().findings)
+
+    @pytest.mark.parametrize("compress", [None, "gzip", "xz"])
+    def test_checksum_without_file_digest(self, tmp_path, monkeypatch, compress):
+        # hashlib.file_digest появился в 3.11; запись и проверка без него
+        monkeypatch.delattr(hashlib, "file_digest", raising=False)
+        path = write_findings(_dossier(), tmp_path, "json", compress)
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        assert checksum_path(path).read_text(encoding="utf-8") == f"{digest}  {path.name}\n"
+        assert verify_checksum(path)
+        assert _dump(read_findings(path)) == _dump(_dossier().findings)
+
+    @pytest.mark.parametrize("fmt", ["json", "jsonl"])
+    def test_skips_validation_only_with_valid_checksum(self, tmp_path, fmt):
+        path = write_findings(_dossier(), tmp_path, fmt)
+        # confidence вне [0, 1]: такую запись пропускает только доверенная загрузка
+        text = re.sub(r'("confidence": ?)1\.0', r"\g<1>7.0", path.read_text(encoding="utf-8"))
+        path.write_text(text, encoding="utf-8")
+        assert not verify_checksum(path)
+        with pytest.raises(ValueError):
+            read_findings(path, trusted=True)
+        checksum_path(path).write_text(
+            f"{hashlib.sha256(path.read_bytes()).hexdigest()}  {path.name}\n", encoding="utf-8")
+        assert [f.confidence for f in read_findings(path, trusted=True)] == [7.0] * 3
+        with pytest.raises(ValueError):
+            read_findings(path)
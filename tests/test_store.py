@@ -0,0 +1,138 @@
+"""Тесты хранилища SQLite: запись сканов, выборки запросом, загрузчики."""
+
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from probe.correlator import correlate, load_findings
+from probe.models import Dossier, Finding
+from probe.storage import read_findings
+from probe.store import StoreDossier, StoreWriter, write_store
+
+TS = datetime(2026, 10, 19, 10, 0, tzinfo=timezone.utc)
+
+
+def _findings(env: str = "test") -> list[Finding]:
+    return [
+        Finding(probe="census", env=env, entity="PUT /documents/{id}/approve",
+                fact="endpoint_tested",
+                data={"test_class": "DocTest", "test_method": "approve", "method": "PUT"},
+                location="src/DocTest.java:12", tags=["api"], ts=TS),
+        Finding(probe="auth", env=env, entity="PUT /documents/{id}/approve",
+                fact="auth_required",
+                data={"role": "OPERATOR", "test_class": "DocTest", "test_method": "approve",
+                      "status_code": 403, "is_public": False},
+                location="src/DocTest.java:12", confidence=0.7,
+                tags=["auth", "role:operator", "auth"], ts=TS),
+        Finding(probe="auth", env=env, entity="GET /admin/users", fact="auth_required",
+                data={"role": "ADMIN", "test_class": "AdminTest", "status_code": 200},
+                location="src/AdminTest.java", tags=["auth", "role:admin"], ts=TS),
+        Finding(probe="seq", env=env, entity="workflow:doc", fact="business_workflow",
+                data={"steps": [{"order": 1, "action": None}]}, location=None, ts=TS),
+    ]
+
+
+def _dump(findings) -> list[dict]:
+    return [f.model_dump(mode="json") for f in findings]
+
+
+@pytest.fixture
+def dossier() -> Dossier:
+    return Dossier(target="svc", env="test", scanned_at=TS, findings=_findings())
+
+
+@pytest.fixture
+def store(tmp_path, dossier):
+    path = write_store(dossier, tmp_path / "findings.db")
+    with StoreDossier(path) as opened:
+        yield opened
+
+
+class TestStoreDossier:
+    def test_round_trip(self, store, dossier):
+        assert (store.target, store.env, store.scanned_at) == ("svc", "test", TS)
+        assert len(store) == 4
+        assert _dump(store.findings) == _dump(dossier.findings)
+
+    def test_query_matches_dossier(self, store, dossier):
+        criteria = [{"fact": ("auth_required", "business_workflow")},
+                    {"test_class": "DocTest"}, {"probe": "auth", "tag": "role:operator"},
+                    {"file": "src/AdminTest.java"}, {"entity": "GET /admin/users"},
+                    {"tag": "nope"}, {"fact": ()}]
+        for query in criteria:
+            assert _dump(store.query(**query)) == _dump(dossier.query(**query))
+        for field in ("probe", "fact", "tag", "entity", "test_class", "file"):
+            assert store.counts(field) == dossier.counts(field)
+        assert correlate(store) == correlate(dossier)
+
+    def test_extended_criteria(self, store):
+        assert [f.fact for f in store.query(test_method="approve")] == \
+            ["endpoint_tested", "auth_required"]
+        assert [f.entity for f in store.query(data={"role": "OPERATOR"})] == \
+            ["PUT /documents/{id}/approve"]
+        assert len(store.query(data={"status_code": "403"})) == 1
+        assert len(store.query(data={"status_code": 200, "is_public": False})) == 0
+        assert len(store.query(data={"is_public": False})) == 1
+        assert len(store.query(min_confidence=0.8, limit=2)) == 2
+        assert store.counts("tag", probe="auth") == {"auth": 2, "role:operator": 1,
+                                                     "role:admin": 1}
+        with pytest.raises(TypeError):
+            store.query(nope="x")
+
+    def test_rejects_other_files(self, tmp_path):
+        other = tmp_path / "other.db"
+        sqlite3.connect(other).execute("CREATE TABLE t (x)").connection.close()
+        with pytest.raises(ValueError):
+            StoreDossier(other)
+        text = tmp_path / "x.db"
+        text.write_text("[]", encoding="utf-8")
+        with pytest.raises(ValueError):
+            StoreDossier(text)
+
+
+class TestStoreWriter:
+    def test_rescan_replaces_same_target_and_env(self, tmp_path, dossier):
+        path = tmp_path / "findings.db"
+        write_store(dossier, path)
+        write_store(Dossier(target="other", env="test", findings=_findings()[:1]), path)
+        write_store(Dossier(target="svc", env="db", findings=_findings("db")[:2]), path)
+        write_store(Dossier(target="svc", env="test", findings=_findings()[2:]), path)
+        with StoreDossier(path) as store:
+            assert store.counts("env") == {"test": 3, "db": 2}
+            assert len(store.query(env="test", test_class="AdminTest")) == 1
+
+    def test_batches_and_abort(self, tmp_path, dossier):
+        path = write_store(dossier, tmp_path / "findings.db")
+        with pytest.raises(RuntimeError):
+            with StoreWriter(path, "svc", "test", batch_size=2) as writer:
+                writer.write(_findings() * 3)
+                assert writer.count == 12
+                raise RuntimeError("скан прерван")
+        with StoreDossier(path) as store:
+            assert _dump(store.findings) == _dump(dossier.findings)
+        with StoreWriter(path, "svc", "test", batch_size=3) as writer:
+            writer.write(iter(_findings() * 2))
+        with StoreDossier(path) as store:
+            assert len(store) == 8 and store.counts("probe")["auth"] == 4
+        count = sqlite3.connect(path).execute("SELECT COUNT(*) FROM findings").fetchone()[0]
+        assert count == 8
+
+
+class TestLoaders:
+    def test_load_findings_opens_store(self, tmp_path, dossier):
+        path = write_store(dossier, tmp_path / "findings.db")
+        loaded = load_findings(path)
+        assert isinstance(loaded, StoreDossier)
+        loaded.close()
+        assert [f.entity for f in load_findings(path, probe="auth").findings] == \
+            ["PUT /documents/{id}/approve", "GET /admin/users"]
+        assert len(load_findings(path, columnar=True)) == 4
+
+    def test_read_findings_pushes_filters(self, tmp_path, dossier):
+        path = write_store(dossier, tmp_path / "findings.db")
+        assert _dump(read_findings(path)) == _dump(dossier.findings)
+        assert [f.entity for f in read_findings(path, fact="auth_required",
+                                                min_confidence=0.8)] == ["GET /admin/users"]
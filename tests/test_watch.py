@@ -0,0 +1,196 @@
+"""Тесты режима наблюдения: живое досье, наблюдатели, debounce."""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from probe.models import Finding
+from probe.runner import run_probes
+from probe.watch import InotifyWatcher, LiveDossier, PollingWatcher, watch, write_live
+from probes.base import BaseProbe
+from tests.test_distributed import _dup_probes
+from tests.test_runner import FileProbe, WholeProbe, _make_tree
+
+
+class ContentProbe(BaseProbe):
+    """Пофайловый зонд, чей finding зависит от содержимого файла."""
+    name = "content-probe"
+    env = "test"
+    file_glob = "*.java"
+
+    def scan(self, target) -> list[Finding]:
+        raise NotImplementedError
+
+    def scan_file(self, path: Path, base: Path) -> list[Finding]:
+        return [Finding(probe=self.name, env=self.env, entity=path.stem, fact="file_text",
+                        data={"text": path.read_text(encoding="utf-8")},
+                        location=path.relative_to(base).as_posix())]
+
+
+def _drain(watcher) -> set[Path]:
+    seen: set[Path] = set()
+    while (more := watcher.poll(0.2)):
+        seen |= more
+    return seen
+
+
+def _facts(findings):
+    return [f.model_dump(exclude={"ts"}) for f in findings]
+
+
+@pytest.fixture
+def live(tmp_path):
+    target = tmp_path / "svc"
+    (target / "sub").mkdir(parents=True)
+    _make_tree(target, 3)
+    (target / "sub" / "S.java").write_text("class S {}\n", encoding="utf-8")
+    return LiveDossier([ContentProbe(), WholeProbe(), FileProbe()], target, "test")
+
+
+class TestLiveDossier:
+    def test_initial_scan_matches_run_probes(self, live):
+        expected = run_probes(live.probes, live.base, "test")
+        assert _facts(live.dossier.findings) == _facts(expected.findings)
+
+    def test_dedup_matches_run_probes(self, tmp_path):
+        _make_tree(tmp_path, 4)
+        live = LiveDossier(_dup_probes(), tmp_path, "test", dedup="exact")
+        expected = run_probes(_dup_probes(), tmp_path, "test", dedup="exact")
+        assert _facts(live.dossier.findings) == _facts(expected.findings)
+        (tmp_path / "T0.java").unlink()
+        live.update([tmp_path / "T0.java"])
+        assert _facts(live.dossier.findings) == \
+            _facts(run_probes(_dup_probes(), tmp_path, "test", dedup="exact").findings)
+
+    def test_update_edit_add_delete(self, live):
+        dossier = live.dossier
+        (live.base / "T1.java").write_text("class T1 { int x; }\n", encoding="utf-8")
+        (live.base / "sub" / "N.java").write_text("class N {}\n", encoding="utf-8")
+        (live.base / "T0.java").unlink()
+        (live.base / "README.md").write_text("изменён", encoding="utf-8")
+
+        changed = live.update([live.base / "T1.java", live.base / "sub" / "N.java",
+                               live.base / "T0.java", live.base / "README.md"])
+        assert changed == ["T0.java", "T1.java", "sub/N.java"]
+        assert live.dossier is dossier
+        assert _facts(dossier.findings) == _facts(run_probes(live.probes, live.base, "test").findings)
+
+    def test_unchanged_file_is_not_reported(self, live):
+        path = live.base / "T2.java"
+        path.write_text(path.read_text(encoding="utf-8"), encoding="utf-8")
+        assert live.update([path, live.base.parent / "Outside.java"]) == []
+
+    def test_write_live(self, live, tmp_path):
+        map_file = write_live(live, tmp_path / "out")
+        assert map_file == tmp_path / "out" / "product-map.md"
+        assert "Findings: 9" in map_file.read_text(encoding="utf-8")
+        assert (tmp_path / "out" / "test_findings.json").exists()
+
+
+class TestWatchers:
+    def test_polling(self, tmp_path):
+        _make_tree(tmp_path, 2)
+        watcher = PollingWatcher(tmp_path, interval=0.01)
+        assert watcher.poll(0) == set()
+        (tmp_path / "T0.java").write_text("class T0 { int y; }\n", encoding="utf-8")
+        (tmp_path / "T1.java").unlink()
+        assert watcher.poll(0) == {tmp_path / "T0.java", tmp_path / "T1.java"}
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify есть только в Linux")
+    def test_inotify(self, tmp_path):
+        _make_tree(tmp_path, 1)
+        watcher = InotifyWatcher(tmp_path)
+        try:
+            (tmp_path / "T0.java").write_text("class T0 { int y; }\n", encoding="utf-8")
+            assert tmp_path / "T0.java" in watcher.poll(1)
+            (tmp_path / "pkg").mkdir()
+            (tmp_path / "pkg" / "P.java").write_text("class P {}\n", encoding="utf-8")
+            assert tmp_path / "pkg" / "P.java" in _drain(watcher)
+        finally:
+            watcher.close()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify есть только в Linux")
+    def test_inotify_directory_rename(self, tmp_path):
+        (tmp_path / "old" / "deep").mkdir(parents=True)
+        (tmp_path / "old" / "A.java").write_text("class A {}\n", encoding="utf-8")
+        (tmp_path / "old" / "deep" / "B.java").write_text("class B {}\n", encoding="utf-8")
+        watcher = InotifyWatcher(tmp_path)
+        try:
+            (tmp_path / "old").rename(tmp_path / "new")
+            assert _drain(watcher) == {
+                tmp_path / "old" / "A.java", tmp_path / "old" / "deep" / "B.java",
+                tmp_path / "new" / "A.java", tmp_path / "new" / "deep" / "B.java",
+            }
+            # Переименованное дерево наблюдается по новому пути
+            (tmp_path / "new" / "deep" / "B.java").write_text("class B { int x; }\n",
+                                                              encoding="utf-8")
+            assert _drain(watcher) == {tmp_path / "new" / "deep" / "B.java"}
+        finally:
+            watcher.close()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify есть только в Linux")
+    def test_inotify_directory_moved_out(self, tmp_path):
+        target, outside = tmp_path / "target", tmp_path / "outside"
+        (target / "pkg").mkdir(parents=True)
+        outside.mkdir()
+        (target / "pkg" / "P.java").write_text("class P {}\n", encoding="utf-8")
+        (target / "T.java").write_text("class T {}\n", encoding="utf-8")
+        watcher = InotifyWatcher(target)
+        try:
+            (target / "pkg").rename(outside / "pkg")
+            assert _drain(watcher) == {target / "pkg" / "P.java"}
+            # Вынесенная директория больше не наблюдается
+            (outside / "pkg" / "P.java").write_text("class P { int x; }\n", encoding="utf-8")
+            assert _drain(watcher) == set()
+        finally:
+            watcher.close()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify есть только в Linux")
+    def test_inotify_lost_root_rescans(self, tmp_path):
+        target = tmp_path / "target"
+        target.mkdir()
+        (target / "T.java").write_text("class T {}\n", encoding="utf-8")
+        watcher = InotifyWatcher(target)
+        try:
+            target.rename(tmp_path / "moved")
+            assert _drain(watcher) == {target / "T.java"}
+        finally:
+            watcher.close()
+
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify есть только в Linux")
+    def test_inotify_overflow_rescans(self, tmp_path, monkeypatch):
+        _make_tree(tmp_path, 2)
+        watcher = InotifyWatcher(tmp_path)
+        try:
+            (tmp_path / "T0.java").unlink()
+            (tmp_path / "N.java").write_text("class N {}\n", encoding="utf-8")
+            overflow = InotifyWatcher._EVENT.pack(-1, InotifyWatcher._IN_Q_OVERFLOW, 0, 0)
+            monkeypatch.setattr(os, "read", lambda fd, size: overflow)
+            expected = {p for p in tmp_path.rglob("*") if p.is_file()} | {tmp_path / "T0.java"}
+            assert watcher.poll(1) == expected
+        finally:
+            monkeypatch.undo()
+            watcher.close()
+
+    def test_watch_debounces_bursts(self, live):
+        updates: list[list[str]] = []
+        done = threading.Event()
+
+        def on_update(changed):
+            updates.append(changed)
+            done.set()
+
+        watcher = PollingWatcher(live.base, interval=0.05)
+        thread = threading.Thread(target=watch, args=(live, watcher, on_update, 0.05, done.is_set))
+        thread.start()
+        for i in range(3):
+            (live.base / "T1.java").write_text(f"class T1 {{ int x{i}; }}\n", encoding="utf-8")
+            (live.base / "T2.java").write_text(f"class T2 {{ int y{i}; }}\n", encoding="utf-8")
+        thread.join(10)
+        assert not thread.is_alive()
+        assert updates == [["T1.java", "T2.java"]]